@@ -0,0 +1,47 @@
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    # Imports of the interpreter itself, such as site
+    'baseline': 'pass',
+    'package': 'import tool_directory',
+    'cli': 'import tool_directory.cli',
+    'loader': 'from tool_directory import ToolLoader',
+    'model': 'from tool_directory import OpenApiTool',
+}
+
+
+def import_time(statement: str) -> float:
+    # Sum of top level imports reported by -X importtime in a fresh interpreter, in seconds
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement], check=True, capture_output=True, text=True
+    ).stderr
+    return sum(int(x) for x in re.findall(r'^import time:\s+\d+ \|\s+(\d+) \| \S', output, re.MULTILINE)) / 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import time of tool_directory entry points.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per entry point.')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+    args = parser.parse_args()
+
+    results = []
+    for name, statement in STATEMENTS.items():
+        seconds = [import_time(statement) for _ in range(args.repeat)]
+        results.append({'entry': name, 'statement': statement, 'median': statistics.median(seconds)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{"entry":<10}{"seconds":>10}  statement')
+    for result in results:
+        print(f'{result["entry"]:<10}{result["median"]:>10.4f}  {result["statement"]}')
+
+
+if __name__ == '__main__':
+    main()
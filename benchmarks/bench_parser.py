@@ -0,0 +1,43 @@
+import argparse
+import json
+import timeit
+
+import yaml
+from synthetic import generate_openapi
+
+from tool_directory.parser import PARSERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare spec parser backends on a large synthetic OpenAPI document.')
+    parser.add_argument('--operations', type=int, default=5000, help='Number of operations in the spec.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of measurements per backend.')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+    args = parser.parse_args()
+
+    spec = generate_openapi(args.operations)
+    documents = {
+        'yaml': yaml.dump(spec, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper)).encode('utf-8'),
+        'json': json.dumps(spec).encode('utf-8'),
+    }
+
+    results = []
+    for kind, content in documents.items():
+        for name, factory in PARSERS.items():
+            if kind == 'yaml' and name == 'json':
+                continue
+            backend = factory()
+            seconds = min(timeit.repeat(lambda: backend.parse(content), number=1, repeat=args.repeat))
+            results.append({'format': kind, 'bytes': len(content), 'parser': name, 'seconds': seconds})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{"format":<8}{"size":>12}{"parser":>12}{"seconds":>12}')
+    for result in results:
+        print(f'{result["format"]:<8}{result["bytes"]:>12,}{result["parser"]:>12}{result["seconds"]:>12.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from server import StandInServer
+
+from tool_directory import ToolLoader
+from tool_directory.mirror import Mirror
+from tool_directory.schema import default_schema_cache
+from tool_directory.session import SessionPool
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    seconds = []
+    for _ in range(repeat):
+        default_schema_cache.clear()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return {'min': min(seconds), 'median': statistics.median(seconds)}
+
+
+def percentile(values: List[float], percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def measure_memory(loader: ToolLoader) -> Dict[str, float]:
+    default_schema_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    tools = loader.get_tools(parameters={'X-Api-Key': 'dummy'})
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'tools': len(tools), 'bytes_per_tool': current / max(len(tools), 1)}
+
+
+def measure_requests(loader: ToolLoader, calls: int, concurrency: int) -> Dict[str, float]:
+    tool = loader.get_tools(parameters={'X-Api-Key': 'dummy'}, session=SessionPool(pool_maxsize=concurrency))[0]
+
+    def call(_) -> float:
+        start = time.perf_counter()
+        tool.request_by_spec(id='42', limit='10')
+        return time.perf_counter() - start
+
+    # Warm up connections
+    call(None)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'calls': calls,
+        'concurrency': concurrency,
+        'throughput': calls / elapsed,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def run(sizes: List[int], repeat: int, calls: int, concurrency: int) -> List[Dict[str, Any]]:
+    results = []
+    with StandInServer() as server, tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            name = f'synthetic{size}'
+            server.add_integration(name, size)
+            Mirror(directory, source=server.url).sync([name])
+
+            loader = ToolLoader(name, source=server.url)
+            result: Dict[str, Any] = {
+                'operations': size,
+                'construct': measure(lambda: ToolLoader(name, language='ja', source=server.url), repeat),
+                'construct_mirror': measure(lambda: ToolLoader(name, language='ja', source=directory), repeat),
+                'get_tools': measure(lambda: loader.get_tools(parameters={'X-Api-Key': 'dummy'}), repeat),
+                'memory': measure_memory(loader),
+                'request_by_spec': measure_requests(loader, calls, concurrency),
+            }
+            results.append(result)
+            print(
+                f'{size:>6} operations: construct {result["construct"]["median"]:.4f}s,'
+                f' from mirror {result["construct_mirror"]["median"]:.4f}s,'
+                f' get_tools {result["get_tools"]["median"]:.4f}s,'
+                f' {result["memory"]["bytes_per_tool"]:,.0f} bytes/tool,'
+                f' {result["request_by_spec"]["throughput"]:,.0f} calls/s'
+                f' (p99 {result["request_by_spec"]["p99"] * 1000:.2f}ms)',
+                file=sys.stderr,
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ToolLoader and OpenApiTool against a local stand-in.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Numbers of operations.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of measurements for loader benchmarks.')
+    parser.add_argument('--calls', type=int, default=1000, help='Number of tool calls.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of threads calling tools.')
+    parser.add_argument('--output', help='Write results as JSON to this file instead of stdout.')
+    args = parser.parse_args()
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': run(args.sizes, args.repeat, args.calls, args.concurrency),
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='UTF-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import yaml
+from synthetic import generate
+
+_RESPONSE = json.dumps({'id': '42', 'name': 'synthetic resource'}).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: 'StandInServer'
+
+    def do_GET(self):
+        document = self.server.documents.get(self.path)
+        if document is not None:
+            self._respond(200, document, 'application/yaml')
+        elif self.path.startswith('/api/'):
+            self._respond(200, _RESPONSE, 'application/json')
+        else:
+            self._respond(404, b'Not found', 'text/plain')
+
+    def do_POST(self):
+        self._read_body()
+        self._respond(200, _RESPONSE, 'application/json')
+
+    do_PUT = do_POST
+    do_PATCH = do_POST
+
+    def do_DELETE(self):
+        self._respond(200, _RESPONSE, 'application/json')
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+    def _respond(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Serves both the tool directory (/integrations/...) and the target API (/api/...)
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.host = host
+        self.documents: Dict[str, bytes] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.server_port}'
+
+    def add_integration(self, name: str, operations: int):
+        integration, openapi = generate(operations, server=f'{self.url}/api')
+        dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+        self.documents[f'/integrations/{name}/integration.yaml'] = yaml.dump(
+            integration, Dumper=dumper, allow_unicode=True
+        ).encode('utf-8')
+        self.documents[f'/integrations/{name}/openapi.yaml'] = yaml.dump(
+            openapi, Dumper=dumper, allow_unicode=True
+        ).encode('utf-8')
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,78 @@
+from typing import Any, Dict, Tuple
+
+METHODS = ('get', 'post', 'put', 'delete')
+
+
+def generate_openapi(operations: int, server: str = 'http://localhost/synthetic') -> Dict[str, Any]:
+    paths: Dict[str, Any] = {}
+    for index in range(operations):
+        group = index // len(METHODS)
+        path_item = paths.setdefault(
+            f'/resources{group}/{{id}}',
+            {'parameters': [{'$ref': '#/components/parameters/Id'}]},
+        )
+        path_item[METHODS[index % len(METHODS)]] = {
+            'operationId': f'operation{index}',
+            'description': f'Synthetic operation {index} which works on the resource group {group}.',
+            'tags': [f'group{index % 10}'],
+            'security': [{'ApiKey': []}],
+            'parameters': [
+                {'$ref': '#/components/parameters/Limit'},
+                {'name': 'cursor', 'in': 'query', 'description': 'Cursor for the next page.'},
+            ],
+            'responses': {
+                '200': {
+                    'description': 'Successful response',
+                    'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Resource'}}},
+                }
+            },
+        }
+
+    return {
+        'openapi': '3.0.0',
+        'info': {'title': 'Synthetic API', 'version': '1.0.0'},
+        'servers': [{'url': server}],
+        'paths': paths,
+        'components': {
+            'parameters': {
+                'Id': {'name': 'id', 'in': 'path', 'required': True, 'description': 'Identifier of the resource.'},
+                'Limit': {'name': 'limit', 'in': 'query', 'description': 'Maximum number of items.'},
+            },
+            'securitySchemes': {
+                'ApiKey': {'type': 'apiKey', 'in': 'header', 'name': 'X-Api-Key', 'description': 'API key.'},
+            },
+            'schemas': {
+                'Resource': {
+                    'type': 'object',
+                    'properties': {'id': {'type': 'string'}, 'name': {'type': 'string'}},
+                }
+            },
+        },
+    }
+
+
+def generate_integration(operations: int) -> Dict[str, Any]:
+    paths: Dict[str, Any] = {}
+    for index in range(operations):
+        group = index // len(METHODS)
+        paths.setdefault(f'/resources{group}/{{id}}', {})[METHODS[index % len(METHODS)]] = {
+            'description': {
+                'en': f'Synthetic operation {index} in English.',
+                'ja': f'合成オペレーション{index}の説明。',
+            },
+            'parameters': [
+                {'in': 'query', 'name': 'limit', 'description': {'en': 'Maximum items.', 'ja': '最大件数。'}},
+                {'in': 'path', 'name': 'id', 'description': {'en': 'Resource id.', 'ja': 'リソースID。'}},
+            ],
+        }
+
+    return {
+        'version': '0.0.1',
+        'openApi': './openapi.yaml',
+        'description': f'Synthetic integration with {operations} operations.',
+        'paths': paths,
+    }
+
+
+def generate(operations: int, server: str = 'http://localhost/synthetic') -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return generate_integration(operations), generate_openapi(operations, server=server)
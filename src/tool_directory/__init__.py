@@ -1,4 +1,29 @@
-from .loader import ToolLoader
-from .model import OpenApiTool
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from .loader import ToolLoader
+    from .model import OpenApiTool
+
+# Public names and the modules which define them. Modules are imported on first access so that `import tool_directory`
+# stays cheap and LangChain is imported only when tools are built.
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    'ToolLoader': '.loader',
+    'OpenApiTool': '.model',
+}
 
 __all__ = ['ToolLoader', 'OpenApiTool']
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
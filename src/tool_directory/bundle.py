@@ -0,0 +1,136 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Union, cast
+
+from .endpoint import Endpoint
+from .exceptions import InvalidBundleException
+from .schema import ArgumentField, create_args_schema, get_args_fields
+from .toolset import Operation
+from .utils import write_atomic
+
+BUNDLE_MAGIC = b'TOOLDIR\0'
+BUNDLE_VERSION = 1
+
+# Bundles larger than this are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+# Layout: magic, version, header length, JSON header and JSON endpoint records.
+# The header holds integration metadata and an index of records. Each index entry has offset (relative to the end of
+# the header) and length of the record, and method, path, operationId and tags to filter without decoding records.
+_PREFIX = struct.Struct('<8sII')
+
+
+def write_bundle(
+    path: str,
+    name: str,
+    language: str,
+    description: str,
+    servers: List[str],
+    operations: List[Operation],
+    endpoints: List[Endpoint],
+):
+    records = []
+    index = []
+    offset = 0
+    for operation, endpoint in zip(operations, endpoints):
+        record = _dumps(
+            {
+                'method': endpoint.method,
+                'path': endpoint.path,
+                'description': endpoint.description,
+                'args_source': endpoint.args_source,
+                'args_fields': get_args_fields(endpoint.args_schema),
+                'body_type': endpoint.body_type,
+            }
+        )
+        records.append(record)
+        index.append([offset, len(record), operation.method, operation.path, operation.operation_id, operation.tags])
+        offset += len(record)
+
+    header = _dumps(
+        {'name': name, 'language': language, 'description': description, 'servers': servers, 'endpoints': index}
+    )
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, _PREFIX.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(header)) + header + b''.join(records))
+
+
+class Bundle:
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+                self._buffer: Union[bytes, mmap.mmap] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = f.read()
+
+        if len(self._buffer) < _PREFIX.size:
+            raise InvalidBundleException(f'Specified file({path}) is not a tool bundle.')
+        magic, version, header_length = _PREFIX.unpack_from(self._buffer)
+        if magic != BUNDLE_MAGIC:
+            raise InvalidBundleException(f'Specified file({path}) is not a tool bundle.')
+        if version != BUNDLE_VERSION:
+            raise InvalidBundleException(f'Bundle version {version} of {path} is not supported.')
+
+        self._records_offset = _PREFIX.size + header_length
+        self._header: Dict[str, Any] = json.loads(self._slice(_PREFIX.size, header_length))
+
+    @property
+    def name(self) -> str:
+        return self._header['name']
+
+    @property
+    def language(self) -> str:
+        return self._header['language']
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._header['description']
+
+    @property
+    def servers(self) -> List[str]:
+        return self._header['servers']
+
+    def __len__(self) -> int:
+        return len(self._header['endpoints'])
+
+    def operations(self) -> List[Operation]:
+        return [
+            Operation(position=index, method=method, path=path, operation_id=operation_id, tags=tuple(tags))
+            for index, (_, _, method, path, operation_id, tags) in enumerate(self._header['endpoints'])
+        ]
+
+    def record(self, index: int) -> Dict[str, Any]:
+        offset, length = self._header['endpoints'][index][:2]
+        return json.loads(self._slice(self._records_offset + offset, length))
+
+    def endpoint(self, index: int) -> Endpoint:
+        record = self.record(index)
+        return Endpoint(
+            method=record['method'],
+            path=record['path'],
+            description=record['description'],
+            args_schema=create_args_schema(cast(ArgumentField, tuple(x)) for x in record['args_fields']),
+            args_source=record['args_source'],
+            # Bundles compiled before request bodies were supported have no body_type
+            body_type=record.get('body_type'),
+        )
+
+    def endpoints(self) -> Iterator[Endpoint]:
+        for index in range(len(self)):
+            yield self.endpoint(index)
+
+    def _slice(self, offset: int, length: int) -> bytes:
+        end = offset + length
+        return self._buffer[offset:end]
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .utils import remove_file, write_atomic
+
+
+def default_cache_directory() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'tool-directory')
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    content_type: Optional[str] = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+# Contents are stored once per sha256 digest under blobs/ and each URL has a metadata file under meta/ holding the
+# digest and HTTP validators. The mtime of the metadata file tracks the last access and drives LRU eviction.
+class SpecCache:
+    def __init__(self, directory: Optional[str] = None, ttl: float = 300, max_size: int = 64 * 1024 * 1024):
+        self.directory = directory or default_cache_directory()
+        self.ttl = ttl
+        self.max_size = max_size
+
+        os.makedirs(self._blob_directory, exist_ok=True)
+        os.makedirs(self._meta_directory, exist_ok=True)
+
+    @property
+    def _blob_directory(self) -> str:
+        return os.path.join(self.directory, 'blobs')
+
+    @property
+    def _meta_directory(self) -> str:
+        return os.path.join(self.directory, 'meta')
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_directory, digest)
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self._meta_directory, _digest(url.encode('utf-8')) + '.json')
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        meta_path = self._meta_path(url)
+        try:
+            with open(meta_path, 'rb') as f:
+                meta = json.loads(f.read())
+            with open(self._blob_path(meta['digest']), 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if _digest(content) != meta['digest']:
+            return None
+
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return CacheEntry(
+            url=url,
+            content=content,
+            etag=meta.get('etag'),
+            last_modified=meta.get('last_modified'),
+            fetched_at=meta.get('fetched_at', 0),
+            content_type=meta.get('content_type'),
+        )
+
+    def set(
+        self,
+        url: str,
+        content: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ):
+        digest = _digest(content)
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            write_atomic(blob_path, content)
+
+        meta = {
+            'url': url,
+            'digest': digest,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': content_type,
+            'fetched_at': time.time(),
+        }
+        write_atomic(self._meta_path(url), json.dumps(meta).encode('utf-8'))
+
+        self.evict()
+
+    def revalidated(self, entry: CacheEntry):
+        self.set(
+            entry.url,
+            entry.content,
+            etag=entry.etag,
+            last_modified=entry.last_modified,
+            content_type=entry.content_type,
+        )
+
+    def evict(self):
+        metas = []
+        for filename in os.listdir(self._meta_directory):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self._meta_directory, filename)
+            try:
+                with open(path, 'rb') as f:
+                    metas.append((os.path.getmtime(path), path, json.loads(f.read())['digest']))
+            except (OSError, ValueError, KeyError):
+                continue
+
+        sizes = {}
+        for filename in os.listdir(self._blob_directory):
+            if filename.startswith('.tmp-'):
+                continue
+            try:
+                sizes[filename] = os.path.getsize(self._blob_path(filename))
+            except OSError:
+                continue
+
+        # Remove blobs which are no longer referenced from any metadata
+        referenced = {digest for _, _, digest in metas}
+        for digest in set(sizes) - referenced:
+            remove_file(self._blob_path(digest))
+            del sizes[digest]
+
+        total = sum(sizes.values())
+        metas.sort()
+        references = {}
+        for _, _, digest in metas:
+            references[digest] = references.get(digest, 0) + 1
+
+        for _, path, digest in metas:
+            if total <= self.max_size:
+                break
+            remove_file(path)
+            references[digest] -= 1
+            if references[digest] == 0:
+                remove_file(self._blob_path(digest))
+                total -= sizes.pop(digest, 0)
+
+    def clear(self):
+        for directory in (self._meta_directory, self._blob_directory):
+            for filename in os.listdir(directory):
+                remove_file(os.path.join(directory, filename))
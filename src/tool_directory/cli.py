@@ -0,0 +1,81 @@
+import argparse
+import sys
+from typing import List, Optional
+
+SOURCE_HELP = 'Base URL or local directory of the tool directory. (default: $TOOL_DIRECTORY_SOURCE or the public one)'
+
+
+# Commands import what they use so that parsing arguments and --help stay fast
+
+
+def compile_command(args: argparse.Namespace):
+    from .cache import SpecCache
+    from .loader import ToolLoader
+
+    cache = SpecCache(directory=args.cache_dir) if args.cache_dir else None
+    loader = ToolLoader(args.name, language=args.language, cache=cache, source=args.source)
+    output = args.output or f'{args.name}.{args.language}.tdb'
+    loader.compile(output)
+    print(f'Compiled {args.name} into {output}')
+
+
+def index_command(args: argparse.Namespace):
+    from .cache import SpecCache
+    from .search import SearchIndex
+
+    cache = SpecCache(directory=args.cache_dir) if args.cache_dir else None
+    index = SearchIndex.build(args.names, languages=args.language, cache=cache, source=args.source)
+    index.save(args.output)
+    print(f'Indexed {len(index)} documents into {args.output}')
+
+
+def sync_command(args: argparse.Namespace):
+    from .mirror import Mirror
+
+    result = Mirror(args.directory, source=args.source, max_workers=args.max_workers).sync(args.names)
+    print(f'Synced {len(result.downloaded)} changed and {len(result.unchanged)} unchanged files into {args.directory}')
+    for name, error in result.errors.items():
+        print(f'Failed to sync {name}: {error}', file=sys.stderr)
+    if result.errors:
+        sys.exit(1)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='tool-directory', description='Utilities for the Tool Directory.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = subparsers.add_parser('compile', help='Compile an integration into a tool bundle.')
+    compile_parser.add_argument('name', help='Name of the integration in the tool directory.')
+    compile_parser.add_argument('-l', '--language', default='en', help='Language of descriptions. (default: en)')
+    compile_parser.add_argument('-o', '--output', help='Path of the bundle. (default: <name>.<language>.tdb)')
+    compile_parser.add_argument('--cache-dir', help='Directory to cache fetched documents.')
+    compile_parser.add_argument('--source', help=SOURCE_HELP)
+    compile_parser.set_defaults(func=compile_command)
+
+    index_parser = subparsers.add_parser('index', help='Build a search index of integrations.')
+    index_parser.add_argument('names', nargs='+', help='Names of the integrations in the tool directory.')
+    index_parser.add_argument(
+        '-l', '--language', action='append', help='Language to index, repeatable. (default: all translated languages)'
+    )
+    index_parser.add_argument(
+        '-o', '--output', default='tool-directory.tdi', help='Path of the index. (default: %(default)s)'
+    )
+    index_parser.add_argument('--cache-dir', help='Directory to cache fetched documents.')
+    index_parser.add_argument('--source', help=SOURCE_HELP)
+    index_parser.set_defaults(func=index_command)
+
+    sync_parser = subparsers.add_parser('sync', help='Mirror integrations of the tool directory into a directory.')
+    sync_parser.add_argument('directory', help='Directory of the mirror.')
+    sync_parser.add_argument('names', nargs='+', help='Names of the integrations in the tool directory.')
+    sync_parser.add_argument('--source', help=SOURCE_HELP)
+    sync_parser.add_argument(
+        '--max-workers', type=int, default=8, help='Number of parallel downloads. (default: %(default)s)'
+    )
+    sync_parser.set_defaults(func=sync_command)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = create_parser().parse_args(argv)
+    args.func(args)
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+# Concurrent calls with the same key wait for the first one and share its result (or exception) instead of running
+# again. Async calls are coalesced per event loop.
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._async_calls: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]' = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self._coalesced
+
+    def do(self, key: str, call: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            shared = self._calls.get(key)
+            if shared is None:
+                future: Future = Future()
+                self._calls[key] = future
+            else:
+                self._coalesced += 1
+
+        if shared is not None:
+            return shared.result(), True
+
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return result, False
+
+    async def ado(self, key: str, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.get(loop)
+            if calls is None:
+                calls = self._async_calls[loop] = {}
+            shared = calls.get(key)
+            if shared is None:
+                future = calls[key] = loop.create_future()
+            else:
+                self._coalesced += 1
+
+        if shared is not None:
+            # Cancellation of a waiter must not cancel the shared call
+            try:
+                return await asyncio.shield(shared), True
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+            # The owner was cancelled, its cancellation belongs to its caller only and a waiter takes the call over
+            return await self.ado(key, call)
+
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # Waiters see the cancelled future and call again
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters may not exist, avoid logging "Future exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                calls.pop(key, None)
+        return result, False
+
+
+_default_single_flight: Optional[SingleFlight] = None
+_default_single_flight_lock = threading.Lock()
+
+
+def default_single_flight() -> SingleFlight:
+    global _default_single_flight
+
+    if _default_single_flight is None:
+        with _default_single_flight_lock:
+            if _default_single_flight is None:
+                _default_single_flight = SingleFlight()
+    return _default_single_flight
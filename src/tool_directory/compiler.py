@@ -0,0 +1,121 @@
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from .endpoint import Endpoint
+from .schema import ArgumentField, create_args_schema
+from .upload import BINARY, BODY_KINDS, body_kind
+
+_MISSING = object()
+
+
+class EndpointCompiler:
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.security_schemes: Dict[str, Any] = spec.get('components', {}).get('securitySchemes', {})
+        self._refs: Dict[str, Any] = {}
+
+    def compile(self, path: str, method: str) -> Endpoint:
+        path_item = self.resolve(self.spec['paths'][path]) or {}
+        operation = self.resolve(path_item[method]) or {}
+
+        args_schema_fields: List[ArgumentField] = []
+        args_source: Dict[str, str] = {}
+        for parameter in self.get_parameters(path_item, operation):
+            name: str = parameter['name']
+            args_schema_fields.append((name, bool(parameter.get('required'))))
+            args_source[name] = parameter['in']
+
+        body_type = None
+        request_body = self.get_request_body(operation)
+        if request_body is not None:
+            body_type, schema, required = request_body
+            properties = self.resolve(schema.get('properties')) if body_kind(body_type) != BINARY else None
+            if isinstance(properties, dict) and properties:
+                # Properties of an object body are arguments, parameters of the same name take precedence
+                required_properties = schema.get('required') or []
+                for name in properties:
+                    if name not in args_source:
+                        args_schema_fields.append((name, required and name in required_properties, 'any'))
+                        args_source[name] = 'body'
+            elif 'body' not in args_source:
+                args_schema_fields.append(('body', required, 'any'))
+                args_source['body'] = 'content'
+
+        return Endpoint(
+            method=method,
+            path=path,
+            description=operation.get('description', operation.get('summary', '')),
+            args_schema=create_args_schema(args_schema_fields),
+            args_source=args_source,
+            body_type=body_type,
+        )
+
+    def get_request_body(self, operation: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any], bool]]:
+        # Media type and schema of the request body, JSON is preferred over form and binary media types
+        request_body = self.resolve(operation.get('requestBody'))
+        content = request_body.get('content') if isinstance(request_body, dict) else None
+        if not isinstance(content, dict) or not content:
+            return None
+
+        body_type = min(content, key=lambda x: BODY_KINDS.index(body_kind(x)))
+        media_type = self.resolve(content[body_type]) or {}
+        schema = self.resolve(media_type.get('schema')) if isinstance(media_type, dict) else None
+        return body_type, schema if isinstance(schema, dict) else {}, bool(request_body.get('required'))
+
+    def get_parameters(self, path_item: Dict[str, Any], operation: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Operation level parameters override path level ones with the same location and name
+        parameters: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        for parameter in path_item.get('parameters', []) + operation.get('parameters', []):
+            parameter = self.resolve(parameter)
+            if parameter is not None:
+                parameters[(parameter.get('in'), parameter.get('name'))] = parameter
+
+        result = list(parameters.values())
+        for requirement in operation.get('security', []):
+            for key in requirement.keys():
+                security_scheme = self.resolve(self.security_schemes.get(key))
+                if security_scheme is None:
+                    continue
+                result.append(
+                    {
+                        'name': security_scheme['name'],
+                        'in': security_scheme['in'],
+                        'description': security_scheme['description'],
+                    }
+                )
+
+        return result
+
+    def resolve(self, value: Any) -> Any:
+        if not isinstance(value, dict) or '$ref' not in value:
+            return value
+
+        ref = value['$ref']
+        resolved = self._refs.get(ref, _MISSING)
+        if resolved is _MISSING:
+            resolved = self._refs[ref] = self._resolve_ref(ref, set())
+        return resolved
+
+    def _resolve_ref(self, ref: str, visiting: Set[str]) -> Optional[Any]:
+        if ref in visiting:
+            logging.warning(f'Circular reference({ref}) in OpenAPI spec')
+            return None
+        if not ref.startswith('#/'):
+            logging.warning(f'Unsupported reference({ref}) in OpenAPI spec')
+            return None
+
+        target: Any = self.spec
+        for token in ref[2:].split('/'):
+            token = unquote(token).replace('~1', '/').replace('~0', '~')
+            if not isinstance(target, dict) or token not in target:
+                logging.warning(f'Failed to resolve reference({ref}) in OpenAPI spec')
+                return None
+            target = target[token]
+
+        if isinstance(target, dict) and '$ref' in target:
+            next_ref = target['$ref']
+            if next_ref in self._refs:
+                return self._refs[next_ref]
+            return self._resolve_ref(next_ref, visiting | {ref})
+        return target
@@ -0,0 +1,87 @@
+import sys
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Type
+
+from pydantic.v1 import BaseModel
+
+from .plan import RequestPlan
+
+
+# Records below use __slots__ instead of pydantic models since a process holds one per tool, and pydantic models keep a
+# dict of values and a set of fields per instance and are copied when assigned to fields of other models.
+class Endpoint:
+    __slots__ = ('method', 'path', 'description', 'args_schema', 'args_source', 'body_type', '_plan')
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        description: str,
+        args_schema: Type[BaseModel],
+        args_source: Dict[str, str],
+        body_type: Optional[str] = None,
+    ):
+        self.method = sys.intern(method)
+        self.path = path
+        self.description = description
+        self.args_schema = args_schema
+        self.args_source = {sys.intern(k): sys.intern(v) for k, v in args_source.items()}
+        # Media type of the request body, None when the operation has no request body
+        self.body_type = sys.intern(body_type) if body_type is not None else None
+        self._plan: Optional[RequestPlan] = None
+
+    @property
+    def path_args(self) -> List[str]:
+        return self._args('path')
+
+    @property
+    def query_args(self) -> List[str]:
+        return self._args('query')
+
+    @property
+    def header_args(self) -> List[str]:
+        return self._args('header')
+
+    @property
+    def body_args(self) -> List[str]:
+        return self._args('body') + self._args('content')
+
+    @property
+    def plan(self) -> RequestPlan:
+        # Built on the first call, a plan built twice by racing threads is equivalent
+        if self._plan is None:
+            self._plan = RequestPlan(self.method, self.path, self.args_source, self.body_type)
+        return self._plan
+
+    def _args(self, source: str) -> List[str]:
+        return [k for k, v in self.args_source.items() if v == source]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Endpoint):
+            return NotImplemented
+        return all(getattr(self, x) == getattr(other, x) for x in self.__slots__ if x != '_plan')
+
+    def __repr__(self) -> str:
+        return f'Endpoint(method={self.method!r}, path={self.path!r}, description={self.description!r})'
+
+
+# Data shared by all tools of an integration loaded at once
+class Integration:
+    __slots__ = ('name', 'description', 'server', 'servers', 'parameters')
+
+    def __init__(
+        self,
+        name: Optional[str],
+        description: str,
+        server: str,
+        parameters: Mapping[str, str],
+        servers: Optional[Sequence[str]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.server = sys.intern(server)
+        # Servers to fail over to in the order of the spec, starting from the primary server
+        self.servers = tuple(sys.intern(x) for x in servers) if servers else (self.server,)
+        self.parameters = parameters
+
+    def __repr__(self) -> str:
+        return f'Integration(name={self.name!r}, server={self.server!r})'
@@ -1,2 +1,14 @@
 class ToolNotFoundException(Exception):
     pass
+
+
+class InvalidBundleException(Exception):
+    pass
+
+
+class InvalidIndexException(Exception):
+    pass
+
+
+class DeadlineExceededException(TimeoutError):
+    pass
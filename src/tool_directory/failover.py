@@ -0,0 +1,137 @@
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Mapping, Optional
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .exceptions import DeadlineExceededException
+from .upload import is_stream
+
+# Statuses of overloaded or unavailable servers which another server may answer
+FAILOVER_STATUSES = frozenset([502, 503, 504])
+
+# Methods which can be sent twice, only these fail over after the request may have reached a server
+IDEMPOTENT_METHODS = frozenset(['get', 'head', 'options', 'put', 'delete', 'trace'])
+
+
+# Delays of hedged requests, taken from a percentile of recent latencies per endpoint. Endpoints with too few samples
+# wait initial_delay. Sync tools send both requests of a hedge from the executor of the policy, and only when a worker
+# is free so that no request waits in its queue while the hedge delay runs.
+class HedgePolicy:
+    def __init__(
+        self,
+        percentile: float = 95,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.01,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 32,
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tool-hedge')
+
+        self._workers = threading.BoundedSemaphore(max_workers)
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def delay(self, key: str) -> float:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return self.initial_delay
+            values = sorted(samples)
+        index = min(len(values) - 1, int(len(values) * self.percentile / 100))
+        return max(self.min_delay, values[index])
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Optional[Future]:
+        # Returns None instead of queueing when every worker is busy
+        if not self._workers.acquire(blocking=False):
+            return None
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._workers.release()
+            raise
+        future.add_done_callback(lambda _: self._workers.release())
+        return future
+
+    def close(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+
+def can_fail_over(method: str, options: Mapping[str, Any], error: BaseException) -> bool:
+    # Rate limiters give up before sending when their server can not be called within the deadline
+    if isinstance(error, DeadlineExceededException):
+        return True
+
+    # Streamed bodies and file parts are consumed by the first attempt and can not be sent again
+    if _has_stream(options):
+        return False
+
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) if response is not None else None
+    if status is not None:
+        return status in FAILOVER_STATUSES and method in IDEMPOTENT_METHODS
+    if _is_connect_error(error):
+        return True
+    return _is_transport_error(error) and method in IDEMPOTENT_METHODS
+
+
+def remaining(expires: Optional[float]) -> Optional[float]:
+    if expires is None:
+        return None
+    seconds = expires - time.monotonic()
+    if seconds <= 0:
+        raise DeadlineExceededException('Deadline of the tool call is exceeded')
+    return seconds
+
+
+def _has_stream(options: Mapping[str, Any]) -> bool:
+    values = [options.get('content')]
+    for key in ('files', 'data'):
+        value = options.get(key)
+        if isinstance(value, Mapping):
+            values.extend(value.values())
+        else:
+            values.append(value)
+    return any(is_stream(x) and not isinstance(x, (bytes, bytearray, memoryview)) for x in values)
+
+
+def _is_connect_error(error: BaseException) -> bool:
+    # Requests which failed to connect have not reached the server. requests raises ConnectionError for refused
+    # connections, with the error of urllib3 as the reason of its MaxRetryError.
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        reason = getattr(error.args[0], 'reason', None)
+        if isinstance(reason, (NewConnectionError, ConnectTimeoutError)):
+            return True
+    httpx = _httpx()
+    return httpx is not None and isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+def _is_transport_error(error: BaseException) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    httpx = _httpx()
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+def _httpx() -> Any:
+    # httpx is imported only by async tools, its errors can not be raised before that
+    return sys.modules.get('httpx')
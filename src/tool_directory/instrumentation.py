@@ -0,0 +1,233 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+FETCH = 'fetch'
+PARSE = 'parse'
+BUILD = 'build'
+CALL = 'call'
+COALESCE = 'coalesce'
+FAILOVER = 'failover'
+HEDGE = 'hedge'
+
+
+@dataclass
+class Event:
+    kind: str
+    seconds: float
+    labels: Dict[str, str] = field(default_factory=dict)
+    bytes: Optional[int] = None
+    status: Optional[int] = None
+    retries: int = 0
+    error: Optional[BaseException] = None
+
+
+Callback = Callable[[Event], None]
+
+
+class Instrumentation:
+    def __init__(self, *callbacks: Callback):
+        self.callbacks: List[Callback] = list(callbacks)
+
+    def add(self, callback: Callback):
+        self.callbacks.append(callback)
+
+    def emit(self, event: Event):
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logging.warning('Failed to handle instrumentation event', exc_info=True)
+
+    @contextmanager
+    def measure(self, kind: str, **labels: str) -> Iterator[Event]:
+        # Fill bytes, status and so on into the yielded event, it is emitted with the elapsed time on exit
+        event = Event(kind=kind, seconds=0, labels=labels)
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.seconds = time.perf_counter() - start
+            self.emit(event)
+
+
+@contextmanager
+def measure(instrumentation: Optional[Instrumentation], kind: str, **labels: str) -> Iterator[Event]:
+    if instrumentation is None:
+        yield Event(kind=kind, seconds=0, labels=labels)
+        return
+
+    with instrumentation.measure(kind, **labels) as event:
+        yield event
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(x, '')) for x in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+    def expose(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: Dict[str, str] = {}, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, labels: Dict[str, str] = {}) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{self._format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Counts of each bucket (not cumulative), sum and count for each label values
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: Dict[str, str] = {}):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, labels: Dict[str, str] = {}) -> int:
+        values = self._values.get(self._key(labels))
+        return sum(values[0]) if values else 0
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    labels = self._format_labels(key, [('le', _format_value(bound))])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                lines.append(f'{self.name}_sum{self._format_labels(key)} {_format_value(total[0])}')
+                lines.append(f'{self.name}_count{self._format_labels(key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = 'tool_directory', buckets: Sequence[float] = DEFAULT_BUCKETS):
+        document = ('integration', 'document')
+        operation = ('integration', 'method', 'path')
+
+        self.fetch_seconds = Histogram(
+            f'{prefix}_fetch_seconds', 'Latency of fetches from the tool directory.', document, buckets
+        )
+        self.fetch_bytes = Counter(f'{prefix}_fetch_bytes_total', 'Bytes fetched from the tool directory.', document)
+        self.parse_seconds = Histogram(f'{prefix}_parse_seconds', 'Time to parse fetched documents.', document, buckets)
+        self.build_seconds = Histogram(f'{prefix}_build_seconds', 'Time to build a tool.', ('integration',), buckets)
+        self.call_seconds = Histogram(f'{prefix}_call_seconds', 'Latency of tool calls.', operation, buckets)
+        self.calls = Counter(f'{prefix}_calls_total', 'Tool calls by status code.', operation + ('status',))
+        self.call_retries = Counter(f'{prefix}_call_retries_total', 'Retries of tool calls.', operation)
+        self.response_bytes = Counter(f'{prefix}_response_bytes_total', 'Bytes of tool call responses.', operation)
+        self.coalesced_calls = Counter(
+            f'{prefix}_coalesced_calls_total', 'Tool calls which shared an identical in-flight call.', operation
+        )
+        self.failovers = Counter(f'{prefix}_failovers_total', 'Tool calls moved on to the next server.', operation)
+        self.hedged_calls = Counter(
+            f'{prefix}_hedged_calls_total', 'Tool calls which sent a hedged request to another server.', operation
+        )
+
+        self.metrics: List[_Metric] = [
+            self.fetch_seconds,
+            self.fetch_bytes,
+            self.parse_seconds,
+            self.build_seconds,
+            self.call_seconds,
+            self.calls,
+            self.call_retries,
+            self.response_bytes,
+            self.coalesced_calls,
+            self.failovers,
+            self.hedged_calls,
+        ]
+
+    def __call__(self, event: Event):
+        if event.kind == FETCH:
+            self.fetch_seconds.observe(event.seconds, event.labels)
+            self.fetch_bytes.inc(event.labels, event.bytes or 0)
+        elif event.kind == PARSE:
+            self.parse_seconds.observe(event.seconds, event.labels)
+        elif event.kind == BUILD:
+            self.build_seconds.observe(event.seconds, event.labels)
+        elif event.kind == CALL:
+            status = str(event.status) if event.status is not None else 'error'
+            self.call_seconds.observe(event.seconds, event.labels)
+            self.calls.inc(dict(event.labels, status=status))
+            if event.retries:
+                self.call_retries.inc(event.labels, event.retries)
+            if event.bytes:
+                self.response_bytes.inc(event.labels, event.bytes)
+        elif event.kind == COALESCE:
+            self.coalesced_calls.inc(event.labels)
+        elif event.kind == FAILOVER:
+            self.failovers.inc(event.labels)
+        elif event.kind == HEDGE:
+            self.hedged_calls.inc(event.labels)
+
+    def exposition(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
@@ -1,140 +1,429 @@
 import copy
-import itertools
 import logging
-from typing import Any, Dict, List, Union
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
 from urllib.parse import urljoin
 
 import requests
-import yaml
-from pydantic.v1 import BaseModel, Field, create_model
 
+from .bundle import Bundle, write_bundle
+from .cache import SpecCache
+from .compiler import EndpointCompiler
+from .endpoint import Endpoint, Integration
 from .exceptions import ToolNotFoundException
-from .model import Endpoint, OpenApiTool
+from .instrumentation import BUILD, FETCH, PARSE, Instrumentation, measure
+from .override import OverrideIndex
+from .parser import SpecParser, get_parser
+from .ratelimit import RateLimiter
+from .response_cache import ResponseCache
+from .source import TOOL_DIRECTORY_ENDPOINT, directory_url, is_local, read_local  # noqa: F401
+from .stream import ResponseReader
+from .toolset import HTTP_METHODS, Operation, ToolSet
 from .utils import convert_to_iso639
 
-TOOL_DIRECTORY_ENDPOINT = 'https://tool-directory.dialogplay.jp'
+if TYPE_CHECKING:
+    from .failover import HedgePolicy
+    from .model import OpenApiTool
+    from .session import AsyncSessionPool, SessionPool
+
+
+@dataclass
+class LoadResult:
+    tools: List['OpenApiTool'] = field(default_factory=list)
+    errors: Dict[str, Exception] = field(default_factory=dict)
 
 
 class ToolLoader:
-    def __init__(self, name: str, language='en'):
-        integration_url = TOOL_DIRECTORY_ENDPOINT + f'/integrations/{name}/integration.yaml'
+    # Loaders restored from a bundle read endpoints from it and have no source, spec or overrides
+    source: Optional[str]
+    spec: Optional[Dict[str, Any]]
+    overrides: Optional[OverrideIndex]
+
+    def __init__(
+        self,
+        name: str,
+        language='en',
+        cache: Optional[SpecCache] = None,
+        parser: Union[str, SpecParser, None] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        source: Optional[str] = None,
+    ):
+        self.name = name
+        self.language = language
+        self.cache = cache
+        self.parser = get_parser(parser)
+        self.instrumentation = instrumentation
+        self.source = source = directory_url(source)
+        self.bundle: Optional[Bundle] = None
+
+        integration_url = source + f'/integrations/{name}/integration.yaml'
         self.integration = self._fetch_integration(integration_url)
 
         openapi_url = urljoin(integration_url, self.integration.get('openApi'))
-        spec = self._fetch_openapi_spec(openapi_url)
+        self.raw_spec = self._fetch_openapi_spec(openapi_url)
+        self.overrides = OverrideIndex(self.integration)
 
-        self.spec = self._override(spec, self.integration, language)
+        # Loaders for each language share fetched documents and are cached in _languages
+        self._languages: Dict[str, ToolLoader] = {convert_to_iso639(language): self}
+        self._languages_lock = threading.Lock()
+        self.spec = self._override(language)
 
-    def get_tools(self, parameters: Dict[str, str] = {}) -> List[OpenApiTool]:
-        servers = [x.get('url') for x in self.spec.get('servers', [])]
+    def for_language(self, language: str) -> 'ToolLoader':
+        key = convert_to_iso639(language)
+        loader = self._languages.get(key)
+        if loader is not None:
+            return loader
+        if self.bundle is not None:
+            raise ValueError(f'Bundle of {self.name} is compiled for language {self.language}.')
 
-        tools = []
-        for endpoint in self._load_endpoints(self.spec):
-            tools.append(
-                OpenApiTool(
-                    description=self.integration.get('description'),
-                    server=servers[0],
-                    endpoint=endpoint,
-                    parameters=parameters,
-                )
-            )
+        with self._languages_lock:
+            if key not in self._languages:
+                loader = copy.copy(self)
+                loader.__dict__.pop('compiler', None)
+                loader.language = language
+                loader.spec = self._override(language)
+                self._languages[key] = loader
+            return self._languages[key]
 
-        return tools
+    @overload
+    def get_tools(
+        self,
+        parameters: Dict[str, str] = {},
+        session: Optional['SessionPool'] = None,
+        async_session: Optional['AsyncSessionPool'] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_response_bytes: Optional[int] = None,
+        projections: Mapping[str, Sequence[str]] = {},
+        lazy: Literal[False] = False,
+        deadline: Optional[float] = None,
+        hedge: Optional['HedgePolicy'] = None,
+    ) -> List['OpenApiTool']:
+        ...
 
-    def _fetch_integration(self, url: str):
-        response = requests.get(url)
-        if response.status_code == 404:
-            raise ToolNotFoundException(f'Specified tool({url}) does not found in tool directory.')
+    @overload
+    def get_tools(
+        self,
+        parameters: Dict[str, str] = {},
+        session: Optional['SessionPool'] = None,
+        async_session: Optional['AsyncSessionPool'] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_response_bytes: Optional[int] = None,
+        projections: Mapping[str, Sequence[str]] = {},
+        *,
+        lazy: Literal[True],
+        deadline: Optional[float] = None,
+        hedge: Optional['HedgePolicy'] = None,
+    ) -> ToolSet:
+        ...
 
-        response.raise_for_status()
+    def get_tools(
+        self,
+        parameters: Dict[str, str] = {},
+        session: Optional['SessionPool'] = None,
+        async_session: Optional['AsyncSessionPool'] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_response_bytes: Optional[int] = None,
+        projections: Mapping[str, Sequence[str]] = {},
+        lazy: bool = False,
+        deadline: Optional[float] = None,
+        hedge: Optional['HedgePolicy'] = None,
+    ) -> Union[List['OpenApiTool'], ToolSet]:
+        # Tools pull in LangChain, which is imported when tools are first requested
+        from .model import OpenApiTool
 
-        return yaml.load(response.content, Loader=yaml.SafeLoader)
+        servers = self.servers
+        integration = Integration(
+            self.name, self.integration.get('description') or '', servers[0], parameters, servers=servers
+        )
+        reader = ResponseReader(max_bytes=max_response_bytes) if max_response_bytes is not None else None
 
-    def _fetch_openapi_spec(self, url: str):
-        response = requests.get(url)
-        response.raise_for_status()
+        def get_reader(operation: Operation) -> Optional[ResponseReader]:
+            # Projections are keyed by operationId or "METHOD /path"
+            fields = projections.get(operation.operation_id or '')
+            if fields is None:
+                fields = projections.get(f'{operation.method.upper()} {operation.path}')
+            if fields is None:
+                return reader
+            return ResponseReader(max_bytes=max_response_bytes, fields=fields)
 
-        return yaml.load(response.content, Loader=yaml.SafeLoader)
+        def create_tool(operation: Operation) -> 'OpenApiTool':
+            with measure(self.instrumentation, BUILD, integration=self.name):
+                return OpenApiTool(
+                    endpoint=self.get_endpoint(operation),
+                    integration=integration,
+                    session=session,
+                    async_session=async_session,
+                    instrumentation=self.instrumentation,
+                    response_cache=response_cache,
+                    coalesce=coalesce,
+                    rate_limiter=rate_limiter,
+                    response_reader=get_reader(operation),
+                    deadline=deadline,
+                    hedge=hedge,
+                )
 
-    def _override(self, spec: Dict[str, Any], integration: Dict[str, Any], language: str) -> Dict[str, Any]:
-        for path, detail in integration.get('paths', {}).items():
-            for method, endpoint in detail.items():
-                try:
-                    if endpoint.get('description'):
-                        spec['paths'][path][method]['description'] = self._translate(endpoint['description'], language)
-                    for parameter in endpoint.get('parameters', []):
-                        if parameter.get('description'):
-                            self._override_parameter(
-                                spec['paths'][path][method]['parameters'],
-                                _in=parameter['in'],
-                                name=parameter['name'],
-                                description=self._translate(parameter['description'], language),
-                            )
-                except KeyError:
-                    logging.warning('Failed to override OpenAPI spec', exc_info=True)
-
-        return spec
-
-    def _override_parameter(self, parameters: List[Dict[str, Any]], _in: str, name: str, description: str):
-        for parameter in parameters:
-            if parameter['in'] == _in and parameter['name'] == name:
-                parameter['description'] = description
-
-    def _translate(self, description: Union[str, dict[str, str]], language: str) -> str:
-        language = convert_to_iso639(language)
-        if isinstance(description, str):
-            return description
-        return description.get(language, description.get('en', ''))
-
-    def _load_endpoints(self, spec: Dict[str, Any]) -> List[Endpoint]:
-        endpoints = []
-        for path, detail in spec.get('paths', []).items():
-            for method, endpoint in detail.items():
-                description = endpoint.get('description', endpoint.get('summary', ''))
-
-                endpoints.append(
-                    Endpoint(
+        tools = ToolSet(self.get_operations(), create_tool)
+        return tools if lazy else list(tools)
+
+    @property
+    def servers(self) -> List[str]:
+        if self.bundle is not None:
+            return self.bundle.servers
+        return [x.get('url') for x in self._spec.get('servers', [])]
+
+    @cached_property
+    def compiler(self) -> EndpointCompiler:
+        return EndpointCompiler(self._spec)
+
+    def get_operations(self) -> List[Operation]:
+        if self.bundle is not None:
+            return self.bundle.operations()
+
+        operations: List[Operation] = []
+        for path, detail in self._spec.get('paths', {}).items():
+            for method, endpoint in (self.compiler.resolve(detail) or {}).items():
+                if method not in HTTP_METHODS:
+                    continue
+                operations.append(
+                    Operation(
+                        position=len(operations),
                         method=method,
                         path=path,
-                        description=description,
-                        args_schema=self._create_args_schema(endpoint),
-                        args_source=self._create_args_source(endpoint),
+                        operation_id=endpoint.get('operationId'),
+                        tags=tuple(endpoint.get('tags', [])),
                     )
                 )
 
-        return endpoints
-
-    def _create_args_schema(self, endpoint: Dict[str, Any]) -> BaseModel:
-        # Check required flag and default value
-        parameters = {
-            x.get('name'): (str, Field()) if x.get('required') else (str, Field(None))
-            for x in self._get_parameters(endpoint)
-        }
-
-        return create_model('ArgumentsSchema', **parameters)
-
-    def _create_args_source(self, endpoint: Dict[str, Any]) -> Dict[str, str]:
-        args_source = {}
-        for parameter in self._get_parameters(endpoint):
-            args_source[parameter.get('name')] = parameter.get('in')
-
-        return args_source
-
-    def _get_parameters(self, endpoint: Dict[str, Any]):
-        parameters = copy.deepcopy(endpoint.get('parameters', []))
-        security_keys = list(itertools.chain.from_iterable([x.keys() for x in endpoint.get('security', [])]))
-        if not security_keys:
-            return parameters
-
-        security_schemes = self.spec.get('components', {}).get('securitySchemes', {})
-        for key in security_keys:
-            security_scheme = security_schemes.get(key)
-            parameters.append(
-                {
-                    'name': security_scheme['name'],
-                    'in': security_scheme['in'],
-                    'description': security_scheme['description'],
-                }
-            )
-
-        return parameters
+        return operations
+
+    def get_endpoint(self, operation: Operation) -> Endpoint:
+        if self.bundle is not None:
+            return self.bundle.endpoint(operation.position)
+        return self.compiler.compile(operation.path, operation.method)
+
+    def get_endpoints(self) -> List[Endpoint]:
+        return [self.get_endpoint(x) for x in self.get_operations()]
+
+    def compile(self, path: str):
+        operations = self.get_operations()
+        write_bundle(
+            path,
+            name=self.name,
+            language=self.language,
+            description=self.integration.get('description'),
+            servers=self.servers,
+            operations=operations,
+            endpoints=[self.get_endpoint(x) for x in operations],
+        )
+
+    @classmethod
+    def from_bundle(cls, path: str, instrumentation: Optional[Instrumentation] = None) -> 'ToolLoader':
+        bundle = Bundle(path)
+
+        # Restore the loader without fetching anything from the tool directory
+        loader = cls.__new__(cls)
+        loader.name = bundle.name
+        loader.language = bundle.language
+        loader.cache = None
+        loader.parser = get_parser()
+        loader.instrumentation = instrumentation
+        loader.source = None
+        loader.bundle = bundle
+        loader.integration = {'description': bundle.description}
+        loader.raw_spec = None
+        loader.overrides = None
+        loader._languages = {convert_to_iso639(bundle.language): loader}
+        loader._languages_lock = threading.Lock()
+        loader.spec = None
+        return loader
+
+    @classmethod
+    def load_many(
+        cls,
+        integrations: Iterable[Union[str, Tuple[str, str]]],
+        parameters: Dict[str, Dict[str, str]] = {},
+        max_workers: int = 8,
+        cache: Optional[SpecCache] = None,
+        parser: Union[str, SpecParser, None] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        source: Optional[str] = None,
+        **options: Any,
+    ) -> LoadResult:
+        # Each integration is given as name or (name, language). options are passed to get_tools, such as session,
+        # rate_limiter, projections and deadline.
+        targets = [(x, 'en') if isinstance(x, str) else x for x in integrations]
+        specs = _Shared()
+        loaders = _Shared()
+        parser = get_parser(parser)
+
+        def load(name: str, language: str) -> List['OpenApiTool']:
+            # Languages of the same integration are served by one loader
+            loader = loaders.get(
+                name,
+                lambda _: _SharedSpecToolLoader(
+                    name,
+                    language=language,
+                    cache=cache,
+                    parser=parser,
+                    instrumentation=instrumentation,
+                    source=source,
+                    specs=specs,
+                ),
+            ).for_language(language)
+            return loader.get_tools(parameters=parameters.get(name, {}), **options)
+
+        result = LoadResult()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(name, executor.submit(load, name, language)) for name, language in targets]
+            for name, future in futures:
+                try:
+                    result.tools.extend(future.result())
+                except Exception as e:
+                    logging.warning(f'Failed to load integration {name}', exc_info=True)
+                    result.errors[name] = e
+
+        return result
+
+    def _fetch_integration(self, url: str):
+        try:
+            content, content_type = self._fetch(url, 'integration')
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                raise ToolNotFoundException(f'Specified tool({url}) does not found in tool directory.')
+            raise
+        except FileNotFoundError:
+            raise ToolNotFoundException(f'Specified tool({url}) does not found in tool directory.')
+
+        return self._parse(content, content_type, 'integration')
+
+    def _fetch_openapi_spec(self, url: str):
+        content, content_type = self._fetch(url, 'openapi')
+        return self._parse(content, content_type, 'openapi')
+
+    def _parse(self, content: bytes, content_type: Optional[str], document: str) -> Any:
+        with measure(self.instrumentation, PARSE, integration=self.name, document=document) as event:
+            event.bytes = len(content)
+            return self.parser.parse(content, content_type)
+
+    def _fetch(self, url: str, document: str) -> Tuple[bytes, Optional[str]]:
+        with measure(self.instrumentation, FETCH, integration=self.name, document=document) as event:
+            content, content_type = self._download(url)
+            event.bytes = len(content)
+            return content, content_type
+
+    def _download(self, url: str) -> Tuple[bytes, Optional[str]]:
+        # Local mirrors are read from disk as is, without the cache
+        if is_local(url):
+            return read_local(url)
+
+        if self.cache is None:
+            response = requests.get(url)
+            response.raise_for_status()
+            return response.content, response.headers.get('Content-Type')
+
+        entry = self.cache.get(url)
+        if entry is not None and entry.is_fresh(self.cache.ttl):
+            return entry.content, entry.content_type
+
+        try:
+            response = requests.get(url, headers=entry.validators() if entry else {})
+            if response.status_code == 304 and entry is not None:
+                self.cache.revalidated(entry)
+                return entry.content, entry.content_type
+            response.raise_for_status()
+        except requests.RequestException as e:
+            # Serve the stale copy when the tool directory is unreachable or failing
+            unavailable = not isinstance(e, requests.HTTPError) or e.response is None or e.response.status_code >= 500
+            if entry is None or not unavailable:
+                raise
+            logging.warning(f'Failed to fetch {url}, use cached content instead', exc_info=True)
+            return entry.content, entry.content_type
+
+        self.cache.set(
+            url,
+            response.content,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_type=response.headers.get('Content-Type'),
+        )
+        return response.content, response.headers.get('Content-Type')
+
+    @property
+    def _spec(self) -> Dict[str, Any]:
+        if self.spec is None:
+            raise ValueError(f'Bundle of {self.name} has no spec.')
+        return self.spec
+
+    def _override(self, language: str) -> Dict[str, Any]:
+        if self.overrides is None:
+            raise ValueError(f'Bundle of {self.name} is compiled for language {self.language}.')
+        return self.overrides.apply(self.raw_spec, language, self._raw_compiler.resolve)
+
+    @cached_property
+    def _raw_compiler(self) -> EndpointCompiler:
+        return EndpointCompiler(self.raw_spec)
+
+
+class _Shared:
+    def __init__(self):
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, create: Callable[[str], Any]) -> Any:
+        with self._lock:
+            shared = self._futures.get(key)
+            if shared is None:
+                future: Future = Future()
+                self._futures[key] = future
+
+        if shared is not None:
+            return shared.result()
+
+        try:
+            future.set_result(create(key))
+        except Exception as e:
+            future.set_exception(e)
+        return future.result()
+
+
+class _SharedSpecToolLoader(ToolLoader):
+    def __init__(
+        self,
+        name: str,
+        language: str,
+        cache: Optional[SpecCache],
+        parser: SpecParser,
+        instrumentation: Optional[Instrumentation],
+        source: Optional[str],
+        specs: _Shared,
+    ):
+        self._specs = specs
+        super().__init__(
+            name, language=language, cache=cache, parser=parser, instrumentation=instrumentation, source=source
+        )
+
+    def _fetch_openapi_spec(self, url: str):
+        return self._specs.get(url, super()._fetch_openapi_spec)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import urljoin
+
+from .parser import SpecParser, get_parser
+from .session import SessionPool
+from .source import directory_url, is_local, read_local
+from .utils import write_atomic
+
+MANIFEST = '.manifest.json'
+
+
+@dataclass
+class SyncResult:
+    downloaded: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+
+
+# Local copy of the tool directory which ToolLoader reads with source=mirror.directory. Files keep their paths relative
+# to the directory, and the manifest holds their digests and HTTP validators for conditional downloads on next sync.
+class Mirror:
+    def __init__(
+        self,
+        directory: str,
+        source: Optional[str] = None,
+        max_workers: int = 8,
+        parser: Union[str, SpecParser, None] = None,
+        session: Optional[SessionPool] = None,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.source = directory_url(source)
+        self.max_workers = max_workers
+        self.parser = get_parser(parser)
+        self.session = session
+
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, names: Iterable[str]) -> SyncResult:
+        # Integrations are synced in parallel, and their integration.yaml is fetched before the OpenAPI spec it refers
+        self._manifest = self._read_manifest()
+        result = SyncResult()
+        session = self.session or SessionPool(pool_connections=1, pool_maxsize=self.max_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [(name, executor.submit(self._sync_integration, name, session, result)) for name in names]
+                for name, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.warning(f'Failed to sync integration {name}', exc_info=True)
+                        result.errors[name] = e
+        finally:
+            if self.session is None:
+                session.close()
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(self._path(MANIFEST), json.dumps(self._manifest, sort_keys=True).encode('utf-8'))
+
+        return result
+
+    def _sync_integration(self, name: str, session: SessionPool, result: SyncResult):
+        path = f'integrations/{name}/integration.yaml'
+        integration = self.parser.parse(self._sync_file(path, session, result))
+
+        openapi = integration.get('openApi') if isinstance(integration, dict) else None
+        if not openapi:
+            return
+        url = urljoin(f'{self.source}/{path}', openapi)
+        if not url.startswith(self.source + '/'):
+            logging.warning(f'OpenAPI spec({url}) of {name} is outside of the tool directory and is not mirrored')
+            return
+        start = len(self.source) + 1
+        self._sync_file(posixpath.normpath(url[start:]), session, result)
+
+    def _sync_file(self, path: str, session: SessionPool, result: SyncResult) -> bytes:
+        url = f'{self.source}/{path}'
+        target = self._path(path)
+        with self._lock:
+            entry = self._manifest.get(path) if os.path.exists(target) else None
+
+        etag = last_modified = None
+        if is_local(url):
+            content = read_local(url)[0]
+        else:
+            headers = {}
+            if entry and entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry and entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            response = session.request('GET', url, headers=headers)
+            if response.status_code == 304 and entry is not None:
+                with self._lock:
+                    result.unchanged.append(path)
+                with open(target, 'rb') as f:
+                    return f.read()
+            response.raise_for_status()
+            content = response.content
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        digest = hashlib.sha256(content).hexdigest()
+        changed = entry is None or entry.get('digest') != digest
+        if changed:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            write_atomic(target, content)
+
+        with self._lock:
+            self._manifest[path] = {'digest': digest, 'etag': etag, 'last_modified': last_modified}
+            (result.downloaded if changed else result.unchanged).append(path)
+        return content
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._path(MANIFEST), 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.directory, *path.split('/'))
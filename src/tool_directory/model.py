@@ -1,74 +1,518 @@
+import asyncio
+import json
+import logging
 import re
-from functools import cached_property
-from typing import Dict, Type
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from typing import Any, ContextManager, Dict, List, Mapping, Optional, Sequence, Tuple, Union, cast
 
-import requests
 from langchain.tools.base import StructuredTool
-from pydantic.v1 import BaseModel
 
+from .coalesce import SingleFlight, default_single_flight
+from .endpoint import Endpoint, Integration
+from .exceptions import DeadlineExceededException
+from .failover import HedgePolicy, can_fail_over, remaining
+from .instrumentation import CALL, COALESCE, FAILOVER, HEDGE, Event, Instrumentation, measure
 from .prompt import TOOL_DESCRIPTION
-
-
-class Endpoint(BaseModel):
-    method: str
-    path: str
-    description: str
-    args_schema: Type[BaseModel]
-    args_source: Dict[str, str]
-
-    class Config:
-        # Allow @cached_property with pydantic v1
-        keep_untouched = (cached_property,)
-
-    @cached_property
-    def path_args(self):
-        return [k for k, v in self.args_source.items() if v == 'path']
-
-    @cached_property
-    def query_args(self):
-        return [k for k, v in self.args_source.items() if v == 'query']
-
-    @cached_property
-    def header_args(self):
-        return [k for k, v in self.args_source.items() if v == 'header']
+from .ratelimit import RateLimiter, ServerLimiter, aacquire, acquire
+from .response_cache import ResponseCache, request_key
+from .session import AsyncSessionPool, SessionPool, default_async_session_pool, default_session_pool
+from .stream import ResponseConsumer, ResponseReader
+from .upload import aiter_content
 
 
 class OpenApiTool(StructuredTool):
-    server: str
+    integration: Integration
     endpoint: Endpoint
-    parameters: Dict[str, str]
+    session: Optional[SessionPool] = None
+    async_session: Optional[AsyncSessionPool] = None
+    instrumentation: Optional[Instrumentation] = None
+    response_cache: Optional[ResponseCache] = None
+    coalesce: bool = False
+    single_flight: Optional[SingleFlight] = None
+    rate_limiter: Optional[RateLimiter] = None
+    response_reader: Optional[ResponseReader] = None
+    deadline: Optional[float] = None
+    hedge: Optional[HedgePolicy] = None
 
-    def __init__(self, description: str, server: str, endpoint: Endpoint, parameters: Dict[str, str]):
-        escaped_path = re.sub(r'\{(.*?)\}', ':\\1', endpoint.path)
-        tool_description = TOOL_DESCRIPTION.format(
-            description=description, endpoint=f'{endpoint.method.upper()} {escaped_path} {endpoint.description}'
-        )
+    def __init__(
+        self,
+        description: Optional[str] = None,
+        server: Optional[str] = None,
+        endpoint: Optional[Endpoint] = None,
+        parameters: Optional[Dict[str, str]] = None,
+        session: Optional[SessionPool] = None,
+        async_session: Optional[AsyncSessionPool] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        integration_name: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        single_flight: Optional[SingleFlight] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        response_reader: Optional[ResponseReader] = None,
+        integration: Optional[Integration] = None,
+        deadline: Optional[float] = None,
+        hedge: Optional[HedgePolicy] = None,
+    ):
+        # Tools loaded together share one Integration instead of holding description, server and parameters each
+        if endpoint is None:
+            raise TypeError('OpenApiTool requires endpoint')
+        if integration is None:
+            integration = Integration(integration_name, description or '', server or '', parameters or {})
 
         return super().__init__(
-            name=f'{endpoint.method.upper()} {server}{escaped_path}',
-            description=tool_description,
-            server=server,
+            name=f'{endpoint.method.upper()} {integration.server}{_escape_path(endpoint.path)}',
+            # Rendered on demand by the description property below
+            description='',
+            integration=integration,
             endpoint=endpoint,
             args_schema=endpoint.args_schema,
             func=self.request_by_spec,
-            parameters=parameters,
+            coroutine=self.arequest_by_spec,
+            session=session,
+            async_session=async_session,
+            instrumentation=instrumentation,
+            response_cache=response_cache,
+            coalesce=coalesce,
+            single_flight=single_flight,
+            rate_limiter=rate_limiter,
+            response_reader=response_reader,
+            deadline=deadline,
+            hedge=hedge,
+        )
+
+    @property
+    def server(self) -> str:
+        return self.integration.server
+
+    @property
+    def parameters(self) -> Mapping[str, str]:
+        return self.integration.parameters
+
+    @property
+    def integration_name(self) -> Optional[str]:
+        return self.integration.name
+
+    def _iter(self, *args: Any, **kwargs: Any) -> Any:
+        # dict() and json() read values of fields, which holds '' for the description rendered on demand
+        for name, value in super()._iter(*args, **kwargs):
+            yield name, self.description if name == 'description' else value
+
+    def render_description(self) -> str:
+        endpoint = self.endpoint
+        return TOOL_DESCRIPTION.format(
+            description=self.integration.description,
+            endpoint=f'{endpoint.method.upper()} {_escape_path(endpoint.path)} {endpoint.description}',
         )
 
     def request_by_spec(self, **kwargs):
-        parameters = kwargs | self.parameters
-        path_args = {k: v for k, v in parameters.items() if k in self.endpoint.path_args}
-        query_args = {k: v for k, v in parameters.items() if k in self.endpoint.query_args}
-        header_args = {k: v for k, v in parameters.items() if k in self.endpoint.header_args}
-        url = (self.server + self.endpoint.path).format(**path_args)
-        if self.endpoint.method == 'get':
-            response = requests.get(url, headers=header_args, params=query_args)
-        elif self.endpoint.method == 'post':
-            response = requests.post(url, headers=header_args, data=query_args)
-        else:
+        request = self._build_request(kwargs)
+        if request is None:
+            return None
+
+        method, url, options = request
+        if not self._coalesces(method):
+            return self._call(method, url, options)
+
+        single_flight = self.single_flight or default_single_flight()
+        start = time.perf_counter()
+        result, coalesced = single_flight.do(
+            request_key(method, url, options), lambda: self._call(method, url, options)
+        )
+        if coalesced:
+            self._emit(COALESCE, method, time.perf_counter() - start)
+        return result
+
+    async def arequest_by_spec(self, **kwargs):
+        request = self._build_request(kwargs)
+        if request is None:
             return None
 
+        method, url, options = request
+        if not self._coalesces(method):
+            return await self._acall(method, url, options)
+
+        single_flight = self.single_flight or default_single_flight()
+        start = time.perf_counter()
+        result, coalesced = await single_flight.ado(
+            request_key(method, url, options), lambda: self._acall(method, url, options)
+        )
+        if coalesced:
+            self._emit(COALESCE, method, time.perf_counter() - start)
+        return result
+
+    def batch_by_spec(
+        self, list_of_kwargs: Sequence[Dict[str, Any]], max_concurrency: int = 8
+    ) -> List[Union[Any, Exception]]:
+        # Results are in the order of list_of_kwargs, and a failed call gives its exception instead of a result
+        def call(kwargs: Dict[str, Any]) -> Union[Any, Exception]:
+            try:
+                return self.request_by_spec(**kwargs)
+            except Exception as e:
+                return e
+
+        if not list_of_kwargs:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(list_of_kwargs)))) as executor:
+            return list(executor.map(call, list_of_kwargs))
+
+    async def abatch_by_spec(
+        self, list_of_kwargs: Sequence[Dict[str, Any]], max_concurrency: int = 8
+    ) -> List[Union[Any, Exception]]:
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def call(kwargs: Dict[str, Any]) -> Union[Any, Exception]:
+            async with semaphore:
+                try:
+                    return await self.arequest_by_spec(**kwargs)
+                except Exception as e:
+                    return e
+
+        return list(await asyncio.gather(*[call(kwargs) for kwargs in list_of_kwargs]))
+
+    def _call(self, method: str, url: str, options: Dict[str, Any]) -> Any:
+        # Calls within the deadline fail over to the other servers of the spec in order, and GET calls with a hedge
+        # policy send a second request when the first is slower than the percentile of the policy
+        servers = self.integration.servers
+        if self.deadline is None and self.hedge is None and len(servers) == 1:
+            return self._send(method, url, options)
+
+        expires = time.monotonic() + self.deadline if self.deadline is not None else None
+        targets = self._targets(url)
+        if self.hedge is not None and method == 'get':
+            return self._hedged_send(method, targets, options, expires)
+        return self._send_in_order(method, targets, options, expires)
+
+    async def _acall(self, method: str, url: str, options: Dict[str, Any]) -> Any:
+        servers = self.integration.servers
+        if self.deadline is None and self.hedge is None and len(servers) == 1:
+            return await self._asend(method, url, options)
+
+        expires = time.monotonic() + self.deadline if self.deadline is not None else None
+        targets = self._targets(url)
+        if self.hedge is not None and method == 'get':
+            return await self._ahedged_send(method, targets, options, expires)
+
+        last = len(targets) - 1
+        for target in targets[:last]:
+            try:
+                return await self._asend_within(method, target, options, expires)
+            except Exception as e:
+                self._check_failover(method, options, e, expires)
+        return await self._asend_within(method, targets[last], options, expires)
+
+    async def _asend_within(
+        self, method: str, target: Tuple[str, str], options: Dict[str, Any], expires: Optional[float]
+    ) -> Any:
+        server, url = target
+        try:
+            return await asyncio.wait_for(
+                self._asend(method, url, options, expires=expires, server=server), remaining(expires)
+            )
+        except DeadlineExceededException:
+            raise
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceededException('Deadline of the tool call is exceeded') from e
+
+    def _hedged_send(
+        self, method: str, targets: List[Tuple[str, str]], options: Dict[str, Any], expires: Optional[float]
+    ) -> Any:
+        # Losing requests can not be interrupted in threads, they are cancelled when not started yet and their results
+        # are discarded otherwise
+        hedge = cast(HedgePolicy, self.hedge)
+        key = f'{method} {self.endpoint.path}'
+
+        def attempt(target: Tuple[str, str]) -> Any:
+            server, server_url = target
+            start = time.monotonic()
+            result = self._send(method, server_url, options, expires=expires, server=server)
+            hedge.record(key, time.monotonic() - start)
+            return result
+
+        first = hedge.submit(attempt, targets[0])
+        if first is None:
+            # Every worker is busy, the caller sends the requests itself without hedging
+            return self._send_in_order(method, targets, options, expires)
+
+        hedge_at = time.monotonic() + hedge.delay(key)
+        pending = {first}
+        sent = 1
+        try:
+            while True:
+                hedging = sent < 2
+                timeout = max(0.0, hedge_at - time.monotonic()) if hedging else None
+                left = remaining(expires)
+                if left is not None:
+                    timeout = left if timeout is None else min(timeout, left)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                errors: List[BaseException] = []
+                for future in done:
+                    error = future.exception()
+                    if error is None:
+                        return future.result()
+                    errors.append(error)
+                # A failed request waits for the other one in flight, or moves on to the next server when it can
+                if errors and not pending and not (hedging and can_fail_over(method, options, errors[0])):
+                    raise errors[0]
+                if hedging and (not pending or time.monotonic() >= hedge_at):
+                    sent += 1
+                    target = targets[1 % len(targets)]
+                    submitted = hedge.submit(attempt, target)
+                    # A slow request is not hedged while every worker is busy, a failed one moves on in the caller
+                    if submitted is None and pending:
+                        continue
+                    self._emit(FAILOVER if errors else HEDGE, method)
+                    if submitted is None:
+                        return attempt(target)
+                    pending.add(submitted)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _send_in_order(
+        self, method: str, targets: List[Tuple[str, str]], options: Dict[str, Any], expires: Optional[float]
+    ) -> Any:
+        last = len(targets) - 1
+        for server, server_url in targets[:last]:
+            try:
+                return self._send(method, server_url, options, expires=expires, server=server)
+            except Exception as e:
+                self._check_failover(method, options, e, expires)
+        server, server_url = targets[last]
+        return self._send(method, server_url, options, expires=expires, server=server)
+
+    async def _ahedged_send(
+        self, method: str, targets: List[Tuple[str, str]], options: Dict[str, Any], expires: Optional[float]
+    ) -> Any:
+        hedge = cast(HedgePolicy, self.hedge)
+        key = f'{method} {self.endpoint.path}'
+
+        async def attempt(target: Tuple[str, str]) -> Any:
+            server, server_url = target
+            start = time.monotonic()
+            result = await self._asend(method, server_url, options, expires=expires, server=server)
+            hedge.record(key, time.monotonic() - start)
+            return result
+
+        hedge_at = time.monotonic() + hedge.delay(key)
+        pending = {asyncio.ensure_future(attempt(targets[0]))}
+        sent = 1
+        try:
+            while True:
+                hedging = sent < 2
+                timeout = max(0.0, hedge_at - time.monotonic()) if hedging else None
+                left = remaining(expires)
+                if left is not None:
+                    timeout = left if timeout is None else min(timeout, left)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                errors: List[BaseException] = []
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    errors.append(error)
+                if errors and not pending and not (hedging and can_fail_over(method, options, errors[0])):
+                    raise errors[0]
+                if hedging and (not pending or time.monotonic() >= hedge_at):
+                    pending.add(asyncio.ensure_future(attempt(targets[1 % len(targets)])))
+                    sent += 1
+                    self._emit(FAILOVER if errors else HEDGE, method)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _check_failover(self, method: str, options: Dict[str, Any], error: Exception, expires: Optional[float]):
+        # Raise the error when the call can not move on to the next server
+        if not can_fail_over(method, options, error):
+            raise error
+        if expires is not None and time.monotonic() >= expires:
+            raise DeadlineExceededException('Deadline of the tool call is exceeded') from error
+        logging.info(f'Failed to call {self.name}, fail over to the next server: {error}')
+        self._emit(FAILOVER, method)
+
+    def _targets(self, url: str) -> List[Tuple[str, str]]:
+        # Pairs of server and URL. URLs are built on the primary server, other servers take its place in front of the
+        # path.
+        start = len(self.integration.server)
+        path = url[start:]
+        return [(x, x + path) for x in self.integration.servers]
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        options: Dict[str, Any],
+        *,
+        expires: Optional[float] = None,
+        server: Optional[str] = None,
+    ) -> Any:
+        cache_key = self._response_cache_key(method, url, options)
+        if cache_key is not None and self.response_cache is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached.decode()
+
+        session = self.session or default_session_pool()
+        options = _requests_options(options)
+        reader = self.response_reader
+        consumer = None
+        # The deadline bounds the wait for the limiter, the retries of the session and their timeouts
+        with acquire(self._server_limiter(server), expires) as permit:
+            remaining(expires)
+            with self._measure_call(method) as event:
+                if reader is None:
+                    response = session.request(method, url, expires=expires, **options)
+                    event.bytes = len(response.content)
+                else:
+                    response = session.request(method, url, stream=True, expires=expires, **options)
+                    with closing(response):
+                        if response.ok:
+                            content_type = response.headers.get('Content-Type')
+                            chunks = response.iter_content(reader.chunk_size)
+                            consumer = reader.read(chunks, content_type, response.encoding)
+                            event.bytes = consumer.bytes
+                        else:
+                            event.bytes = len(response.content)
+                event.status = response.status_code
+                retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+                event.retries = len(retries) if retries else 0
+            permit.status = response.status_code
+            permit.retry_after = response.headers.get('Retry-After')
+
         response.raise_for_status()
+        if consumer is not None:
+            return self._streamed_result(cache_key, response.status_code, response.headers, consumer)
+
+        if cache_key is not None and self.response_cache is not None:
+            self.response_cache.set(
+                cache_key, response.status_code, response.headers, response.content, response.encoding
+            )
         try:
             return response.json()
         except Exception:
             return response.text
+
+    async def _asend(
+        self,
+        method: str,
+        url: str,
+        options: Dict[str, Any],
+        *,
+        expires: Optional[float] = None,
+        server: Optional[str] = None,
+    ) -> Any:
+        cache_key = self._response_cache_key(method, url, options)
+        if cache_key is not None and self.response_cache is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached.decode()
+
+        session = self.async_session or default_async_session_pool()
+        options = _httpx_options(options)
+        reader = self.response_reader
+        consumer = None
+        async with aacquire(self._server_limiter(server), expires) as permit:
+            with self._measure_call(method) as event:
+                if reader is None:
+                    response = await session.request(method, url, **options)
+                    event.bytes = len(response.content)
+                else:
+                    async with session.stream(method, url, **options) as response:
+                        if response.is_success:
+                            content_type = response.headers.get('Content-Type')
+                            chunks = response.aiter_bytes(reader.chunk_size)
+                            consumer = await reader.aread(chunks, content_type, response.encoding)
+                            event.bytes = consumer.bytes
+                        else:
+                            event.bytes = len(await response.aread())
+                event.status = response.status_code
+            permit.status = response.status_code
+            permit.retry_after = response.headers.get('Retry-After')
+
+        response.raise_for_status()
+        if consumer is not None:
+            return self._streamed_result(cache_key, response.status_code, response.headers, consumer)
+
+        if cache_key is not None and self.response_cache is not None:
+            self.response_cache.set(
+                cache_key, response.status_code, response.headers, response.content, response.encoding
+            )
+        try:
+            return response.json()
+        except Exception:
+            return response.text
+
+    def _streamed_result(
+        self, cache_key: Optional[str], status: int, headers: Mapping[str, str], consumer: ResponseConsumer
+    ) -> Any:
+        result = consumer.result()
+        if cache_key is not None and self.response_cache is not None:
+            # Projected and truncated results are cached as they are returned
+            content = json.dumps(result, ensure_ascii=False).encode('utf-8')
+            self.response_cache.set(cache_key, status, headers, content)
+        return result
+
+    def _coalesces(self, method: str) -> bool:
+        # Only idempotent GET requests are coalesced
+        return self.coalesce and method == 'get'
+
+    def _emit(self, kind: str, method: str, seconds: float = 0):
+        if self.instrumentation is not None:
+            labels = {'integration': self.integration_name or '', 'method': method, 'path': self.endpoint.path}
+            self.instrumentation.emit(Event(kind=kind, seconds=seconds, labels=labels))
+
+    def _measure_call(self, method: str) -> ContextManager[Event]:
+        return measure(
+            self.instrumentation, CALL, integration=self.integration_name or '', method=method, path=self.endpoint.path
+        )
+
+    def _server_limiter(self, server: Optional[str] = None) -> Optional[ServerLimiter]:
+        # Failover and hedged attempts are limited by the server they call
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.for_server(server or self.server)
+
+    def _response_cache_key(self, method: str, url: str, options: Dict[str, Any]) -> Optional[str]:
+        # Only responses of GET requests are cached
+        if self.response_cache is None or method != 'get':
+            return None
+        return self.response_cache.key(method, url, options)
+
+    def _build_request(self, kwargs: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        return self.endpoint.plan.build(self.server, kwargs, self.parameters)
+
+
+def _description(self: OpenApiTool) -> str:
+    # Description assigned to the tool takes precedence over the rendered one
+    return self.__dict__['description'] or self.render_description()
+
+
+# pydantic drops attributes named after fields from the class body, so the property replacing the inherited description
+# field is set after the class is created. Values of fields are kept in __dict__ and the property reads it.
+OpenApiTool.description = property(_description)  # type: ignore[assignment]
+
+
+def _requests_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    # requests streams files and iterators given as data, with chunked transfer encoding for iterators
+    if 'content' not in options:
+        return options
+    options = dict(options)
+    options['data'] = options.pop('content')
+    return options
+
+
+def _httpx_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    if 'content' not in options:
+        return options
+    options = dict(options)
+    content = options['content']
+    if isinstance(content, (bytearray, memoryview)):
+        options['content'] = bytes(content)
+    elif not isinstance(content, bytes):
+        options['content'] = aiter_content(content)
+    return options
+
+
+def _escape_path(path: str) -> str:
+    return re.sub(r'\{(.*?)\}', ':\\1', path)
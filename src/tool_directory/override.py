@@ -0,0 +1,85 @@
+import logging
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union
+
+from .utils import convert_to_iso639
+
+Description = Union[str, Dict[str, str]]
+
+
+def translate(description: Description, language: str) -> str:
+    language = convert_to_iso639(language)
+    if isinstance(description, str):
+        return description
+    return description.get(language, description.get('en', ''))
+
+
+class OverrideIndex:
+    def __init__(self, integration: Dict[str, Any]):
+        # Descriptions in the integration indexed by (path, method) and then by (in, name) of parameters
+        self.operations: Dict[Tuple[str, str], Optional[Description]] = {}
+        self.parameters: Dict[Tuple[str, str], Dict[Tuple[str, str], Description]] = {}
+
+        for path, detail in integration.get('paths', {}).items():
+            for method, endpoint in detail.items():
+                self.operations[(path, method)] = endpoint.get('description')
+                parameters = {
+                    (x.get('in'), x.get('name')): x['description']
+                    for x in endpoint.get('parameters', [])
+                    if x.get('description')
+                }
+                if parameters:
+                    self.parameters[(path, method)] = parameters
+
+    def apply(self, spec: Dict[str, Any], language: str, resolve: Callable[[Any], Any]) -> Dict[str, Any]:
+        # Copy only containers on the way to overridden values, everything else is shared with the original spec
+        overlay = dict(spec)
+        paths = overlay['paths'] = dict(spec.get('paths', {}))
+        copied_paths: Set[str] = set()
+
+        for (path, method), description in self.operations.items():
+            path_item = resolve(paths.get(path))
+            if not isinstance(path_item, dict) or not isinstance(resolve(path_item.get(method)), dict):
+                logging.warning(f'Failed to override OpenAPI spec, {method.upper()} {path} does not exist')
+                continue
+
+            if path not in copied_paths:
+                path_item = paths[path] = dict(path_item)
+                copied_paths.add(path)
+            operation = path_item[method] = dict(resolve(path_item[method]))
+
+            if description:
+                operation['description'] = translate(description, language)
+
+            overrides = self.parameters.get((path, method))
+            if overrides:
+                operation['parameters'] = self._override_parameters(path_item, operation, overrides, language, resolve)
+
+        return overlay
+
+    def _override_parameters(
+        self,
+        path_item: Dict[str, Any],
+        operation: Dict[str, Any],
+        overrides: Dict[Tuple[str, str], Description],
+        language: str,
+        resolve: Callable[[Any], Any],
+    ):
+        parameters = []
+        overridden = set()
+        for parameter in operation.get('parameters', []):
+            resolved = resolve(parameter) or {}
+            key: Tuple[str, str] = (resolved.get('in', ''), resolved.get('name', ''))
+            if key in overrides:
+                parameter = dict(resolved, description=translate(overrides[key], language))
+                overridden.add(key)
+            parameters.append(parameter)
+
+        # Path level parameters are overridden for this operation only by copying them into the operation
+        for parameter in path_item.get('parameters', []):
+            resolved = resolve(parameter) or {}
+            key = (resolved.get('in', ''), resolved.get('name', ''))
+            if key in overrides and key not in overridden:
+                parameters.append(dict(resolved, description=translate(overrides[key], language)))
+                overridden.add(key)
+
+        return parameters
@@ -0,0 +1,92 @@
+import json
+import re
+from typing import Any, Callable, Dict, Optional, Union
+
+import yaml
+
+# orjson is optional, json of the standard library parses the same documents more slowly
+_json_loads: Callable[[bytes], Any]
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
+
+_JSON_START = re.compile(rb'\s*[{\[]')
+
+
+class SpecParser:
+    name = 'base'
+
+    def parse(self, content: bytes, content_type: Optional[str] = None) -> Any:
+        raise NotImplementedError
+
+
+class YamlParser(SpecParser):
+    name = 'yaml'
+
+    def __init__(self):
+        # Use libyaml binding when PyYAML is built with it
+        self.loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+    def parse(self, content: bytes, content_type: Optional[str] = None) -> Any:
+        return yaml.load(content, Loader=self.loader)
+
+
+class PureYamlParser(YamlParser):
+    name = 'pure-yaml'
+
+    def __init__(self):
+        self.loader = yaml.SafeLoader
+
+
+class JsonParser(SpecParser):
+    name = 'json'
+
+    def __init__(self):
+        self.loads = _json_loads
+
+    def parse(self, content: bytes, content_type: Optional[str] = None) -> Any:
+        return self.loads(content)
+
+
+class AutoParser(SpecParser):
+    name = 'auto'
+
+    def __init__(self):
+        self.json = JsonParser()
+        self.yaml = YamlParser()
+
+    def parse(self, content: bytes, content_type: Optional[str] = None) -> Any:
+        if self._is_json(content, content_type):
+            try:
+                return self.json.parse(content)
+            except ValueError:
+                # YAML flow mappings also start with a brace
+                pass
+        return self.yaml.parse(content)
+
+    def _is_json(self, content: bytes, content_type: Optional[str]) -> bool:
+        if content_type and 'json' in content_type.split(';')[0]:
+            return True
+        return _JSON_START.match(content) is not None
+
+
+PARSERS: Dict[str, Callable[[], SpecParser]] = {
+    'auto': AutoParser,
+    'yaml': YamlParser,
+    'pure-yaml': PureYamlParser,
+    'json': JsonParser,
+}
+
+
+def get_parser(parser: Union[str, SpecParser, None] = None) -> SpecParser:
+    if isinstance(parser, SpecParser):
+        return parser
+    if parser is None:
+        parser = 'auto'
+    if parser not in PARSERS:
+        raise ValueError(f'Unknown parser({parser}), choose from {", ".join(PARSERS)}.')
+    return PARSERS[parser]()
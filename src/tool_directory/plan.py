@@ -0,0 +1,125 @@
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import quote
+
+from .upload import BINARY, FORM, JSON, MULTIPART, body_kind, encode_content, is_stream
+
+# Build options of a request from query arguments
+Handler = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+def _query_as_params(query_args: Dict[str, Any], header_args: Dict[str, Any]) -> Dict[str, Any]:
+    return {'headers': header_args, 'params': query_args}
+
+
+def _query_as_form(query_args: Dict[str, Any], header_args: Dict[str, Any]) -> Dict[str, Any]:
+    return {'headers': header_args, 'data': query_args}
+
+
+METHOD_HANDLERS: Dict[str, Handler] = {
+    'get': _query_as_params,
+    'head': _query_as_params,
+    'options': _query_as_params,
+    'delete': _query_as_params,
+    'trace': _query_as_params,
+    'post': _query_as_form,
+    'put': _query_as_form,
+    'patch': _query_as_form,
+}
+
+_PLACEHOLDER = re.compile(r'\{([^{}]+)\}')
+
+
+class PathArgument(str):
+    pass
+
+
+# Arguments routed to 'body' are properties of the request body, and an argument routed to 'content' is the whole body.
+# Operations without a request body keep sending query arguments as form data of POST, PUT and PATCH requests.
+class RequestPlan:
+    __slots__ = ('method', 'handler', 'routes', 'template', 'body_type', 'body_kind')
+
+    def __init__(self, method: str, path: str, args_source: Mapping[str, str], body_type: Optional[str] = None):
+        self.method = method
+        self.handler: Optional[Handler] = METHOD_HANDLERS.get(method)
+        self.routes = dict(args_source)
+        self.template = self._parse_template(path)
+        self.body_type = body_type
+        self.body_kind = body_kind(body_type) if body_type is not None else None
+
+    def build(
+        self, server: str, kwargs: Mapping[str, Any], parameters: Mapping[str, Any]
+    ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        if self.handler is None:
+            return None
+
+        path_args: Dict[str, Any] = {}
+        query_args: Dict[str, Any] = {}
+        header_args: Dict[str, Any] = {}
+        body_args: Dict[str, Any] = {}
+        content_args: Dict[str, Any] = {}
+        arguments = {
+            'path': path_args,
+            'query': query_args,
+            'header': header_args,
+            'body': body_args,
+            'content': content_args,
+        }
+        # Preconfigured parameters take precedence over arguments from LLM
+        for values in (kwargs, parameters):
+            for name, value in values.items():
+                location = self.routes.get(name)
+                if location in arguments:
+                    arguments[location][name] = value
+
+        url = self.build_url(server, path_args)
+        if self.body_type is None:
+            return self.method, url, self.handler(query_args, header_args)
+        return self.method, url, self.build_body(query_args, header_args, body_args, content_args)
+
+    def build_body(
+        self,
+        query_args: Dict[str, Any],
+        header_args: Dict[str, Any],
+        body_args: Dict[str, Any],
+        content_args: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        # Streams are left in 'content' unread, and senders pass them to their HTTP clients as iterables
+        options: Dict[str, Any] = {'headers': header_args, 'params': query_args}
+        if content_args:
+            content = next(iter(content_args.values()))
+            if self.body_kind == JSON and not is_stream(content):
+                options['json'] = content
+            elif self.body_kind == FORM and isinstance(content, dict):
+                options['data'] = content
+            else:
+                options['content'] = encode_content(content)
+                body_type = self.body_type or '*'
+                if '*' not in body_type and not any(x.lower() == 'content-type' for x in header_args):
+                    header_args['Content-Type'] = body_type
+        elif body_args:
+            if self.body_kind == JSON:
+                options['json'] = body_args
+            elif self.body_kind == MULTIPART:
+                options['files'] = {k: v if is_stream(v) else (None, str(v)) for k, v in body_args.items()}
+            elif self.body_kind != BINARY:
+                options['data'] = body_args
+        return options
+
+    def build_url(self, server: str, path_args: Mapping[str, Any]) -> str:
+        return server + ''.join(
+            quote(str(path_args[x]), safe='') if isinstance(x, PathArgument) else x for x in self.template
+        )
+
+    def _parse_template(self, path: str) -> List[Union[str, PathArgument]]:
+        template: List[Union[str, PathArgument]] = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(path):
+            start = match.start()
+            if start > position:
+                template.append(path[position:start])
+            template.append(PathArgument(match.group(1)))
+            position = match.end()
+        if position < len(path):
+            template.append(path[position:])
+        return template
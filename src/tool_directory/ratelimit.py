@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+from .exceptions import DeadlineExceededException
+
+THROTTLED_STATUS = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class Permit:
+    # Set by the caller from the response to adapt the limiter
+    status: Optional[int] = None
+    retry_after: Optional[str] = None
+
+
+class ServerLimiter:
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 60,
+    ):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate or 1))
+        self.max_concurrency = max_concurrency
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._strikes = 0
+        # Concurrency limit shrinks on throttling and grows back on success (AIMD)
+        self._limit = float(max_concurrency) if max_concurrency else 0.0
+        self._active = 0
+        self._waiters: Deque[Callable[[], None]] = deque()
+
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        return int(self._limit) if self.max_concurrency else None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @contextmanager
+    def acquire(self, expires: Optional[float] = None) -> Iterator[Permit]:
+        # Waits until the expiry time of time.monotonic() at the latest
+        while True:
+            with self._lock:
+                if self._enter():
+                    break
+                event = threading.Event()
+                self._waiters.append(event.set)
+            if not event.wait(_until(expires)):
+                with self._lock:
+                    try:
+                        self._waiters.remove(event.set)
+                        woken = False
+                    except ValueError:
+                        woken = True
+                # Pass the wakeup to the next waiter
+                if woken:
+                    self._wake()
+                raise DeadlineExceededException('Deadline of the tool call is exceeded')
+
+        permit = Permit()
+        try:
+            delay = self._reserve()
+            if expires is not None and time.monotonic() + delay >= expires:
+                raise DeadlineExceededException('Deadline of the tool call is exceeded')
+            if delay > 0:
+                time.sleep(delay)
+            yield permit
+        finally:
+            self._release(permit)
+
+    @asynccontextmanager
+    async def aacquire(self, expires: Optional[float] = None) -> AsyncIterator[Permit]:
+        # Waits for a slot until cancelled, and gives up when the delay of the rate or backoff passes the expiry time
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._enter():
+                    break
+                future = loop.create_future()
+                wake = _waker(loop, future)
+                self._waiters.append(wake)
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    try:
+                        self._waiters.remove(wake)
+                        woken = False
+                    except ValueError:
+                        woken = True
+                # Pass the wakeup to the next waiter
+                if woken:
+                    self._wake()
+                raise
+
+        permit = Permit()
+        try:
+            delay = self._reserve()
+            if expires is not None and time.monotonic() + delay >= expires:
+                raise DeadlineExceededException('Deadline of the tool call is exceeded')
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield permit
+        finally:
+            self._release(permit)
+
+    def _enter(self) -> bool:
+        # Called with the lock held
+        if self.max_concurrency and self._active >= int(self._limit):
+            return False
+        self._active += 1
+        return True
+
+    def _reserve(self) -> float:
+        # Take a token and return how long to wait for it and for the backoff
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._blocked_until - now)
+            if self.rate:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self.rate)
+            return delay
+
+    def _release(self, permit: Permit):
+        with self._lock:
+            self._active -= 1
+            self._adapt(permit)
+        self._wake()
+
+    def _adapt(self, permit: Permit):
+        if permit.status in THROTTLED_STATUS:
+            self._strikes += 1
+            pause = parse_retry_after(permit.retry_after)
+            if pause is None:
+                pause = self.backoff_factor * 2 ** (self._strikes - 1)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + min(pause, self.max_backoff))
+            if self.max_concurrency:
+                self._limit = max(1.0, self._limit / 2)
+        elif permit.status is not None and permit.status < 500:
+            self._strikes = 0
+            if self.max_concurrency:
+                self._limit = min(float(self.max_concurrency), self._limit + 1 / self._limit)
+
+    def _wake(self):
+        with self._lock:
+            free = int(self._limit) - self._active if self.max_concurrency else len(self._waiters)
+            wakes = [self._waiters.popleft() for _ in range(min(free, len(self._waiters)))]
+        for wake in wakes:
+            wake()
+
+
+@contextmanager
+def acquire(limiter: Optional[ServerLimiter], expires: Optional[float] = None) -> Iterator[Permit]:
+    if limiter is None:
+        yield Permit()
+        return
+
+    with limiter.acquire(expires) as permit:
+        yield permit
+
+
+@asynccontextmanager
+async def aacquire(limiter: Optional[ServerLimiter], expires: Optional[float] = None) -> AsyncIterator[Permit]:
+    if limiter is None:
+        yield Permit()
+        return
+
+    async with limiter.aacquire(expires) as permit:
+        yield permit
+
+
+def _until(expires: Optional[float]) -> Optional[float]:
+    return max(0.0, expires - time.monotonic()) if expires is not None else None
+
+
+def _waker(loop: asyncio.AbstractEventLoop, future: asyncio.Future) -> Callable[[], None]:
+    def set_result():
+        if not future.done():
+            future.set_result(None)
+
+    def wake():
+        loop.call_soon_threadsafe(set_result)
+
+    return wake
+
+
+# Holds a ServerLimiter per server so that all tools calling the same server share its rate, concurrency and backoff.
+class RateLimiter:
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 60,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self._limiters: Dict[str, ServerLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_server(self, server: str) -> ServerLimiter:
+        limiter = self._limiters.get(server)
+        if limiter is not None:
+            return limiter
+
+        with self._lock:
+            if server not in self._limiters:
+                self._limiters[server] = ServerLimiter(
+                    rate=self.rate,
+                    burst=self.burst,
+                    max_concurrency=self.max_concurrency,
+                    backoff_factor=self.backoff_factor,
+                    max_backoff=self.max_backoff,
+                )
+            return self._limiters[server]
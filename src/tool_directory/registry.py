@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+from .cache import SpecCache
+from .coalesce import SingleFlight
+from .instrumentation import Instrumentation
+from .loader import ToolLoader
+from .parser import SpecParser
+from .utils import convert_to_iso639
+
+if TYPE_CHECKING:
+    from .model import OpenApiTool
+
+# Integration name, language and fingerprint of preconfigured parameters
+RegistryKey = Tuple[str, str, str]
+
+
+def fingerprint(parameters: Mapping[str, str]) -> str:
+    # Parameters often hold API keys, only their digest is kept in keys
+    return hashlib.sha256(json.dumps(sorted(parameters.items())).encode('utf-8')).hexdigest()
+
+
+class RegistryInfo(NamedTuple):
+    hits: int
+    misses: int
+    refreshes: int
+    failures: int
+    size: int
+
+
+@dataclass
+class _Entry:
+    tools: Tuple['OpenApiTool', ...]
+    parameters: Mapping[str, str]
+    checked_at: float
+    refreshing: bool = False
+
+
+@dataclass
+class _Loader:
+    loader: ToolLoader
+    loaded_at: float
+
+
+# Process-wide store of loaded tools. The first request of a key loads its tools, and later requests are served from
+# memory. Entries older than ttl are refreshed in background threads while the stale tools keep being served, so a
+# warmed key never waits for the tool directory. A failed refresh keeps the stale tools and is retried after ttl.
+class ToolRegistry:
+    def __init__(
+        self,
+        ttl: float = 300,
+        max_workers: int = 4,
+        cache: Optional[SpecCache] = None,
+        parser: Union[str, SpecParser, None] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        source: Optional[str] = None,
+        **options: Any,
+    ):
+        # options are passed to ToolLoader.get_tools, such as session, response_cache and rate_limiter
+        self.ttl = ttl
+        self.cache = cache
+        self.parser = parser
+        self.instrumentation = instrumentation
+        self.source = source
+        self.options = options
+
+        self._entries: Dict[RegistryKey, _Entry] = {}
+        self._loaders: Dict[str, _Loader] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tool-registry')
+        self._pending: Set[Future] = set()
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._failures = 0
+
+    def get_tools(
+        self, name: str, language: str = 'en', parameters: Mapping[str, str] = {}
+    ) -> Tuple['OpenApiTool', ...]:
+        key = (name, convert_to_iso639(language), fingerprint(parameters))
+        with self._lock:
+            entry = self._entries.get(key)
+            stale = False
+            if entry is not None:
+                self._hits += 1
+                stale = not entry.refreshing and time.monotonic() - entry.checked_at >= self.ttl
+                if stale:
+                    entry.refreshing = True
+        if entry is not None:
+            if stale:
+                self._schedule(key)
+            return entry.tools
+
+        # Concurrent first requests of the same key share one load
+        return self._flight.do('\0'.join(key), lambda: self._load(key, language, parameters))[0]
+
+    def warm(self, targets: Iterable[Union[str, Tuple[str, str], Tuple[str, str, Mapping[str, str]]]]):
+        # Load given integrations in parallel before serving, each is given as name, (name, language) or
+        # (name, language, parameters). Failures are logged and left to the first request.
+        futures = []
+        for target in targets:
+            name, language, parameters = _target(target)
+            futures.append((name, self._executor.submit(self.get_tools, name, language, parameters)))
+        for name, future in futures:
+            try:
+                future.result()
+            except Exception:
+                logging.warning(f'Failed to warm integration {name}', exc_info=True)
+
+    def refresh(self, name: str, language: str = 'en', parameters: Mapping[str, str] = {}) -> Tuple['OpenApiTool', ...]:
+        # Reload tools of the key now, regardless of ttl
+        key = (name, convert_to_iso639(language), fingerprint(parameters))
+        with self._lock:
+            self._loaders.pop(name, None)
+        tools = self._build(name, language, parameters)
+        with self._lock:
+            self._refreshes += 1
+            self._entries[key] = _Entry(tools, dict(parameters), time.monotonic())
+        return tools
+
+    def join(self, timeout: Optional[float] = None):
+        # Wait for background refreshes in flight
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.exception(timeout=timeout)
+
+    def info(self) -> RegistryInfo:
+        with self._lock:
+            return RegistryInfo(self._hits, self._misses, self._refreshes, self._failures, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loaders.clear()
+            self._hits = self._misses = self._refreshes = self._failures = 0
+
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _load(self, key: RegistryKey, language: str, parameters: Mapping[str, str]) -> Tuple['OpenApiTool', ...]:
+        with self._lock:
+            # Loaded by the request which was coalesced before this one
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.tools
+            self._misses += 1
+
+        tools = self._build(key[0], language, parameters)
+        with self._lock:
+            self._entries[key] = _Entry(tools, dict(parameters), time.monotonic())
+        return tools
+
+    def _build(self, name: str, language: str, parameters: Mapping[str, str]) -> Tuple['OpenApiTool', ...]:
+        loader = self._loader(name).for_language(language)
+        return tuple(loader.get_tools(parameters=dict(parameters), **self.options))
+
+    def _loader(self, name: str) -> ToolLoader:
+        # Languages and parameters of an integration share a loader until it gets older than ttl, so refreshing many
+        # keys of an integration fetches its documents once
+        with self._lock:
+            cached = self._loaders.get(name)
+            if cached is not None and time.monotonic() - cached.loaded_at < self.ttl:
+                return cached.loader
+
+        def create() -> ToolLoader:
+            loader = ToolLoader(
+                name, cache=self.cache, parser=self.parser, instrumentation=self.instrumentation, source=self.source
+            )
+            with self._lock:
+                self._loaders[name] = _Loader(loader, time.monotonic())
+            return loader
+
+        return self._flight.do(f'loader\0{name}', create)[0]
+
+    def _schedule(self, key: RegistryKey):
+        future = self._executor.submit(self._refresh, key)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _refresh(self, key: RegistryKey):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        try:
+            tools = self._build(key[0], key[1], entry.parameters)
+        except Exception:
+            logging.warning(f'Failed to refresh integration {key[0]}, keep serving stale tools', exc_info=True)
+            with self._lock:
+                self._failures += 1
+                entry.checked_at = time.monotonic()
+                entry.refreshing = False
+            return
+
+        with self._lock:
+            self._refreshes += 1
+            self._entries[key] = _Entry(tools, entry.parameters, time.monotonic())
+
+
+def _target(target: Union[str, Tuple[Any, ...]]) -> Tuple[str, str, Mapping[str, str]]:
+    if isinstance(target, str):
+        return target, 'en', {}
+    if len(target) == 2:
+        return target[0], target[1], {}
+    return target[0], target[1], target[2]
+
+
+_default_registry: Optional[ToolRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def default_registry() -> ToolRegistry:
+    global _default_registry
+
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = ToolRegistry()
+    return _default_registry
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+from .utils import remove_file, write_atomic
+
+CACHEABLE_STATUS = (200, 203)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def request_key(method: str, url: str, options: Mapping[str, Any]) -> str:
+    # Header values (API keys, tokens) only enter the key as digests, the key itself is a digest as well
+    params = sorted((str(k), str(v)) for k, v in (options.get('params') or {}).items())
+    headers = sorted(
+        (str(k).lower(), _digest(str(v).encode('utf-8'))) for k, v in (options.get('headers') or {}).items()
+    )
+    material = json.dumps([method.lower(), url, params, headers], ensure_ascii=False)
+    return _digest(material.encode('utf-8'))
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for directive in (value or '').split(','):
+        name, _, argument = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], default_ttl: float) -> float:
+    # Lifetime of a response for a shared cache (RFC 9111), default_ttl is used when the response does not tell it
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-store' in directives or 'no-cache' in directives or 'private' in directives:
+        return 0
+
+    lifetime: Optional[float] = None
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                lifetime = max(0, int(directives[name] or ''))
+            except ValueError:
+                lifetime = 0
+            break
+
+    if lifetime is None and 'Expires' in headers:
+        expires = _parse_date(headers.get('Expires'))
+        date = _parse_date(headers.get('Date')) or time.time()
+        # Invalid Expires means already expired
+        lifetime = max(0, expires - date) if expires is not None else 0
+
+    if lifetime is None:
+        lifetime = default_ttl
+
+    try:
+        age = max(0, int(headers.get('Age') or 0))
+    except ValueError:
+        age = 0
+    return max(0, lifetime - age)
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    encoding: Optional[str]
+    expires_at: float
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def decode(self) -> Any:
+        try:
+            return json.loads(self.content)
+        except ValueError:
+            return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class ResponseCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    bytes: int
+
+
+# Responses of GET requests are kept in memory up to maxsize entries and max_bytes of contents, least recently used
+# ones are evicted first. With directory, responses are also written to disk to survive restarts and be shared between
+# processes.
+class ResponseCache:
+    def __init__(
+        self,
+        ttl: float = 60,
+        maxsize: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        directory: Optional[str] = None,
+        max_disk_size: int = 64 * 1024 * 1024,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_size = max_disk_size
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, method: str, url: str, options: Mapping[str, Any]) -> str:
+        return request_key(method, url, options)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.is_fresh():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._put(key, entry)
+        return entry
+
+    def set(
+        self, key: str, status: int, headers: Mapping[str, str], content: bytes, encoding: Optional[str] = None
+    ) -> bool:
+        if status not in CACHEABLE_STATUS:
+            return False
+        lifetime = freshness_lifetime(headers, self.ttl)
+        if lifetime <= 0:
+            return False
+
+        entry = CachedResponse(content=content, encoding=encoding, expires_at=time.time() + lifetime)
+        with self._lock:
+            self._put(key, entry)
+        self._dump(key, entry)
+        return True
+
+    def info(self) -> ResponseCacheInfo:
+        with self._lock:
+            return ResponseCacheInfo(self._hits, self._misses, self._evictions, len(self._entries), self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+        if self.directory is not None:
+            for filename in os.listdir(self.directory):
+                remove_file(os.path.join(self.directory, filename))
+
+    def _put(self, key: str, entry: CachedResponse):
+        if len(entry.content) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.content)
+        while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.content)
+
+    # A disk entry is a JSON header line followed by the content
+    def _load(self, key: str) -> Optional[CachedResponse]:
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+
+        entry = CachedResponse(content=content, encoding=header.get('encoding'), expires_at=header.get('expires_at', 0))
+        if not entry.is_fresh():
+            remove_file(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _dump(self, key: str, entry: CachedResponse):
+        if self.directory is None:
+            return
+        header = json.dumps({'encoding': entry.encoding, 'expires_at': entry.expires_at}).encode('utf-8')
+        write_atomic(os.path.join(self.directory, key), header + b'\n' + entry.content)
+        self._evict_disk(self.directory)
+
+    def _evict_disk(self, directory: str):
+        files = []
+        for filename in os.listdir(directory):
+            if filename.startswith('.tmp-'):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+
+        total = sum(size for _, _, size in files)
+        files.sort()
+        for _, path, size in files:
+            if total <= self.max_disk_size:
+                break
+            remove_file(path)
+            total -= size
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type, Union
+
+from pydantic.v1 import BaseModel, Field, create_model
+
+# Pair of parameter name and required flag, optionally followed by the type of the argument ('str' by default)
+ArgumentField = Union[Tuple[str, bool], Tuple[str, bool, str]]
+
+# Parameters are passed as strings, and properties of request bodies keep values of any JSON type, files or iterators
+ARGUMENT_TYPES: Dict[str, Any] = {'str': str, 'any': Any}
+
+# Canonical signature of the arguments: name, required flag and type of each field in order
+Signature = Tuple[Tuple[str, bool, str], ...]
+
+
+class SchemaCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class SchemaCache:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._schemas: 'OrderedDict[Signature, Type[BaseModel]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, fields: Iterable[ArgumentField]) -> Type[BaseModel]:
+        signature: Signature = tuple(
+            (field[0], bool(field[1]), field[2] if len(field) > 2 else 'str') for field in fields  # type: ignore[misc]
+        )
+        with self._lock:
+            schema = self._schemas.get(signature)
+            if schema is not None:
+                self._schemas.move_to_end(signature)
+                self._hits += 1
+                return schema
+            self._misses += 1
+
+        schema = _create_model(signature)
+        with self._lock:
+            # Keep the class created first when other thread has created the same one
+            schema = self._schemas.setdefault(signature, schema)
+            self._schemas.move_to_end(signature)
+            while len(self._schemas) > self.maxsize:
+                self._schemas.popitem(last=False)
+                self._evictions += 1
+        return schema
+
+    def info(self) -> SchemaCacheInfo:
+        with self._lock:
+            return SchemaCacheInfo(self._hits, self._misses, self._evictions, len(self._schemas), self.maxsize)
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+default_schema_cache = SchemaCache()
+
+
+def create_args_schema(fields: Iterable[ArgumentField], cache: Optional[SchemaCache] = None) -> Type[BaseModel]:
+    return (cache or default_schema_cache).get(fields)
+
+
+def get_args_fields(args_schema: Type[BaseModel]) -> List[ArgumentField]:
+    fields: List[ArgumentField] = []
+    for name, field in args_schema.__fields__.items():
+        if field.outer_type_ is str:
+            fields.append((name, bool(field.required)))
+        else:
+            fields.append((name, bool(field.required), 'any'))
+    return fields
+
+
+def _create_model(signature: Signature) -> Type[BaseModel]:
+    # Check required flag and default value
+    parameters = {
+        name: (ARGUMENT_TYPES[type_], Field(...)) if required else (ARGUMENT_TYPES[type_], Field(None))
+        for name, required, type_ in signature
+    }
+
+    return create_model('ArgumentsSchema', **parameters)
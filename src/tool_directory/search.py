@@ -0,0 +1,272 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+from .cache import SpecCache
+from .exceptions import InvalidIndexException
+from .loader import ToolLoader
+from .override import translate
+from .parser import SpecParser
+from .toolset import Operation
+from .utils import convert_to_iso639, write_atomic
+
+if TYPE_CHECKING:
+    from .model import OpenApiTool
+
+INDEX_MAGIC = b'TDINDEX\0'
+INDEX_VERSION = 1
+
+# Layout: magic, version and zlib compressed JSON of documents, their lengths and postings. Postings of each term are
+# flat lists of [document id delta, term frequency, ...] in ascending order of document ids.
+_PREFIX = struct.Struct('<8sI')
+
+_CAMEL_CASE = re.compile(r'([a-z0-9])([A-Z])')
+_TOKEN = re.compile(r'[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿豈-﫿]+')
+_ASCII = re.compile(r'[a-z0-9]')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    # Words for alphabets and numbers, character bigrams for Japanese and Chinese which have no spaces between words
+    tokens = []
+    for token in _TOKEN.findall(_CAMEL_CASE.sub(r'\1 \2', text).lower()):
+        if _ASCII.match(token) or len(token) == 1:
+            tokens.append(token)
+        else:
+            tokens.extend(a + b for a, b in zip(token, token[1:]))
+    return tokens
+
+
+class SearchHit(NamedTuple):
+    integration: str
+    language: str
+    method: str
+    path: str
+    operation_id: Optional[str]
+    score: float
+
+
+# Document of the index, an endpoint of an integration described in a language
+_Document = Tuple[str, str, str, str, Optional[str]]
+
+
+class SearchIndex:
+    def __init__(self, documents: List[_Document], lengths: List[int], postings: Dict[str, List[int]]):
+        self.documents = documents
+        self.lengths = lengths
+        self.postings = postings
+        self._average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self._loaders: Dict[str, ToolLoader] = {}
+        self._loaders_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(
+        cls,
+        names: Iterable[str],
+        languages: Optional[Sequence[str]] = None,
+        max_workers: int = 8,
+        cache: Optional[SpecCache] = None,
+        parser: Union[str, SpecParser, None] = None,
+        source: Optional[str] = None,
+    ) -> 'SearchIndex':
+        # Integrations which fail to load are logged and left out of the index
+        def load(name: str) -> List[Tuple[_Document, List[str]]]:
+            try:
+                return _index_integration(ToolLoader(name, cache=cache, parser=parser, source=source), languages)
+            except Exception as e:
+                logging.warning(f'Failed to index {name}: {e}')
+                return []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(load, names))
+
+        documents: List[_Document] = []
+        lengths: List[int] = []
+        frequencies: Dict[str, List[Tuple[int, int]]] = {}
+        for document, tokens in (x for result in results for x in result):
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                frequencies.setdefault(token, []).append((len(documents), count))
+            documents.append(document)
+            lengths.append(len(tokens))
+
+        postings = {}
+        for token, entries in frequencies.items():
+            flat: List[int] = []
+            previous = 0
+            for document_id, count in entries:
+                flat.extend((document_id - previous, count))
+                previous = document_id
+            postings[token] = flat
+        return cls(documents, lengths, postings)
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < _PREFIX.size:
+            raise InvalidIndexException(f'Specified file({path}) is not a search index.')
+        magic, version = _PREFIX.unpack_from(data)
+        if magic != INDEX_MAGIC:
+            raise InvalidIndexException(f'Specified file({path}) is not a search index.')
+        if version != INDEX_VERSION:
+            raise InvalidIndexException(f'Search index version {version} of {path} is not supported.')
+
+        offset = _PREFIX.size
+        try:
+            body = json.loads(zlib.decompress(data[offset:]))
+        except (zlib.error, ValueError) as e:
+            raise InvalidIndexException(f'Search index {path} is corrupted: {e}')
+        return cls([cast(_Document, tuple(x)) for x in body['documents']], body['lengths'], body['postings'])
+
+    def save(self, path: str):
+        body = {'documents': self.documents, 'lengths': self.lengths, 'postings': self.postings}
+        content = zlib.compress(json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, _PREFIX.pack(INDEX_MAGIC, INDEX_VERSION) + content)
+
+    def search(self, query: str, k: int = 5, language: Optional[str] = None) -> List[SearchHit]:
+        language = convert_to_iso639(language) if language else None
+        count = len(self.documents)
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            frequency = len(posting) // 2
+            idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            document_id = 0
+            for i in range(0, len(posting), 2):
+                document_id += posting[i]
+                if language is not None and self.documents[document_id][1] != language:
+                    continue
+                tf = posting[i + 1]
+                norm = K1 * (1 - B + B * self.lengths[document_id] / self._average_length)
+                scores[document_id] = scores.get(document_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        # An endpoint indexed in many languages is returned once with its best score
+        hits = []
+        seen: Set[Tuple[str, str, str]] = set()
+        for document_id, score in heapq.nlargest(len(scores), scores.items(), key=lambda x: (x[1], -x[0])):
+            integration, document_language, method, path, operation_id = self.documents[document_id]
+            if (integration, method, path) in seen:
+                continue
+            seen.add((integration, method, path))
+            hits.append(SearchHit(integration, document_language, method, path, operation_id, score))
+            if len(hits) >= k:
+                break
+        return hits
+
+    def get_tools(
+        self,
+        query: str,
+        k: int = 5,
+        language: Optional[str] = None,
+        parameters: Mapping[str, Dict[str, str]] = {},
+        cache: Optional[SpecCache] = None,
+        source: Optional[str] = None,
+        **options: Any,
+    ) -> List['OpenApiTool']:
+        # Only tools of the top-k endpoints are built, parameters and options are passed to ToolLoader.get_tools
+        tools: List['OpenApiTool'] = []
+        for hit in self.search(query, k=k, language=language):
+            loader = self._get_loader(hit.integration, cache, source).for_language(hit.language)
+            toolset = loader.get_tools(parameters=parameters.get(hit.integration, {}), lazy=True, **options)
+            tools.extend(toolset.filter(path=hit.path, method=hit.method))
+        return tools
+
+    def _get_loader(self, name: str, cache: Optional[SpecCache], source: Optional[str]) -> ToolLoader:
+        loader = self._loaders.get(name)
+        if loader is not None:
+            return loader
+
+        with self._loaders_lock:
+            if name not in self._loaders:
+                self._loaders[name] = ToolLoader(name, cache=cache, source=source)
+            return self._loaders[name]
+
+
+def _index_integration(loader: ToolLoader, languages: Optional[Sequence[str]]) -> List[Tuple[_Document, List[str]]]:
+    integration_description = loader.integration.get('description') or ''
+    if languages is None:
+        languages = sorted(_languages(loader.integration))
+
+    documents = []
+    for language in languages:
+        localized = loader.for_language(language)
+        description = translate(integration_description, language)
+        for operation in localized.get_operations():
+            text = ' '.join(
+                [
+                    loader.name,
+                    description,
+                    _describe(localized, operation),
+                    operation.path,
+                    operation.operation_id or '',
+                ]
+                + list(operation.tags)
+            )
+            document = (
+                loader.name,
+                convert_to_iso639(language),
+                operation.method,
+                operation.path,
+                operation.operation_id,
+            )
+            documents.append((document, tokenize(text)))
+    return documents
+
+
+def _describe(loader: ToolLoader, operation: Operation) -> str:
+    # Same description as the compiled endpoint without building its args schema
+    compiler = loader.compiler
+    path_item = compiler.resolve(compiler.spec['paths'][operation.path]) or {}
+    detail = compiler.resolve(path_item[operation.method]) or {}
+    return detail.get('description', detail.get('summary', '')) or ''
+
+
+def _languages(value: Any) -> Set[str]:
+    # Languages of translated descriptions in the integration, English is always indexed
+    languages = {'en'}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key == 'description' and isinstance(child, dict):
+                languages.update(child.keys())
+            else:
+                languages.update(_languages(child))
+    elif isinstance(value, list):
+        for child in value:
+            languages.update(_languages(child))
+    return languages
@@ -0,0 +1,235 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, AsyncContextManager, Collection, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Timeout as TimeoutSauce
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    import httpx
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Shortest timeout of an attempt started at the deadline, urllib3 does not accept zero
+MIN_TIMEOUT = 0.001
+
+# Deadline of the request sent by the current thread, read by the retries of urllib3
+_deadline = threading.local()
+
+
+class SessionPool:
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        timeout: Optional[Timeout] = 30,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        status_forcelist: Collection[int] = (),
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.retry = _DeadlineRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            # Leave the status to the caller instead of raising MaxRetryError
+            raise_on_status=False,
+            # Retry-After of 429 and 503 is left to RateLimiter, which sees the response, instead of blocking the thread
+            # inside its permit for as long as the server asks
+            respect_retry_after_header=False,
+        )
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, url: str) -> requests.Session:
+        origin = _origin(url)
+        session = self._sessions.get(origin)
+        if session is not None:
+            return session
+
+        with self._lock:
+            if origin not in self._sessions:
+                self._sessions[origin] = self._create_session()
+            return self._sessions[origin]
+
+    def request(self, method: str, url: str, expires: Optional[float] = None, **kwargs) -> requests.Response:
+        # Requests with an expiry time of time.monotonic() stop retrying and time out when it is reached
+        kwargs.setdefault('timeout', self.timeout)
+        if expires is None:
+            return self.get_session(url).request(method, url, **kwargs)
+
+        kwargs['timeout'] = _DeadlineTimeout(kwargs['timeout'], expires)
+        _deadline.expires = expires
+        try:
+            return self.get_session(url).request(method, url, **kwargs)
+        finally:
+            _deadline.expires = None
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.retry,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+
+# Connect and read timeouts of an attempt never exceed the rest of the deadline
+def cap_timeout(timeout: Optional[Timeout], seconds: Optional[float]) -> Optional[Timeout]:
+    if seconds is None:
+        return timeout
+    if timeout is None:
+        return seconds
+    if isinstance(timeout, tuple):
+        return min(timeout[0], seconds), min(timeout[1], seconds)
+    return min(timeout, seconds)
+
+
+# urllib3 clones the timeout for each attempt, so retries get the rest of the deadline instead of the whole timeout
+class _DeadlineTimeout(TimeoutSauce):
+    def __init__(self, timeout: Optional[Timeout], expires: float):
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        super().__init__(connect=connect, read=read)
+        self.timeout = timeout
+        self.expires = expires
+
+    def clone(self) -> TimeoutSauce:
+        timeout = cap_timeout(self.timeout, max(MIN_TIMEOUT, self.expires - time.monotonic()))
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return TimeoutSauce(connect=connect, read=read)
+
+
+# Gives up retrying when the backoff or Retry-After of the next retry would pass the deadline of the request, so the
+# last response or error is left to the caller in time
+class _DeadlineRetry(Retry):
+    def increment(
+        self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None
+    ) -> '_DeadlineRetry':
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        expires = getattr(_deadline, 'expires', None)
+        if expires is None or time.monotonic() + _sleep_time(retry, response) < expires:
+            return retry
+        return Retry.increment(self.new(total=0), method, url, response, error, _pool, _stacktrace)
+
+
+def _sleep_time(retry: Retry, response) -> float:
+    if retry.respect_retry_after_header and response is not None:
+        retry_after = retry.get_retry_after(response)
+        if retry_after:
+            return retry_after
+    return retry.get_backoff_time()
+
+
+class AsyncSessionPool:
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: Optional[float] = 5.0,
+        timeout: Optional[Timeout] = 30,
+        retries: int = 3,
+        transport: Optional['httpx.AsyncBaseTransport'] = None,
+    ):
+        # httpx is imported by the first async pool, sync only workers do not pay for it
+        import httpx
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.retries = retries
+        self.transport = transport
+
+        # httpx clients are bound to the event loop which opened their connections
+        self._clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]' = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get_client(self, url: str) -> 'httpx.AsyncClient':
+        loop = asyncio.get_running_loop()
+        origin = _origin(url)
+        with self._lock:
+            clients = self._clients.setdefault(loop, {})
+            if origin not in clients:
+                clients[origin] = self._create_client()
+            return clients[origin]
+
+    async def request(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        return await self.get_client(url).request(method, url, **kwargs)
+
+    def stream(self, method: str, url: str, **kwargs) -> AsyncContextManager['httpx.Response']:
+        return self.get_client(url).stream(method, url, **kwargs)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+    def _create_client(self) -> 'httpx.AsyncClient':
+        import httpx
+
+        timeout = (
+            httpx.Timeout(self.timeout)
+            if not isinstance(self.timeout, tuple)
+            else httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+        )
+        transport = self.transport or httpx.AsyncHTTPTransport(limits=self.limits, retries=self.retries)
+        return httpx.AsyncClient(limits=self.limits, timeout=timeout, transport=transport)
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+_default_session_pool: Optional[SessionPool] = None
+_default_session_pool_lock = threading.Lock()
+
+
+def default_session_pool() -> SessionPool:
+    global _default_session_pool
+
+    if _default_session_pool is None:
+        with _default_session_pool_lock:
+            if _default_session_pool is None:
+                _default_session_pool = SessionPool()
+    return _default_session_pool
+
+
+_default_async_session_pool: Optional[AsyncSessionPool] = None
+
+
+def default_async_session_pool() -> AsyncSessionPool:
+    global _default_async_session_pool
+
+    if _default_async_session_pool is None:
+        with _default_session_pool_lock:
+            if _default_async_session_pool is None:
+                _default_async_session_pool = AsyncSessionPool()
+    return _default_async_session_pool
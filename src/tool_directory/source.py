@@ -0,0 +1,34 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+TOOL_DIRECTORY_ENDPOINT = 'https://tool-directory.dialogplay.jp'
+
+_SCHEME = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*://')
+
+
+def directory_url(source: Optional[str] = None) -> str:
+    # Base URL of the tool directory given as an HTTP(S) base URL, a file:// URL or a local directory. The default is
+    # TOOL_DIRECTORY_SOURCE environment variable, and then the public tool directory.
+    source = source or os.environ.get('TOOL_DIRECTORY_SOURCE') or TOOL_DIRECTORY_ENDPOINT
+    if _SCHEME.match(source):
+        return source.rstrip('/')
+    return Path(source).resolve().as_uri()
+
+
+def is_local(url: str) -> bool:
+    return url.startswith('file:')
+
+
+def local_path(url: str) -> str:
+    return url2pathname(urlsplit(url).path)
+
+
+def read_local(url: str) -> Tuple[bytes, Optional[str]]:
+    path = local_path(url)
+    with open(path, 'rb') as f:
+        return f.read(), mimetypes.guess_type(path)[0]
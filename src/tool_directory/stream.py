@@ -0,0 +1,326 @@
+import codecs
+import re
+from json.decoder import JSONDecoder
+from typing import Any, AsyncIterable, Dict, Iterable, List, Literal, Optional, Sequence, Union
+
+TRUNCATED_KEY = '_truncated'
+TRUNCATION_MARKER = '...[truncated]'
+
+# Selector of fields to materialize, True selects a whole value and '*' matches any key or index
+Selector = Union[Literal[True], Dict[str, Any]]
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null')
+_TOKEN = re.compile(r'[^ \t\n\r,:\[\]{}"]*')
+_DECODER = JSONDecoder()
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+
+def parse_fields(fields: Optional[Sequence[str]]) -> Selector:
+    if fields is None:
+        return True
+
+    selector: Dict[str, Any] = {}
+    for field in fields:
+        node = selector
+        names = field.split('.')
+        for name in names[:-1]:
+            child = node.get(name)
+            if child is True:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = True
+    return selector
+
+
+def _merge(a: Optional[Selector], b: Optional[Selector]) -> Optional[Selector]:
+    if a is None or b is True:
+        return b
+    if b is None or a is True:
+        return a
+    merged = dict(a)
+    for key, value in b.items():
+        merged[key] = _merge(merged.get(key), value)
+    return merged
+
+
+def _match_end(pattern: re.Pattern[str], text: str, position: int) -> int:
+    # End of a pattern which also matches empty text
+    match = pattern.match(text, position)
+    return match.end() if match is not None else position
+
+
+# States of a container which tell what comes next
+_KEY_OR_END = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_VALUE_OR_END = 4
+_NEXT = 5
+
+
+class _Frame:
+    __slots__ = ('is_object', 'container', 'selector', 'key', 'index', 'state')
+
+    def __init__(self, is_object: bool, selector: Optional[Selector]):
+        self.is_object = is_object
+        # Values of skipped containers are not materialized
+        self.container: Union[Dict[str, Any], List[Any], None] = None
+        if selector is not None:
+            self.container = {} if is_object else []
+        self.selector = selector
+        self.key = ''
+        self.index = 0
+        self.state = _KEY_OR_END if is_object else _VALUE_OR_END
+
+    def child_selector(self) -> Optional[Selector]:
+        if self.selector is None or self.selector is True:
+            return self.selector
+        key = self.key if self.is_object else str(self.index)
+        return _merge(self.selector.get(key), self.selector.get('*'))
+
+
+# Push parser of JSON which materializes only values selected by the selector. Text is fed in chunks of any size.
+# Complete values in the buffer which are wholly selected (or skipped) are decoded at once by the json module, and
+# containers which are partially selected or not complete yet are parsed token by token.
+class JsonStreamParser:
+    def __init__(self, selector: Selector = True):
+        self.selector = selector
+        self.done = False
+        self._buffer = ''
+        self._stack: List[_Frame] = []
+        self._result: Any = None
+
+    def feed(self, text: str, final: bool = False):
+        self._buffer += text
+        position = self._parse(final)
+        self._buffer = self._buffer[position:]
+        if final and not self.done:
+            raise ValueError('Unexpected end of JSON')
+
+    def close(self) -> Any:
+        self.feed('', final=True)
+        return self._result
+
+    def partial(self) -> Any:
+        # Close open containers and return what has been materialized so far
+        while self._stack:
+            self._end_container()
+        return self._result
+
+    def _parse(self, final: bool) -> int:
+        buffer = self._buffer
+        length = len(buffer)
+        position = 0
+        while True:
+            position = _match_end(_WHITESPACE, buffer, position)
+            if position >= length:
+                return position
+            if self.done:
+                raise ValueError(f'Extra data in JSON at {position}')
+
+            char = buffer[position]
+            frame = self._stack[-1] if self._stack else None
+            state = frame.state if frame is not None else _VALUE
+            if state in (_VALUE, _VALUE_OR_END) and char != ']':
+                # Fast path: decode a complete value at once when it is wholly selected or skipped
+                selector = self.selector if frame is None else frame.child_selector()
+                if selector is None or selector is True or char not in '{[':
+                    try:
+                        value, end = _DECODER.raw_decode(buffer, position)
+                    except ValueError:
+                        pass
+                    else:
+                        # Numbers and literals must be followed by a delimiter, or they may continue in the next chunk
+                        if char in '{["' or (_match_end(_TOKEN, buffer, position) == end and (end < length or final)):
+                            self._value(value, skip=selector is None)
+                            position = end
+                            continue
+
+            if char == '"':
+                match = _STRING.match(buffer, position)
+                if match is None:
+                    if final:
+                        raise ValueError(f'Unterminated string in JSON at {position}')
+                    return position
+                if frame is not None and state in (_KEY_OR_END, _KEY):
+                    frame.key = _DECODER.raw_decode(buffer, position)[0] if frame.container is not None else ''
+                    frame.state = _COLON
+                elif state not in (_VALUE, _VALUE_OR_END):
+                    raise ValueError(f'Unexpected string in JSON at {position}')
+                elif self._selected(frame):
+                    self._value(_DECODER.raw_decode(buffer, position)[0])
+                else:
+                    self._value(None, skip=True)
+                position = match.end()
+            elif char in '{[':
+                if state not in (_VALUE, _VALUE_OR_END):
+                    raise ValueError(f'Unexpected {char!r} in JSON at {position}')
+                selector = self.selector if frame is None else frame.child_selector()
+                self._stack.append(_Frame(char == '{', selector))
+                position += 1
+            elif char in '}]':
+                if (
+                    frame is None
+                    or frame.is_object != (char == '}')
+                    or state not in (_KEY_OR_END, _VALUE_OR_END, _NEXT)
+                ):
+                    raise ValueError(f'Unexpected {char!r} in JSON at {position}')
+                self._end_container()
+                position += 1
+            elif char == ',':
+                if frame is None or state != _NEXT:
+                    raise ValueError(f'Unexpected {char!r} in JSON at {position}')
+                frame.state = _KEY if frame.is_object else _VALUE
+                position += 1
+            elif char == ':':
+                if frame is None or state != _COLON:
+                    raise ValueError(f'Unexpected {char!r} in JSON at {position}')
+                frame.state = _VALUE
+                position += 1
+            else:
+                end = _match_end(_TOKEN, buffer, position)
+                if end == length and not final:
+                    # Numbers and literals may continue in the next chunk
+                    return position
+                token = buffer[position:end]
+                if state not in (_VALUE, _VALUE_OR_END) or not _SCALAR.fullmatch(token):
+                    raise ValueError(f'Invalid JSON at {position}')
+                if not self._selected(frame):
+                    self._value(None, skip=True)
+                elif token in _LITERALS:
+                    self._value(_LITERALS[token])
+                elif '.' in token or 'e' in token or 'E' in token:
+                    self._value(float(token))
+                else:
+                    self._value(int(token))
+                position = end
+
+    def _selected(self, frame: Optional[_Frame]) -> bool:
+        return frame is None or frame.child_selector() is not None
+
+    def _value(self, value: Any, skip: bool = False):
+        if not self._stack:
+            self._result = value
+            self.done = True
+            return
+
+        frame = self._stack[-1]
+        container = frame.container
+        if not skip and container is not None:
+            if isinstance(container, dict):
+                container[frame.key] = value
+            else:
+                container.append(value)
+        frame.index += 1
+        frame.state = _NEXT
+
+    def _end_container(self):
+        frame = self._stack.pop()
+        self._value(frame.container, skip=frame.container is None)
+
+
+class ResponseReader:
+    def __init__(
+        self, max_bytes: Optional[int] = None, fields: Optional[Sequence[str]] = None, chunk_size: int = 64 * 1024
+    ):
+        self.max_bytes = max_bytes
+        self.fields = fields
+        self.chunk_size = chunk_size
+        self.selector = parse_fields(fields)
+
+    def consumer(self, content_type: Optional[str] = None, encoding: Optional[str] = None) -> 'ResponseConsumer':
+        return ResponseConsumer(self, content_type, encoding)
+
+    def read(
+        self, chunks: Iterable[bytes], content_type: Optional[str] = None, encoding: Optional[str] = None
+    ) -> 'ResponseConsumer':
+        consumer = self.consumer(content_type, encoding)
+        for chunk in chunks:
+            if not consumer.feed(chunk):
+                break
+        return consumer
+
+    async def aread(
+        self, chunks: AsyncIterable[bytes], content_type: Optional[str] = None, encoding: Optional[str] = None
+    ) -> 'ResponseConsumer':
+        consumer = self.consumer(content_type, encoding)
+        async for chunk in chunks:
+            if not consumer.feed(chunk):
+                break
+        return consumer
+
+
+# Consumes chunks of one response up to max_bytes. JSON responses are parsed while streaming and other responses are
+# decoded as text. When the budget is hit, the result is marked as truncated: objects get TRUNCATED_KEY, lists and text
+# get TRUNCATION_MARKER appended.
+class ResponseConsumer:
+    def __init__(self, reader: ResponseReader, content_type: Optional[str], encoding: Optional[str]):
+        self.max_bytes = reader.max_bytes
+        self.selector = reader.selector
+        self.bytes = 0
+        self.truncated = False
+        self._json: Optional[bool] = True if content_type and 'json' in content_type else None
+        self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self._parser: Optional[JsonStreamParser] = None
+        self._text: List[str] = []
+
+    def feed(self, chunk: bytes) -> bool:
+        # Returns False when the budget is hit and the rest of the response should not be read
+        if self.max_bytes is not None and self.bytes + len(chunk) > self.max_bytes:
+            chunk = chunk[: self.max_bytes - self.bytes]
+            self.truncated = True
+        self.bytes += len(chunk)
+        self._consume(self._decoder.decode(chunk))
+        return not self.truncated
+
+    def result(self) -> Any:
+        if self.truncated:
+            return self._truncated_result()
+
+        self._consume(self._decoder.decode(b'', final=True))
+        if self._parser is not None:
+            try:
+                return self._parser.close()
+            except ValueError:
+                pass
+        return ''.join(self._text)
+
+    def _consume(self, text: str):
+        if not text:
+            return
+        if self._json is None:
+            if not text.strip():
+                self._text.append(text)
+                return
+            # Detect JSON by the first character when the content type does not tell it
+            self._json = text.lstrip()[0] in '{["'
+
+        # The text is kept to fall back to it when the response turns out not to be JSON, even when the content type
+        # says it is, as responses read without streaming do
+        self._text.append(text)
+        if not self._json:
+            return
+
+        if self._parser is None:
+            self._parser = JsonStreamParser(self.selector)
+        try:
+            self._parser.feed(text)
+        except ValueError:
+            self._json = False
+            self._parser = None
+
+    def _truncated_result(self) -> Any:
+        if self._parser is None:
+            return ''.join(self._text) + TRUNCATION_MARKER
+
+        result = self._parser.partial()
+        if isinstance(result, dict):
+            result[TRUNCATED_KEY] = True
+        elif isinstance(result, list):
+            result.append(TRUNCATION_MARKER)
+        elif result is None:
+            result = ''.join(self._text) + TRUNCATION_MARKER
+        return result
@@ -0,0 +1,99 @@
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+    overload,
+)
+
+if TYPE_CHECKING:
+    from .model import OpenApiTool
+
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+
+class Operation(NamedTuple):
+    position: int
+    method: str
+    path: str
+    operation_id: Optional[str] = None
+    tags: Sequence[str] = ()
+
+
+class _Tools:
+    def __init__(self, factory: Callable[[Operation], 'OpenApiTool']):
+        self.factory = factory
+        self.tools: Dict[int, 'OpenApiTool'] = {}
+        self.lock = threading.Lock()
+
+    def get(self, operation: Operation) -> 'OpenApiTool':
+        tool = self.tools.get(operation.position)
+        if tool is not None:
+            return tool
+
+        # Build outside of the lock, a tool built twice by racing threads is simply discarded
+        tool = self.factory(operation)
+        with self.lock:
+            return self.tools.setdefault(operation.position, tool)
+
+
+class ToolSet(Sequence['OpenApiTool']):
+    def __init__(self, operations: Iterable[Operation], factory: Callable[[Operation], 'OpenApiTool']):
+        self.operations = list(operations)
+        self._tools = _Tools(factory)
+
+    def filter(
+        self,
+        path_prefix: Optional[str] = None,
+        method: Optional[str] = None,
+        tag: Optional[str] = None,
+        operation_id: Optional[str] = None,
+        path: Optional[str] = None,
+    ) -> 'ToolSet':
+        operations = [
+            x
+            for x in self.operations
+            if (path_prefix is None or x.path.startswith(path_prefix))
+            and (method is None or x.method == method.lower())
+            and (tag is None or tag in x.tags)
+            and (operation_id is None or x.operation_id == operation_id)
+            and (path is None or x.path == path)
+        ]
+        return self._derive(operations)
+
+    def built(self) -> int:
+        return len([x for x in self.operations if x.position in self._tools.tools])
+
+    def _derive(self, operations: List[Operation]) -> 'ToolSet':
+        # Filtered sets share built tools with the original one
+        toolset = ToolSet.__new__(ToolSet)
+        toolset.operations = operations
+        toolset._tools = self._tools
+        return toolset
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    @overload
+    def __getitem__(self, index: int) -> 'OpenApiTool':
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'ToolSet':
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union['OpenApiTool', 'ToolSet']:
+        if isinstance(index, slice):
+            return self._derive(self.operations[index])
+        return self._tools.get(self.operations[index])
+
+    def __iter__(self) -> Iterator['OpenApiTool']:
+        for operation in self.operations:
+            yield self._tools.get(operation)
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+# Kinds of request bodies, in the order of preference when an operation accepts many media types
+JSON = 'json'
+FORM = 'form'
+MULTIPART = 'multipart'
+BINARY = 'binary'
+
+BODY_KINDS = (JSON, FORM, MULTIPART, BINARY)
+
+
+def body_kind(media_type: str) -> str:
+    media_type = media_type.split(';')[0].strip().lower()
+    if media_type == 'application/json' or media_type.endswith('+json'):
+        return JSON
+    if media_type == 'application/x-www-form-urlencoded':
+        return FORM
+    if media_type == 'multipart/form-data':
+        return MULTIPART
+    return BINARY
+
+
+def is_stream(value: Any) -> bool:
+    # Bytes, files and iterators are sent as they are, other values are encoded by the media type
+    return (
+        isinstance(value, (bytes, bytearray, memoryview))
+        or hasattr(value, 'read')
+        or isinstance(value, (Iterator, AsyncIterable))
+    )
+
+
+def encode_content(value: Any) -> Any:
+    # Streams are kept as they are, texts and other values of tool arguments are encoded to bytes
+    if is_stream(value):
+        return value
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+async def aiter_content(value: Any, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    # httpx.AsyncClient only streams async iterables. Files are read chunk by chunk in the default executor so that
+    # neither the whole file is buffered nor the event loop is blocked by disk reads.
+    if isinstance(value, AsyncIterable):
+        async for chunk in value:
+            yield _encode(chunk)
+    elif hasattr(value, 'read'):
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, value.read, chunk_size)
+            if not chunk:
+                break
+            yield _encode(chunk)
+    else:
+        for chunk in value:
+            yield _encode(chunk)
+
+
+def _encode(chunk: Any) -> bytes:
+    return chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
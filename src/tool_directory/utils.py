@@ -1,5 +1,25 @@
+import os
 import re
+import tempfile
 
 
 def convert_to_iso639(language: str):
     return re.sub(r'[-_].*', '', language)
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_atomic(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_file(tmp_path)
+        raise
@@ -1,5 +1,8 @@
 import os
 import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 import requests_mock as requests_mock_module
@@ -20,3 +23,51 @@ def requests_mock():
         pattern = re.compile(r'https://tool-directory.dialogplay.jp/.*')
         m.register_uri('GET', pattern, text=text_callback)
         yield m
+
+
+@pytest.fixture
+def http_server():
+    # Real servers for the retries of urllib3 and the connection errors, which requests_mock bypasses. A server answers
+    # every request with (status, headers, body) and keeps the bodies of the requests.
+    servers = []
+
+    def start(status=200, headers={}, body=b'{}'):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                server.bodies.append(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+            do_PUT = do_GET
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        server.requests = 0
+        server.bodies = []
+        server.url = f'http://127.0.0.1:{server.server_address[1]}'
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def closed_port_url():
+    # URL of a local port which refuses connections
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}'
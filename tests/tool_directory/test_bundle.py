@@ -0,0 +1,85 @@
+import pytest
+
+from tool_directory import bundle as bundle_module
+from tool_directory.bundle import Bundle, write_bundle
+from tool_directory.endpoint import Endpoint
+from tool_directory.exceptions import InvalidBundleException
+from tool_directory.loader import ToolLoader
+from tool_directory.schema import create_args_schema
+from tool_directory.toolset import Operation
+
+
+def describe_Bundle():
+    @pytest.fixture
+    def path(requests_mock, tmp_path):
+        path = str(tmp_path / 'sample.tdb')
+        ToolLoader('sample', language='ja').compile(path)
+        return path
+
+    def read_metadata(path):
+        bundle = Bundle(path)
+        assert bundle.name == 'sample'
+        assert bundle.language == 'ja'
+        assert bundle.description == 'dummy integration description'
+        assert bundle.servers == ['http://localhost/dummy']
+        assert len(bundle) == 3
+
+    def restore_endpoints(path):
+        endpoints = list(Bundle(path).endpoints())
+        assert [(x.method, x.path) for x in endpoints] == [
+            ('get', '/pets'),
+            ('post', '/pets'),
+            ('get', '/pets/{petId}'),
+        ]
+        assert endpoints[0].description == 'APIからダミーデータを取得する。'
+        assert endpoints[0].args_source == {'api_key': 'query', 'limit': 'query'}
+        assert endpoints[0].args_schema.schema().get('required') == ['api_key']
+        assert endpoints[2].args_schema.schema().get('properties').keys() == {'petId'}
+
+    def restore_request_body(tmp_path):
+        path = str(tmp_path / 'body.tdb')
+        endpoint = Endpoint(
+            method='put',
+            path='/pets',
+            description='Update a pet',
+            args_schema=create_args_schema([('id', True), ('name', True, 'any')]),
+            args_source={'id': 'query', 'name': 'body'},
+            body_type='application/json',
+        )
+        operation = Operation(position=0, method='put', path='/pets', operation_id=None, tags=())
+        write_bundle(path, 'body', 'en', 'description', ['http://localhost'], [operation], [endpoint])
+
+        assert Bundle(path).endpoint(0) == endpoint
+
+    def read_operations_without_records(path, monkeypatch):
+        bundle = Bundle(path)
+        monkeypatch.setattr(bundle, 'record', None)
+        operations = bundle.operations()
+        assert [(x.position, x.method, x.path, x.operation_id, x.tags) for x in operations] == [
+            (0, 'get', '/pets', 'listPets', ('pets',)),
+            (1, 'post', '/pets', 'createPets', ('pets',)),
+            (2, 'get', '/pets/{petId}', 'showPetById', ('pets',)),
+        ]
+
+    def memory_map_large_bundle(path, monkeypatch):
+        monkeypatch.setattr(bundle_module, 'MMAP_THRESHOLD', 0)
+        bundle = Bundle(path)
+        assert not isinstance(bundle._buffer, bytes)
+        assert bundle.endpoint(2).path == '/pets/{petId}'
+        bundle.close()
+
+    def reject_unknown_file(tmp_path):
+        path = tmp_path / 'unknown.tdb'
+        path.write_bytes(b'openapi: 3.0.0')
+        with pytest.raises(InvalidBundleException):
+            Bundle(str(path))
+
+    def reject_unsupported_version(tmp_path, monkeypatch):
+        path = str(tmp_path / 'future.tdb')
+        monkeypatch.setattr(bundle_module, 'BUNDLE_VERSION', 999)
+        write_bundle(path, name='future', language='en', description='', servers=[], operations=[], endpoints=[])
+        monkeypatch.undo()
+
+        with pytest.raises(InvalidBundleException) as excinfo:
+            Bundle(path)
+        assert 'Bundle version 999' in str(excinfo.value)
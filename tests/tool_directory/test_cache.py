@@ -0,0 +1,65 @@
+import os
+import time
+
+from tool_directory.cache import SpecCache
+
+
+def describe_SpecCache():
+    def describe_get():
+        def return_none_when_missing(tmp_path):
+            cache = SpecCache(directory=str(tmp_path))
+            assert cache.get('http://localhost/missing.yaml') is None
+
+        def return_stored_entry(tmp_path):
+            cache = SpecCache(directory=str(tmp_path))
+            cache.set('http://localhost/openapi.yaml', b'openapi: 3.0.0', etag='"v1"', last_modified='Wed, 08 May 2024')
+
+            entry = cache.get('http://localhost/openapi.yaml')
+            assert entry.content == b'openapi: 3.0.0'
+            assert entry.validators() == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 08 May 2024'}
+            assert entry.is_fresh(cache.ttl)
+            assert not entry.is_fresh(0)
+
+        def ignore_corrupted_blob(tmp_path):
+            cache = SpecCache(directory=str(tmp_path))
+            cache.set('http://localhost/openapi.yaml', b'openapi: 3.0.0')
+            for filename in os.listdir(tmp_path / 'blobs'):
+                (tmp_path / 'blobs' / filename).write_bytes(b'broken')
+
+            assert cache.get('http://localhost/openapi.yaml') is None
+
+    def describe_set():
+        def share_blob_for_same_content(tmp_path):
+            cache = SpecCache(directory=str(tmp_path))
+            cache.set('http://localhost/a.yaml', b'same content')
+            cache.set('http://localhost/b.yaml', b'same content')
+
+            assert len(os.listdir(tmp_path / 'blobs')) == 1
+            assert len(os.listdir(tmp_path / 'meta')) == 2
+
+        def evict_least_recently_used(tmp_path):
+            cache = SpecCache(directory=str(tmp_path), max_size=20)
+            cache.set('http://localhost/a.yaml', b'a' * 10)
+            cache.set('http://localhost/b.yaml', b'b' * 10)
+
+            # Make a.yaml older than b.yaml and then access it
+            past = time.time() - 60
+            for filename in os.listdir(tmp_path / 'meta'):
+                os.utime(tmp_path / 'meta' / filename, (past, past))
+            cache.get('http://localhost/a.yaml')
+
+            cache.set('http://localhost/c.yaml', b'c' * 10)
+
+            assert cache.get('http://localhost/a.yaml') is not None
+            assert cache.get('http://localhost/b.yaml') is None
+            assert cache.get('http://localhost/c.yaml') is not None
+            assert len(os.listdir(tmp_path / 'blobs')) == 2
+
+    def describe_clear():
+        def remove_all_entries(tmp_path):
+            cache = SpecCache(directory=str(tmp_path))
+            cache.set('http://localhost/a.yaml', b'a')
+            cache.clear()
+
+            assert cache.get('http://localhost/a.yaml') is None
+            assert os.listdir(tmp_path / 'blobs') == []
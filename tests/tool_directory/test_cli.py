@@ -0,0 +1,46 @@
+import pytest
+
+from tool_directory import ToolLoader
+from tool_directory.bundle import Bundle
+from tool_directory.cli import main
+from tool_directory.search import SearchIndex
+
+
+def describe_compile():
+    def write_bundle_of_integration(requests_mock, tmp_path, capsys):
+        output = str(tmp_path / 'sample.tdb')
+        main(['compile', 'sample', '--language', 'ja', '--output', output, '--cache-dir', str(tmp_path / 'cache')])
+
+        assert capsys.readouterr().out == f'Compiled sample into {output}\n'
+        bundle = Bundle(output)
+        assert bundle.language == 'ja'
+        assert len(bundle) == 3
+
+
+def describe_index():
+    def write_search_index(requests_mock, tmp_path, capsys):
+        output = str(tmp_path / 'directory.tdi')
+        main(['index', 'sample', 'refs', '-l', 'en', '-l', 'ja', '-o', output])
+
+        index = SearchIndex.load(output)
+        assert capsys.readouterr().out == f'Indexed {len(index)} documents into {output}\n'
+        assert {(x[0], x[1]) for x in index.documents} == {
+            ('sample', 'en'),
+            ('sample', 'ja'),
+            ('refs', 'en'),
+            ('refs', 'ja'),
+        }
+
+
+def describe_sync():
+    def mirror_integrations(requests_mock, tmp_path, capsys):
+        directory = str(tmp_path / 'mirror')
+        main(['sync', directory, 'sample', 'refs'])
+
+        assert capsys.readouterr().out == f'Synced 4 changed and 0 unchanged files into {directory}\n'
+        assert ToolLoader('refs', source=directory).spec['paths']
+
+    def exit_with_error(requests_mock, tmp_path, capsys):
+        with pytest.raises(SystemExit):
+            main(['sync', str(tmp_path), 'not_found'])
+        assert 'Failed to sync not_found' in capsys.readouterr().err
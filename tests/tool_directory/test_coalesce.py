@@ -0,0 +1,180 @@
+import asyncio
+import threading
+
+import pytest
+
+from tool_directory.coalesce import SingleFlight, default_single_flight
+
+
+def describe_SingleFlight():
+    def describe_do():
+        def return_result():
+            assert SingleFlight().do('key', lambda: 'result') == ('result', False)
+
+        def share_result_of_in_flight_call():
+            single_flight = SingleFlight()
+            started = threading.Event()
+            release = threading.Event()
+            calls = []
+            results = []
+
+            def call():
+                calls.append(None)
+                started.set()
+                release.wait(5)
+                return {'result': 'dummy'}
+
+            def run():
+                results.append(single_flight.do('key', call))
+
+            owner = threading.Thread(target=run)
+            owner.start()
+            started.wait(5)
+            waiters = [threading.Thread(target=run) for _ in range(3)]
+            for thread in waiters:
+                thread.start()
+            while single_flight.coalesced < 3:
+                pass
+            release.set()
+            for thread in [owner] + waiters:
+                thread.join()
+
+            assert len(calls) == 1
+            assert sorted(coalesced for _, coalesced in results) == [False, True, True, True]
+            assert all(result is results[0][0] for result, _ in results)
+
+        def share_exception():
+            single_flight = SingleFlight()
+            started = threading.Event()
+            release = threading.Event()
+            errors = []
+
+            def call():
+                started.set()
+                release.wait(5)
+                raise ValueError('dummy')
+
+            def run():
+                try:
+                    single_flight.do('key', call)
+                except ValueError as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=run)]
+            threads[0].start()
+            started.wait(5)
+            threads.append(threading.Thread(target=run))
+            threads[1].start()
+            while single_flight.coalesced < 1:
+                pass
+            release.set()
+            for thread in threads:
+                thread.join()
+
+            assert len(errors) == 2
+            assert errors[0] is errors[1]
+
+        def call_again_after_completion():
+            single_flight = SingleFlight()
+            single_flight.do('key', lambda: 1)
+            assert single_flight.do('key', lambda: 2) == (2, False)
+            assert single_flight.coalesced == 0
+
+    def describe_ado():
+        def share_result_of_in_flight_call():
+            single_flight = SingleFlight()
+            calls = []
+
+            async def call():
+                calls.append(None)
+                await asyncio.sleep(0.01)
+                return 'result'
+
+            async def run():
+                return await asyncio.gather(*[single_flight.ado('key', call) for _ in range(5)])
+
+            results = asyncio.run(run())
+            assert len(calls) == 1
+            assert [result for result, _ in results] == ['result'] * 5
+            assert [coalesced for _, coalesced in results] == [False, True, True, True, True]
+            assert single_flight.coalesced == 4
+
+        def share_exception():
+            single_flight = SingleFlight()
+
+            async def call():
+                await asyncio.sleep(0.01)
+                raise ValueError('dummy')
+
+            async def run():
+                return await asyncio.gather(*[single_flight.ado('key', call) for _ in range(2)], return_exceptions=True)
+
+            results = asyncio.run(run())
+            assert all(isinstance(result, ValueError) for result in results)
+
+        def not_coalesce_different_keys():
+            single_flight = SingleFlight()
+
+            async def run():
+                return await asyncio.gather(
+                    single_flight.ado('a', lambda: asyncio.sleep(0, 'a')),
+                    single_flight.ado('b', lambda: asyncio.sleep(0, 'b')),
+                )
+
+            assert asyncio.run(run()) == [('a', False), ('b', False)]
+
+        def take_over_call_of_cancelled_owner():
+            single_flight = SingleFlight()
+            calls = []
+
+            async def call():
+                calls.append(1)
+                await asyncio.sleep(0.05)
+                return len(calls)
+
+            async def run():
+                owner = asyncio.ensure_future(single_flight.ado('key', call))
+                await asyncio.sleep(0)
+                waiters = [asyncio.ensure_future(single_flight.ado('key', call)) for _ in range(2)]
+                await asyncio.sleep(0.01)
+                owner.cancel()
+                results = await asyncio.gather(*waiters)
+                return owner, results
+
+            owner, results = asyncio.run(run())
+            assert owner.cancelled()
+            # One of the waiters calls again and the other one shares its result
+            assert len(calls) == 2
+            assert sorted(coalesced for _, coalesced in results) == [False, True]
+            assert [result for result, _ in results] == [2, 2]
+
+        def keep_shared_call_when_waiter_is_cancelled():
+            single_flight = SingleFlight()
+
+            async def call():
+                await asyncio.sleep(0.05)
+                return 'result'
+
+            async def run():
+                owner = asyncio.ensure_future(single_flight.ado('key', call))
+                await asyncio.sleep(0)
+                waiter = asyncio.ensure_future(single_flight.ado('key', call))
+                await asyncio.sleep(0.01)
+                waiter.cancel()
+                return await owner, waiter
+
+            result, waiter = asyncio.run(run())
+            assert result == ('result', False)
+            assert waiter.cancelled()
+
+        def raise_error_of_owner():
+            async def call():
+                raise ValueError('dummy')
+
+            with pytest.raises(ValueError):
+                asyncio.run(SingleFlight().ado('key', call))
+
+
+def describe_default_single_flight():
+    def return_same_instance():
+        assert default_single_flight() is default_single_flight()
@@ -0,0 +1,125 @@
+from tool_directory.compiler import EndpointCompiler
+
+
+def describe_EndpointCompiler():
+    spec = {
+        'paths': {
+            '/stores/{storeId}': {
+                'parameters': [{'$ref': '#/components/parameters/StoreId'}, {'name': 'q', 'in': 'query'}],
+                'get': {
+                    'summary': 'Show a store',
+                    'security': [{'ApiKey': []}],
+                    'parameters': [
+                        {'$ref': '#/components/parameters/Limit'},
+                        {'name': 'q', 'in': 'query', 'required': True},
+                    ],
+                },
+            },
+            '/cycle': {'get': {'parameters': [{'$ref': '#/components/parameters/First'}]}},
+            '/external': {'get': {'parameters': [{'$ref': 'other.yaml#/Limit'}, {'$ref': '#/components/none'}]}},
+        },
+        'components': {
+            'parameters': {
+                'StoreId': {'name': 'storeId', 'in': 'path', 'required': True},
+                'Limit': {'$ref': '#/components/parameters/Default~1Limit'},
+                'Default/Limit': {'name': 'limit', 'in': 'query'},
+                'First': {'$ref': '#/components/parameters/Second'},
+                'Second': {'$ref': '#/components/parameters/First'},
+            },
+            'securitySchemes': {
+                'ApiKey': {'type': 'apiKey', 'in': 'header', 'name': 'X-Api-Key', 'description': 'API key'},
+            },
+        },
+    }
+
+    def describe_compile():
+        def merge_path_and_operation_parameters():
+            endpoint = EndpointCompiler(spec).compile('/stores/{storeId}', 'get')
+            assert endpoint.method == 'get'
+            assert endpoint.path == '/stores/{storeId}'
+            assert endpoint.description == 'Show a store'
+            assert endpoint.args_source == {'storeId': 'path', 'q': 'query', 'limit': 'query', 'X-Api-Key': 'header'}
+            assert endpoint.args_schema.schema().get('required') == ['storeId', 'q']
+
+        def skip_unresolvable_parameters():
+            assert EndpointCompiler(spec).compile('/cycle', 'get').args_source == {}
+            assert EndpointCompiler(spec).compile('/external', 'get').args_source == {}
+
+        def describe_request_body():
+            def _compile(request_body, parameters=[]):
+                operation = {'parameters': parameters, 'requestBody': request_body}
+                return EndpointCompiler({'paths': {'/pets': {'put': operation}}}).compile('/pets', 'put')
+
+            def route_properties_of_object_body():
+                pet = {'type': 'object', 'required': ['name'], 'properties': {'name': {}, 'tag': {}, 'limit': {}}}
+                endpoint = EndpointCompiler(
+                    {
+                        'paths': {
+                            '/pets': {
+                                'put': {
+                                    'parameters': [{'name': 'limit', 'in': 'query'}],
+                                    'requestBody': {
+                                        'required': True,
+                                        'content': {
+                                            'application/octet-stream': {},
+                                            'application/json': {'schema': {'$ref': '#/components/schemas/Pet'}},
+                                        },
+                                    },
+                                }
+                            }
+                        },
+                        'components': {'schemas': {'Pet': pet}},
+                    }
+                ).compile('/pets', 'put')
+                assert endpoint.body_type == 'application/json'
+                assert endpoint.args_source == {'limit': 'query', 'name': 'body', 'tag': 'body'}
+                assert endpoint.args_schema.schema().get('required') == ['name']
+
+            def prefer_form_over_binary():
+                endpoint = _compile(
+                    {
+                        'content': {
+                            'image/png': {},
+                            'application/x-www-form-urlencoded': {'schema': {'properties': {'name': {}}}},
+                        }
+                    }
+                )
+                assert endpoint.body_type == 'application/x-www-form-urlencoded'
+                assert endpoint.args_source == {'name': 'body'}
+                assert endpoint.args_schema.schema().get('required') is None
+
+            def take_whole_body_as_argument():
+                endpoint = _compile({'required': True, 'content': {'image/png': {'schema': {'format': 'binary'}}}})
+                assert endpoint.body_type == 'image/png'
+                assert endpoint.args_source == {'body': 'content'}
+                assert endpoint.args_schema.schema().get('required') == ['body']
+
+                endpoint = _compile({'content': {'application/json': {'schema': {'type': 'array'}}}})
+                assert endpoint.args_source == {'body': 'content'}
+                assert endpoint.args_schema.schema().get('required') is None
+
+            def ignore_request_body_without_content():
+                assert _compile({'description': 'no content'}).body_type is None
+
+    def describe_resolve():
+        def resolve_nested_reference():
+            compiler = EndpointCompiler(spec)
+            resolved = compiler.resolve({'$ref': '#/components/parameters/Limit'})
+            assert resolved is spec['components']['parameters']['Default/Limit']
+
+        def memoize_reference():
+            compiler = EndpointCompiler(spec)
+            compiler.resolve({'$ref': '#/components/parameters/StoreId'})
+            compiler.spec = {}
+            assert compiler.resolve({'$ref': '#/components/parameters/StoreId'}) == {
+                'name': 'storeId',
+                'in': 'path',
+                'required': True,
+            }
+
+        def return_value_without_reference():
+            value = {'name': 'limit'}
+            assert EndpointCompiler(spec).resolve(value) is value
+
+        def return_none_for_circular_reference():
+            assert EndpointCompiler(spec).resolve({'$ref': '#/components/parameters/First'}) is None
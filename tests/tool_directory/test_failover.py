@@ -0,0 +1,83 @@
+import io
+import time
+
+import httpx
+import pytest
+import requests
+
+from tool_directory.exceptions import DeadlineExceededException
+from tool_directory.failover import HedgePolicy, can_fail_over, remaining
+
+
+def describe_HedgePolicy():
+    def wait_initial_delay_without_samples():
+        policy = HedgePolicy(initial_delay=0.5, min_samples=3)
+        policy.record('get /pets', 0.1)
+        assert policy.delay('get /pets') == 0.5
+        assert policy.delay('get /stores') == 0.5
+        policy.close()
+
+    def take_percentile_of_recent_latencies():
+        policy = HedgePolicy(percentile=90, min_samples=10, window=100)
+        for i in range(200):
+            policy.record('get /pets', i / 1000)
+        # Only the latest 100 samples (0.100 to 0.199) are kept
+        assert policy.delay('get /pets') == 0.19
+        policy.close()
+
+    def keep_minimum_delay():
+        policy = HedgePolicy(min_samples=1, min_delay=0.05)
+        policy.record('get /pets', 0.001)
+        assert policy.delay('get /pets') == 0.05
+        policy.close()
+
+    def submit_only_to_free_workers():
+        policy = HedgePolicy(max_workers=1)
+        busy = policy.submit(time.sleep, 0.1)
+        assert busy is not None
+        assert policy.submit(time.sleep, 0) is None
+        busy.result()
+        assert policy.submit(time.sleep, 0).result() is None
+        policy.close()
+
+
+def describe_can_fail_over():
+    def _http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    def fail_over_unavailable_servers():
+        assert can_fail_over('get', {}, _http_error(503))
+        assert not can_fail_over('get', {}, _http_error(500))
+        assert not can_fail_over('get', {}, _http_error(404))
+        assert not can_fail_over('post', {}, _http_error(503))
+
+    def fail_over_requests_not_sent():
+        assert can_fail_over('post', {}, requests.ConnectTimeout())
+        assert not can_fail_over('post', {}, requests.ReadTimeout())
+        assert can_fail_over('put', {}, requests.ReadTimeout())
+        assert can_fail_over('post', {}, DeadlineExceededException())
+        request = httpx.Request('POST', 'http://localhost')
+        assert can_fail_over('post', {}, httpx.ConnectError('refused', request=request))
+        assert not can_fail_over('post', {}, httpx.ReadTimeout('timeout', request=request))
+        assert can_fail_over('delete', {}, httpx.ReadTimeout('timeout', request=request))
+
+    def keep_streamed_body():
+        assert can_fail_over('put', {'content': b'bytes'}, requests.ConnectTimeout())
+        assert not can_fail_over('put', {'content': iter([b'chunk'])}, requests.ConnectTimeout())
+        upload = io.BytesIO(b'file')
+        assert not can_fail_over('put', {'files': {'file': upload}}, requests.ConnectTimeout())
+        assert not can_fail_over('put', {'data': upload}, requests.ConnectTimeout())
+        assert can_fail_over('put', {'files': {'name': (None, 'dummy')}}, requests.ConnectTimeout())
+        assert can_fail_over('put', {'data': {'name': 'dummy'}}, requests.ConnectTimeout())
+
+    def keep_other_errors():
+        assert not can_fail_over('get', {}, ValueError())
+
+
+def test_remaining():
+    assert remaining(None) is None
+    assert 0 < remaining(time.monotonic() + 1) <= 1
+    with pytest.raises(DeadlineExceededException):
+        remaining(time.monotonic())
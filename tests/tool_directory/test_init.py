@@ -0,0 +1,57 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+import tool_directory
+
+# Budget of `import tool_directory` in microseconds measured by -X importtime, generous for slow CI machines
+IMPORT_BUDGET = 50_000
+
+HEAVY_MODULES = ['langchain', 'langchain_core', 'pydantic', 'requests', 'httpx', 'yaml']
+
+
+def _imported_modules(statement):
+    code = f'import sys; {statement}; print(" ".join(sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return set(output.split())
+
+
+def _import_time(module):
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'], check=True, capture_output=True, text=True
+    ).stderr
+    match = re.search(rf'^import time:\s+\d+ \|\s+(\d+) \| {re.escape(module)}$', output, re.MULTILINE)
+    return int(match.group(1))
+
+
+def describe_lazy_import():
+    def not_import_heavy_dependencies():
+        modules = _imported_modules('import tool_directory')
+        assert [x for x in HEAVY_MODULES if x in modules] == []
+
+    def not_import_langchain_for_loader():
+        modules = _imported_modules('from tool_directory import ToolLoader')
+        assert 'tool_directory.loader' in modules
+        assert 'langchain' not in modules
+        assert 'httpx' not in modules
+
+    def not_import_dependencies_for_cli():
+        modules = _imported_modules('from tool_directory.cli import create_parser; create_parser()')
+        assert [x for x in HEAVY_MODULES if x in modules] == []
+
+    def resolve_attributes():
+        from tool_directory.loader import ToolLoader
+        from tool_directory.model import OpenApiTool
+
+        assert tool_directory.ToolLoader is ToolLoader
+        assert tool_directory.OpenApiTool is OpenApiTool
+        assert {'ToolLoader', 'OpenApiTool'} <= set(dir(tool_directory))
+
+    def raise_error_for_unknown_attribute():
+        with pytest.raises(AttributeError):
+            tool_directory.unknown
+
+    def import_within_budget():
+        assert min(_import_time('tool_directory') for _ in range(3)) < IMPORT_BUDGET
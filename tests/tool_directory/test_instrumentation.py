@@ -0,0 +1,140 @@
+import pytest
+
+from tool_directory import ToolLoader
+from tool_directory.instrumentation import (
+    BUILD,
+    CALL,
+    COALESCE,
+    FAILOVER,
+    FETCH,
+    HEDGE,
+    PARSE,
+    Counter,
+    Event,
+    Histogram,
+    Instrumentation,
+    MetricsRegistry,
+    measure,
+)
+
+
+def describe_Instrumentation():
+    def emit_event_with_elapsed_time():
+        events = []
+        instrumentation = Instrumentation(events.append)
+        with instrumentation.measure(FETCH, integration='sample') as event:
+            event.bytes = 10
+
+        assert len(events) == 1
+        assert events[0].kind == FETCH
+        assert events[0].labels == {'integration': 'sample'}
+        assert events[0].bytes == 10
+        assert events[0].seconds >= 0
+        assert events[0].error is None
+
+    def emit_event_with_error():
+        events = []
+        instrumentation = Instrumentation()
+        instrumentation.add(events.append)
+        with pytest.raises(ValueError):
+            with instrumentation.measure(PARSE):
+                raise ValueError('dummy')
+
+        assert isinstance(events[0].error, ValueError)
+
+    def ignore_failing_callback():
+        events = []
+
+        def fail(event):
+            raise RuntimeError('dummy')
+
+        instrumentation = Instrumentation(fail, events.append)
+        with instrumentation.measure(BUILD):
+            pass
+        assert len(events) == 1
+
+    def measure_without_instrumentation():
+        with measure(None, CALL, method='get') as event:
+            event.status = 200
+        assert event.labels == {'method': 'get'}
+
+
+def describe_Counter():
+    def expose_values():
+        counter = Counter('requests_total', 'Requests.', ('path',))
+        counter.inc({'path': '/pets'})
+        counter.inc({'path': '/pets'}, 2)
+        counter.inc({'path': '/a"b'})
+
+        assert counter.value({'path': '/pets'}) == 3
+        assert counter.expose() == [
+            '# HELP requests_total Requests.',
+            '# TYPE requests_total counter',
+            'requests_total{path="/a\\"b"} 1',
+            'requests_total{path="/pets"} 3',
+        ]
+
+
+def describe_Histogram():
+    def expose_cumulative_buckets():
+        histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(2)
+
+        assert histogram.count() == 4
+        assert histogram.expose() == [
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            'latency_seconds_sum 2.65',
+            'latency_seconds_count 4',
+        ]
+
+
+def describe_MetricsRegistry():
+    def record_call_events():
+        registry = MetricsRegistry()
+        labels = {'integration': 'sample', 'method': 'get', 'path': '/pets'}
+        registry(Event(kind=CALL, seconds=0.2, labels=labels, bytes=100, status=200, retries=2))
+        registry(Event(kind=CALL, seconds=0.3, labels=labels, error=ValueError()))
+
+        assert registry.call_seconds.count(labels) == 2
+        assert registry.calls.value(dict(labels, status='200')) == 1
+        assert registry.calls.value(dict(labels, status='error')) == 1
+        assert registry.call_retries.value(labels) == 2
+        assert registry.response_bytes.value(labels) == 100
+
+    def record_coalesced_calls():
+        registry = MetricsRegistry()
+        labels = {'integration': 'sample', 'method': 'get', 'path': '/pets'}
+        registry(Event(kind=COALESCE, seconds=0.1, labels=labels))
+        assert registry.coalesced_calls.value(labels) == 1
+
+    def record_failovers_and_hedged_calls():
+        registry = MetricsRegistry()
+        labels = {'integration': 'sample', 'method': 'get', 'path': '/pets'}
+        registry(Event(kind=FAILOVER, seconds=0, labels=labels))
+        registry(Event(kind=HEDGE, seconds=0, labels=labels))
+        registry(Event(kind=HEDGE, seconds=0, labels=labels))
+        assert registry.failovers.value(labels) == 1
+        assert registry.hedged_calls.value(labels) == 2
+
+    def expose_metrics_of_loader(requests_mock):
+        registry = MetricsRegistry()
+        loader = ToolLoader('sample', instrumentation=Instrumentation(registry))
+        loader.get_tools()
+
+        labels = {'integration': 'sample', 'document': 'openapi'}
+        assert registry.fetch_seconds.count(labels) == 1
+        assert registry.fetch_bytes.value(labels) > 0
+        assert registry.parse_seconds.count(labels) == 1
+        assert registry.build_seconds.count({'integration': 'sample'}) == len(loader.get_operations())
+
+        exposition = registry.exposition()
+        assert '# TYPE tool_directory_fetch_seconds histogram' in exposition
+        assert 'tool_directory_fetch_seconds_count{integration="sample",document="integration"} 1' in exposition
+        assert exposition.endswith('\n')
@@ -1,7 +1,20 @@
+import copy
+import gc
+import json
+import pathlib
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+import requests
+import yaml
 
 from tool_directory import OpenApiTool, ToolLoader
+from tool_directory.cache import SpecCache
 from tool_directory.exceptions import ToolNotFoundException
+from tool_directory.failover import HedgePolicy
+from tool_directory.session import AsyncSessionPool, SessionPool
+from tool_directory.toolset import ToolSet
 
 
 def describe_ToolLoader():
@@ -16,6 +29,10 @@ def describe_ToolLoader():
             assert loader.spec['paths']['/pets']['get']['description'] == 'APIからダミーデータを取得する。'
             assert loader.spec['paths']['/pets']['post']['description'] == 'Create a pet'
 
+        def keep_raw_spec(requests_mock):
+            loader = ToolLoader('sample', language='ja')
+            assert loader.raw_spec['paths']['/pets']['get']['description'] == 'List all pets'
+
         def not_found(requests_mock):
             with pytest.raises(ToolNotFoundException) as excinfo:
                 ToolLoader('not_found')
@@ -26,7 +43,191 @@ def describe_ToolLoader():
                 ' not found in tool directory.'
             )
 
+        def load_json_spec(requests_mock):
+            openapi_url = 'https://tool-directory.dialogplay.jp/integrations/sample/openapi.yaml'
+            spec = yaml.safe_load(open('tests/fixtures/integrations/sample/openapi.yaml', 'rb'))
+            requests_mock.get(openapi_url, text=json.dumps(spec), headers={'Content-Type': 'application/json'})
+
+            loader = ToolLoader('sample')
+            assert loader.spec['paths']['/pets']['get']['description'] == 'Retrieves dummy data from api.'
+
+        def load_with_specified_parser(requests_mock):
+            loader = ToolLoader('sample', parser='pure-yaml')
+            assert loader.parser.name == 'pure-yaml'
+            assert loader.spec['paths']['/pets']['get']['description'] == 'Retrieves dummy data from api.'
+
+        def describe_with_source():
+            def load_from_local_directory():
+                loader = ToolLoader('sample', language='ja', source='tests/fixtures')
+                assert loader.source.startswith('file:///')
+                assert loader.spec['paths']['/pets']['get']['description'] == 'APIからダミーデータを取得する。'
+
+            def load_from_file_url(tmp_path):
+                source = pathlib.Path('tests/fixtures').resolve().as_uri()
+                loader = ToolLoader('shared_spec', source=source, cache=SpecCache(directory=str(tmp_path)))
+                assert loader.spec['paths']['/pets']['get']['description'] == 'Retrieves shared data from api.'
+                assert list(tmp_path.glob('meta/*')) == []
+
+            def load_from_http_url(requests_mock):
+                requests_mock.get('http://localhost/directory/integrations/sample/integration.yaml', text='openApi: x')
+                requests_mock.get('http://localhost/directory/integrations/sample/x', text='paths: {}')
+                loader = ToolLoader('sample', source='http://localhost/directory/')
+                assert loader.raw_spec == {'paths': {}}
+
+            def load_from_environment_variable(monkeypatch):
+                monkeypatch.setenv('TOOL_DIRECTORY_SOURCE', 'tests/fixtures')
+                assert ToolLoader('sample').spec['paths']['/pets']['post']['description'] == 'Create a pet'
+
+            def not_found_in_local_directory():
+                with pytest.raises(ToolNotFoundException):
+                    ToolLoader('not_found', source='tests/fixtures')
+
+        def describe_with_cache():
+            integration_url = 'https://tool-directory.dialogplay.jp/integrations/sample/integration.yaml'
+            openapi_url = 'https://tool-directory.dialogplay.jp/integrations/sample/openapi.yaml'
+
+            def reuse_fresh_cache(requests_mock, tmp_path):
+                cache = SpecCache(directory=str(tmp_path))
+                ToolLoader('sample', cache=cache)
+                assert len(requests_mock.request_history) == 2
+
+                loader = ToolLoader('sample', cache=cache)
+                assert len(requests_mock.request_history) == 2
+                assert loader.spec['paths']['/pets']['get']['description'] == 'Retrieves dummy data from api.'
+
+            def revalidate_expired_cache(requests_mock, tmp_path):
+                cache = SpecCache(directory=str(tmp_path), ttl=0)
+                content = open('tests/fixtures/integrations/sample/openapi.yaml', 'rb').read()
+                requests_mock.get(
+                    openapi_url,
+                    [
+                        {'content': content, 'headers': {'ETag': '"v1"', 'Last-Modified': 'Wed, 08 May 2024'}},
+                        {'status_code': 304},
+                    ],
+                )
+
+                ToolLoader('sample', cache=cache)
+                loader = ToolLoader('sample', cache=cache)
+
+                history = [x for x in requests_mock.request_history if x.url == openapi_url]
+                assert len(history) == 2
+                assert 'If-None-Match' not in history[0].headers
+                assert history[1].headers['If-None-Match'] == '"v1"'
+                assert history[1].headers['If-Modified-Since'] == 'Wed, 08 May 2024'
+                assert loader.spec['paths']['/pets']['post']['description'] == 'Create a pet'
+
+            def fallback_to_cache_when_unreachable(requests_mock, tmp_path):
+                cache = SpecCache(directory=str(tmp_path), ttl=0)
+                ToolLoader('sample', cache=cache)
+
+                requests_mock.get(integration_url, exc=requests.exceptions.ConnectionError)
+                requests_mock.get(openapi_url, status_code=503)
+                loader = ToolLoader('sample', cache=cache)
+                assert loader.spec['paths']['/pets']['get']['description'] == 'Retrieves dummy data from api.'
+
+            def raise_error_without_cache_when_unreachable(requests_mock, tmp_path):
+                cache = SpecCache(directory=str(tmp_path))
+                requests_mock.get(integration_url, exc=requests.exceptions.ConnectionError)
+
+                with pytest.raises(requests.exceptions.ConnectionError):
+                    ToolLoader('sample', cache=cache)
+
+            def not_found_with_cache(requests_mock, tmp_path):
+                with pytest.raises(ToolNotFoundException):
+                    ToolLoader('not_found', cache=SpecCache(directory=str(tmp_path)))
+
+    def describe_for_language():
+        def serve_languages_from_one_fetch(requests_mock):
+            loader = ToolLoader('sample')
+            japanese = loader.for_language('ja')
+            assert len(requests_mock.request_history) == 2
+
+            assert japanese.language == 'ja'
+            assert japanese.raw_spec is loader.raw_spec
+            assert japanese.spec['paths']['/pets']['get']['description'] == 'APIからダミーデータを取得する。'
+            assert loader.spec['paths']['/pets']['get']['description'] == 'Retrieves dummy data from api.'
+
+            assert japanese.get_tools()[0].endpoint.description == 'APIからダミーデータを取得する。'
+            assert loader.get_tools()[0].endpoint.description == 'Retrieves dummy data from api.'
+
+        def cache_loader_per_language(requests_mock):
+            loader = ToolLoader('sample')
+            assert loader.for_language('en') is loader
+            assert loader.for_language('ja') is loader.for_language('ja-JP')
+            assert loader.for_language('ja').for_language('en') is loader
+
+        def serve_languages_concurrently(requests_mock):
+            loader = ToolLoader('sample')
+            raw_spec = copy.deepcopy(loader.raw_spec)
+
+            def describe(language):
+                return language, loader.for_language(language).get_tools()[0].endpoint.description
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                descriptions = set(executor.map(describe, ['en', 'ja'] * 16))
+
+            assert descriptions == {('en', 'Retrieves dummy data from api.'), ('ja', 'APIからダミーデータを取得する。')}
+            assert loader.raw_spec == raw_spec
+
+        def reject_other_language_of_bundle(requests_mock, tmp_path):
+            path = str(tmp_path / 'sample.tdb')
+            ToolLoader('sample').compile(path)
+            loader = ToolLoader.from_bundle(path)
+
+            assert loader.for_language('en') is loader
+            with pytest.raises(ValueError):
+                loader.for_language('ja')
+
     def describe_get_tools():
+        def keep_tools_compact(requests_mock):
+            # 200 endpoints sharing a long integration description
+            directory = 'http://localhost/directory/integrations/large'
+            description = 'Large integration. ' * 50
+            paths = {
+                f'/items{i}/{{id}}': {'get': {'description': f'Get item {i}', 'parameters': []}} for i in range(200)
+            }
+            for path in paths:
+                paths[path]['get']['parameters'] = [{'in': 'path', 'name': 'id', 'required': True}]
+            spec = {'servers': [{'url': 'http://localhost/large'}], 'paths': paths}
+            requests_mock.get(
+                f'{directory}/integration.yaml',
+                text=json.dumps({'openApi': 'openapi.json', 'description': description}),
+            )
+            requests_mock.get(f'{directory}/openapi.json', text=json.dumps(spec))
+            loader = ToolLoader('large', source='http://localhost/directory')
+            loader.get_tools()
+
+            gc.collect()
+            tracemalloc.start()
+            try:
+                tools = loader.get_tools(parameters={'api_key': 'dummy'})
+                size = tracemalloc.get_traced_memory()[0] / len(tools)
+            finally:
+                tracemalloc.stop()
+
+            assert size < 3000
+            assert all(tool.integration is tools[0].integration for tool in tools)
+            assert tools[199].description.startswith(f'Description: {description}')
+
+        def fail_over_across_servers(requests_mock):
+            directory = 'http://localhost/directory/integrations/mirrored'
+            spec = {
+                'servers': [{'url': 'http://primary/api'}, {'url': 'http://secondary/api'}],
+                'paths': {'/items': {'get': {'description': 'List items'}}},
+            }
+            requests_mock.get(f'{directory}/integration.yaml', text=json.dumps({'openApi': 'openapi.json'}))
+            requests_mock.get(f'{directory}/openapi.json', text=json.dumps(spec))
+            requests_mock.get('http://primary/api/items', exc=requests.ConnectionError)
+            requests_mock.get('http://secondary/api/items', text='{"items": []}')
+
+            hedge = HedgePolicy()
+            tool = ToolLoader('mirrored', source='http://localhost/directory').get_tools(deadline=10, hedge=hedge)[0]
+            assert tool.name == 'GET http://primary/api/items'
+            assert tool.integration.servers == ('http://primary/api', 'http://secondary/api')
+            assert (tool.deadline, tool.hedge) == (10, hedge)
+            assert tool.request_by_spec() == {'items': []}
+            hedge.close()
+
         def return_tools_from_endpoints(requests_mock):
             loader = ToolLoader('sample')
             tools = loader.get_tools(parameters={'api_key': 'dummy'})
@@ -86,6 +287,62 @@ def describe_ToolLoader():
             assert tools[1].args_schema.schema().get('required', []) == []
             assert tools[2].args_schema.schema().get('required', []) == ['petId']
 
+        def share_session_between_tools(requests_mock):
+            session = SessionPool()
+            async_session = AsyncSessionPool()
+            tools = ToolLoader('sample').get_tools(session=session, async_session=async_session)
+            assert all(tool.session is session for tool in tools)
+            assert all(tool.async_session is async_session for tool in tools)
+
+        def configure_response_readers(requests_mock):
+            tools = ToolLoader('sample').get_tools(
+                max_response_bytes=1024, projections={'listPets': ['id', 'name'], 'GET /pets/{petId}': ['name']}
+            )
+            assert tools[0].response_reader.fields == ['id', 'name']
+            assert tools[1].response_reader.fields is None
+            assert tools[2].response_reader.fields == ['name']
+            assert all(tool.response_reader.max_bytes == 1024 for tool in tools)
+
+            assert ToolLoader('sample').get_tools()[1].response_reader is None
+
+        def share_args_schema_between_loaders(requests_mock):
+            first = ToolLoader('sample').get_tools()
+            second = ToolLoader('sample', language='ja').get_tools()
+            assert [tool.args_schema for tool in first] == [tool.args_schema for tool in second]
+
+        def resolve_shared_parameters(requests_mock):
+            tools = ToolLoader('refs').get_tools()
+            assert [tool.name for tool in tools] == [
+                'GET http://localhost/refs/stores/:storeId/pets',
+                'POST http://localhost/refs/stores/:storeId/pets',
+                'GET http://localhost/refs/pets',
+            ]
+            assert tools[0].endpoint.args_source == {'storeId': 'path', 'limit': 'query'}
+            assert tools[0].args_schema.schema().get('required') == ['storeId', 'limit']
+            assert tools[1].endpoint.args_source == {'storeId': 'path', 'limit': 'query'}
+            assert tools[1].args_schema.schema().get('required') == ['storeId']
+            assert tools[2].endpoint.description == 'List all pets'
+            assert tools[2].endpoint.args_source == {'limit': 'query'}
+
+        def return_lazy_toolset(requests_mock):
+            tools = ToolLoader('sample').get_tools(parameters={'api_key': 'dummy'}, lazy=True)
+            assert isinstance(tools, ToolSet)
+            assert len(tools) == 3
+            assert tools.built() == 0
+
+            filtered = tools.filter(path_prefix='/pets/', method='get')
+            assert [tool.name for tool in filtered] == ['GET http://localhost/dummy/pets/:petId']
+            assert filtered[0].endpoint.args_source == {'petId': 'path'}
+            assert filtered[0].parameters == {'api_key': 'dummy'}
+            assert tools.built() == 1
+
+        def return_lazy_toolset_from_bundle(requests_mock, tmp_path):
+            path = str(tmp_path / 'sample.tdb')
+            ToolLoader('sample').compile(path)
+
+            tools = ToolLoader.from_bundle(path).get_tools(lazy=True).filter(operation_id='createPets')
+            assert [tool.name for tool in tools] == ['POST http://localhost/dummy/pets']
+
         def handle_security_schemes(requests_mock):
             loader = ToolLoader('security_schemes')
             tools = loader.get_tools()
@@ -118,3 +375,77 @@ def describe_ToolLoader():
                 'area',
                 'language',
             }
+
+    def describe_from_bundle():
+        def restore_tools_without_fetch(requests_mock, tmp_path):
+            path = str(tmp_path / 'sample.tdb')
+            expected = ToolLoader('sample').get_tools(parameters={'api_key': 'dummy'})
+            ToolLoader('sample').compile(path)
+            requests_mock.reset_mock()
+
+            loader = ToolLoader.from_bundle(path)
+            tools = loader.get_tools(parameters={'api_key': 'dummy'})
+            assert len(requests_mock.request_history) == 0
+
+            assert [tool.name for tool in tools] == [tool.name for tool in expected]
+            assert [tool.description for tool in tools] == [tool.description for tool in expected]
+            assert [tool.endpoint.args_source for tool in tools] == [tool.endpoint.args_source for tool in expected]
+            assert [tool.args_schema.schema() for tool in tools] == [tool.args_schema.schema() for tool in expected]
+            assert tools[0].parameters == {'api_key': 'dummy'}
+
+    def describe_load_many():
+        def load_tools_from_integrations(requests_mock):
+            result = ToolLoader.load_many(
+                ['sample', ('security_schemes', 'ja')],
+                parameters={'sample': {'api_key': 'dummy'}},
+            )
+            assert result.errors == {}
+            assert len(result.tools) == 5
+            assert [tool.name for tool in result.tools[:3]] == [
+                'GET http://localhost/dummy/pets',
+                'POST http://localhost/dummy/pets',
+                'GET http://localhost/dummy/pets/:petId',
+            ]
+            assert result.tools[0].parameters == {'api_key': 'dummy'}
+            assert result.tools[3].parameters == {}
+
+        def pass_options_to_tools(requests_mock):
+            hedge = HedgePolicy()
+            session = SessionPool()
+            result = ToolLoader.load_many(
+                ['sample'],
+                session=session,
+                deadline=5,
+                hedge=hedge,
+                projections={'GET /pets': ['name']},
+            )
+            tool = result.tools[0]
+            assert (tool.session, tool.deadline, tool.hedge) == (session, 5, hedge)
+            assert tool.response_reader.fields == ['name']
+            assert result.tools[1].response_reader is None
+            hedge.close()
+
+        def collect_errors_per_integration(requests_mock):
+            result = ToolLoader.load_many(['not_found', 'sample'])
+            assert len(result.tools) == 3
+            assert list(result.errors.keys()) == ['not_found']
+            assert isinstance(result.errors['not_found'], ToolNotFoundException)
+
+        def fetch_shared_openapi_spec_once(requests_mock):
+            result = ToolLoader.load_many(['sample', 'shared_spec', ('sample', 'ja')])
+            assert result.errors == {}
+
+            openapi_url = 'https://tool-directory.dialogplay.jp/integrations/sample/openapi.yaml'
+            integration_url = 'https://tool-directory.dialogplay.jp/integrations/sample/integration.yaml'
+            assert len([x for x in requests_mock.request_history if x.url == openapi_url]) == 1
+            assert len([x for x in requests_mock.request_history if x.url == integration_url]) == 1
+
+            descriptions = [tool.endpoint.description for tool in result.tools if tool.name.endswith('/pets')]
+            assert descriptions == [
+                'Retrieves dummy data from api.',
+                'Create a pet',
+                'Retrieves shared data from api.',
+                'Create a pet',
+                'APIからダミーデータを取得する。',
+                'Create a pet',
+            ]
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from tool_directory import ToolLoader
+from tool_directory.mirror import MANIFEST, Mirror
+
+ENDPOINT = 'https://tool-directory.dialogplay.jp'
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return tmp_path / 'mirror'
+
+
+def describe_Mirror():
+    def mirror_integrations(requests_mock, directory):
+        result = Mirror(str(directory)).sync(['sample', 'shared_spec'])
+
+        assert sorted(set(result.downloaded)) == [
+            'integrations/sample/integration.yaml',
+            'integrations/sample/openapi.yaml',
+            'integrations/shared_spec/integration.yaml',
+        ]
+        assert result.errors == {}
+        content = open('tests/fixtures/integrations/sample/openapi.yaml', 'rb').read()
+        assert (directory / 'integrations' / 'sample' / 'openapi.yaml').read_bytes() == content
+        assert 'integrations/sample/openapi.yaml' in json.loads((directory / MANIFEST).read_text())
+
+    def load_from_mirror_without_requests(requests_mock, directory):
+        Mirror(str(directory)).sync(['sample'])
+        count = requests_mock.call_count
+
+        loader = ToolLoader('sample', language='ja', source=str(directory))
+        assert loader.spec['paths']['/pets']['get']['description'] == 'APIからダミーデータを取得する。'
+        assert requests_mock.call_count == count
+
+    def skip_unchanged_files(requests_mock, directory):
+        Mirror(str(directory)).sync(['sample'])
+        result = Mirror(str(directory)).sync(['sample'])
+        assert result.downloaded == []
+        assert sorted(result.unchanged) == ['integrations/sample/integration.yaml', 'integrations/sample/openapi.yaml']
+
+    def download_conditionally(requests_mock, directory):
+        url = f'{ENDPOINT}/integrations/sample/integration.yaml'
+        content = open('tests/fixtures/integrations/sample/integration.yaml', 'rb').read()
+        requests_mock.get(url, [{'content': content, 'headers': {'ETag': '"v1"'}}, {'status_code': 304}])
+
+        Mirror(str(directory)).sync(['sample'])
+        result = Mirror(str(directory)).sync(['sample'])
+
+        history = [x for x in requests_mock.request_history if x.url == url]
+        assert history[1].headers['If-None-Match'] == '"v1"'
+        assert 'integrations/sample/integration.yaml' in result.unchanged
+        assert (directory / 'integrations' / 'sample' / 'integration.yaml').read_bytes() == content
+
+    def replace_changed_files(requests_mock, directory):
+        Mirror(str(directory)).sync(['sample'])
+        requests_mock.get(f'{ENDPOINT}/integrations/sample/openapi.yaml', text='paths: {}')
+
+        result = Mirror(str(directory)).sync(['sample'])
+        assert result.downloaded == ['integrations/sample/openapi.yaml']
+        assert (directory / 'integrations' / 'sample' / 'openapi.yaml').read_text() == 'paths: {}'
+        assert not list(directory.glob('**/.tmp-*'))
+
+    def record_errors(requests_mock, directory):
+        result = Mirror(str(directory)).sync(['sample', 'not_found'])
+        assert list(result.errors) == ['not_found']
+        assert (directory / 'integrations' / 'sample' / 'openapi.yaml').exists()
+
+    def mirror_local_directory(directory):
+        result = Mirror(str(directory), source='tests/fixtures').sync(['refs'])
+        assert sorted(result.downloaded) == ['integrations/refs/integration.yaml', 'integrations/refs/openapi.yaml']
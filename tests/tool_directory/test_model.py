@@ -1,6 +1,23 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+import requests
 from pydantic.v1 import BaseModel
 
+from tool_directory.coalesce import SingleFlight
+from tool_directory.endpoint import Integration
+from tool_directory.exceptions import DeadlineExceededException
+from tool_directory.failover import HedgePolicy
+from tool_directory.instrumentation import CALL, COALESCE, FAILOVER, HEDGE, Instrumentation
 from tool_directory.model import Endpoint, OpenApiTool
+from tool_directory.ratelimit import RateLimiter
+from tool_directory.response_cache import ResponseCache
+from tool_directory.session import AsyncSessionPool, SessionPool
+from tool_directory.stream import TRUNCATED_KEY, TRUNCATION_MARKER, ResponseReader
 
 
 def describe_Endpoint():
@@ -29,6 +46,20 @@ def describe_Endpoint():
         def extract_header_args():
             assert endpoint.header_args == ['authorization']
 
+    def compare_by_values():
+        same = Endpoint(
+            method='get',
+            path='/dummy/{id}',
+            description='Endpoint description',
+            args_schema=ArgsSchema,
+            args_source={'id': 'path', 'api_key': 'query', 'query': 'query', 'authorization': 'header'},
+        )
+        assert same == endpoint
+        assert same != Endpoint(method='get', path='/dummy', description='', args_schema=ArgsSchema, args_source={})
+
+    def reuse_plan():
+        assert endpoint.plan is endpoint.plan
+
 
 def describe_OpenApiTool():
     class ArgsSchema(BaseModel):
@@ -60,6 +91,35 @@ def describe_OpenApiTool():
             assert tool.endpoint == endpoint
             assert tool.parameters == {'api_key': 'dummy'}
 
+        def render_description_on_demand():
+            endpoint = Endpoint(
+                method='get', path='/dummy', description='Endpoint', args_schema=ArgsSchema, args_source={}
+            )
+            integration = Integration('dummy', 'Integration', 'http://localhost', {'api_key': 'dummy'})
+            tool = OpenApiTool(endpoint=endpoint, integration=integration)
+            assert tool.__dict__['description'] == ''
+            assert tool.description == 'Description: Integration\nEndpoint: GET /dummy Endpoint'
+            assert (tool.server, tool.parameters, tool.integration_name) == (
+                'http://localhost',
+                {'api_key': 'dummy'},
+                'dummy',
+            )
+
+            assert tool.dict()['description'] == 'Description: Integration\nEndpoint: GET /dummy Endpoint'
+            assert json.loads(tool.json(include={'name', 'description'})) == {
+                'name': 'GET http://localhost/dummy',
+                'description': 'Description: Integration\nEndpoint: GET /dummy Endpoint',
+            }
+            assert tool.__dict__['description'] == ''
+
+            tool.description = 'Overridden description'
+            assert tool.description == 'Overridden description'
+            assert tool.dict()['description'] == 'Overridden description'
+
+        def require_endpoint():
+            with pytest.raises(TypeError):
+                OpenApiTool(description='Integration', server='http://localhost', parameters={})
+
         def initialize_tool_with_braces():
             endpoint = Endpoint(
                 method='get',
@@ -115,6 +175,33 @@ def describe_OpenApiTool():
                 'query': ['dummy query'],
             }
 
+        def send_request_with_session(requests_mock):
+            requests_mock.get('http://localhost/dummy', text='{"result": "dummy"}')
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            session = SessionPool(timeout=3)
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                session=session,
+            )
+            assert tool.session is session
+
+            tool.request_by_spec(query='first')
+            tool.request_by_spec(query='second')
+
+            assert len(requests_mock.request_history) == 2
+            assert requests_mock.request_history[0].timeout == 3
+            assert requests_mock.request_history[1].timeout == 3
+
         def send_get_request_and_return_plain_text(requests_mock):
             requests_mock.get('http://localhost/dummy', text='result is plain text')
 
@@ -222,9 +309,117 @@ def describe_OpenApiTool():
                 'query': ['dummy query'],
             }
 
+        @pytest.mark.parametrize(
+            'method, body, qs',
+            [
+                ('put', 'query=dummy+query&api_key=dummy', {}),
+                ('patch', 'query=dummy+query&api_key=dummy', {}),
+                ('delete', None, {'query': ['dummy query'], 'api_key': ['dummy']}),
+                ('head', None, {'query': ['dummy query'], 'api_key': ['dummy']}),
+                ('options', None, {'query': ['dummy query'], 'api_key': ['dummy']}),
+            ],
+        )
+        def send_request_with_other_methods(requests_mock, method, body, qs):
+            requests_mock.register_uri(method.upper(), 'http://localhost/dummy', text='')
+
+            endpoint = Endpoint(
+                method=method,
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'api_key': 'query', 'query': 'query'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={'api_key': 'dummy'},
+            )
+            tool.request_by_spec(query='dummy query')
+
+            history = requests_mock.request_history[0]
+            assert history.method == method.upper()
+            assert history.text == body
+            assert history.qs == qs
+
+        def send_json_body(requests_mock):
+            requests_mock.put('http://localhost/dummy/42', text='{"result": "dummy"}')
+
+            endpoint = Endpoint(
+                method='put',
+                path='/dummy/{id}',
+                description='Endpoint description',
+                args_schema=ArgsSchemaWithIdAndHeader,
+                args_source={'id': 'path', 'api_key': 'query', 'name': 'body', 'tags': 'body'},
+                body_type='application/json',
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={'api_key': 'dummy'},
+            )
+            assert tool.request_by_spec(id='42', name='pochi', tags=['dog']) == {'result': 'dummy'}
+
+            history = requests_mock.request_history[0]
+            assert history.qs == {'api_key': ['dummy']}
+            assert history.headers['Content-Type'] == 'application/json'
+            assert history.json() == {'name': 'pochi', 'tags': ['dog']}
+
+        @pytest.mark.parametrize(
+            'create_body', [lambda path: open(path, 'rb'), lambda path: iter([b'large ', b'file'])]
+        )
+        def stream_whole_body(requests_mock, tmp_path, create_body):
+            requests_mock.post('http://localhost/dummy', text='{"result": "dummy"}')
+            path = tmp_path / 'upload.bin'
+            path.write_bytes(b'large file')
+
+            endpoint = Endpoint(
+                method='post',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchemaWithIdAndHeader,
+                args_source={'body': 'content'},
+                body_type='application/octet-stream',
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+            )
+            body = create_body(path)
+            assert tool.request_by_spec(body=body) == {'result': 'dummy'}
+
+            # The body is handed to the HTTP adapter unread
+            history = requests_mock.request_history[0]
+            assert history.body is body
+            assert history.headers['Content-Type'] == 'application/octet-stream'
+            if hasattr(body, 'close'):
+                body.close()
+
+        def encode_path_arguments(requests_mock):
+            requests_mock.get('http://localhost/dummy/a%2Fb%20c/items', text='{"result": "dummy"}')
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy/{id}/items',
+                description='Endpoint description',
+                args_schema=ArgsSchemaWithIdAndHeader,
+                args_source={'id': 'path'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+            )
+            assert tool.request_by_spec(id='a/b c') == {'result': 'dummy'}
+            assert requests_mock.request_history[0].path == '/dummy/a%2fb%20c/items'
+
         def ignore_unsupported_method(requests_mock):
             endpoint = Endpoint(
-                method='patch',
+                method='connect',
                 path='/dummy',
                 description='Endpoint description',
                 args_schema=ArgsSchema,
@@ -240,3 +435,662 @@ def describe_OpenApiTool():
             assert result is None
 
             assert len(requests_mock.request_history) == 0
+
+        def cache_get_response(requests_mock):
+            requests_mock.get(
+                'http://localhost/dummy', text='{"result": "dummy"}', headers={'Cache-Control': 'max-age=60'}
+            )
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                response_cache=ResponseCache(),
+            )
+            assert tool.request_by_spec(query='dummy query') == {'result': 'dummy'}
+            assert tool.request_by_spec(query='dummy query') == {'result': 'dummy'}
+            assert len(requests_mock.request_history) == 1
+
+            tool.request_by_spec(query='another query')
+            assert len(requests_mock.request_history) == 2
+
+        def not_cache_post_response(requests_mock):
+            requests_mock.post('http://localhost/dummy', text='{"result": "dummy"}')
+
+            endpoint = Endpoint(
+                method='post',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                response_cache=ResponseCache(),
+            )
+            tool.request_by_spec(query='dummy query')
+            tool.request_by_spec(query='dummy query')
+            assert len(requests_mock.request_history) == 2
+
+        def back_off_on_too_many_requests(requests_mock):
+            requests_mock.get('http://localhost/dummy', status_code=429, headers={'Retry-After': '30'})
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            rate_limiter = RateLimiter(max_concurrency=4)
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                rate_limiter=rate_limiter,
+            )
+            with pytest.raises(requests.HTTPError):
+                tool.request_by_spec(query='dummy query')
+
+            limiter = rate_limiter.for_server('http://localhost')
+            assert limiter.active == 0
+            assert limiter.concurrency_limit == 2
+            assert limiter._reserve() == pytest.approx(30, abs=1)
+
+        def stream_response_with_projection(requests_mock):
+            requests_mock.get(
+                'http://localhost/dummy',
+                text='{"name": "Tokyo", "main": {"temp": 29.54, "humidity": 64}, "list": [1, 2, 3]}',
+                headers={'Content-Type': 'application/json'},
+            )
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                response_reader=ResponseReader(fields=['name', 'main.temp']),
+                response_cache=ResponseCache(),
+            )
+            assert tool.request_by_spec(query='dummy query') == {'name': 'Tokyo', 'main': {'temp': 29.54}}
+            assert tool.request_by_spec(query='dummy query') == {'name': 'Tokyo', 'main': {'temp': 29.54}}
+            assert len(requests_mock.request_history) == 1
+
+        @pytest.mark.parametrize('response_reader', [None, ResponseReader(), ResponseReader(fields=['name'])])
+        def return_text_of_invalid_json_response(requests_mock, response_reader):
+            html = '<html><body>Bad Gateway</body></html>'
+            requests_mock.get('http://localhost/dummy', text=html, headers={'Content-Type': 'application/json'})
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                response_reader=response_reader,
+            )
+            assert tool.request_by_spec(query='dummy query') == html
+
+        def truncate_streamed_response(requests_mock):
+            requests_mock.get('http://localhost/dummy', text='x' * 100)
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                response_reader=ResponseReader(max_bytes=10, chunk_size=4),
+            )
+            assert tool.request_by_spec(query='dummy query') == 'x' * 10 + TRUNCATION_MARKER
+
+        def emit_call_event(requests_mock):
+            requests_mock.get('http://localhost/dummy', text='{"result": "dummy"}')
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            events = []
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+                instrumentation=Instrumentation(events.append),
+                integration_name='sample',
+            )
+            tool.request_by_spec(query='dummy query')
+
+            assert len(events) == 1
+            assert events[0].kind == CALL
+            assert events[0].labels == {'integration': 'sample', 'method': 'get', 'path': '/dummy'}
+            assert events[0].status == 200
+            assert events[0].bytes == len('{"result": "dummy"}')
+
+    def describe_batch_by_spec():
+        def call_concurrently_in_order(requests_mock):
+            requests_mock.get('http://localhost/dummy/1', text='{"id": "1"}')
+            requests_mock.get('http://localhost/dummy/2', status_code=404)
+            requests_mock.get('http://localhost/dummy/3', text='{"id": "3"}')
+
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy/{id}',
+                description='Endpoint description',
+                args_schema=ArgsSchemaWithIdAndHeader,
+                args_source={'id': 'path'},
+            )
+            tool = OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={},
+            )
+            results = tool.batch_by_spec([{'id': '1'}, {'id': '2'}, {'id': '3'}], max_concurrency=2)
+
+            assert results[0] == {'id': '1'}
+            assert isinstance(results[1], requests.HTTPError)
+            assert results[2] == {'id': '3'}
+            assert tool.batch_by_spec([]) == []
+
+    def describe_arequest_by_spec():
+        def _create_tool(
+            method, handler, path='/dummy', args_source={'api_key': 'query', 'query': 'query'}, body_type=None
+        ):
+            endpoint = Endpoint(
+                method=method,
+                path=path,
+                description='Endpoint description',
+                args_schema=ArgsSchemaWithIdAndHeader,
+                args_source=args_source,
+                body_type=body_type,
+            )
+            return OpenApiTool(
+                description='Integration description',
+                server='http://localhost',
+                endpoint=endpoint,
+                parameters={'api_key': 'dummy'},
+                async_session=AsyncSessionPool(transport=httpx.MockTransport(handler)),
+            )
+
+        def send_get_request():
+            requests = []
+
+            def handler(request):
+                requests.append(request)
+                return httpx.Response(200, json={'result': 'dummy'})
+
+            tool = _create_tool(
+                'get', handler, path='/dummy/{id}', args_source={'id': 'path', 'api_key': 'query', 'query': 'query'}
+            )
+            result = asyncio.run(tool.arequest_by_spec(id='42', query='dummy query'))
+            assert result == {'result': 'dummy'}
+
+            assert len(requests) == 1
+            assert requests[0].method == 'GET'
+            assert requests[0].url.path == '/dummy/42'
+            assert dict(requests[0].url.params) == {'api_key': 'dummy', 'query': 'dummy query'}
+
+        def send_post_request():
+            requests = []
+
+            def handler(request):
+                requests.append(request)
+                return httpx.Response(200, text='result is plain text')
+
+            tool = _create_tool('post', handler)
+            result = asyncio.run(tool.arequest_by_spec(query='dummy query'))
+            assert result == 'result is plain text'
+
+            assert requests[0].method == 'POST'
+            assert requests[0].content == b'query=dummy+query&api_key=dummy'
+
+        def send_json_body():
+            requests = []
+
+            def handler(request):
+                requests.append(request)
+                return httpx.Response(200, json={'result': 'dummy'})
+
+            tool = _create_tool(
+                'patch', handler, args_source={'api_key': 'query', 'name': 'body'}, body_type='application/json'
+            )
+            asyncio.run(tool.arequest_by_spec(name='pochi'))
+
+            assert requests[0].method == 'PATCH'
+            assert dict(requests[0].url.params) == {'api_key': 'dummy'}
+            assert json.loads(requests[0].content) == {'name': 'pochi'}
+
+        def stream_whole_body(tmp_path):
+            requests = []
+
+            def handler(request):
+                requests.append(request)
+                return httpx.Response(200, json={'result': 'dummy'})
+
+            path = tmp_path / 'upload.bin'
+            path.write_bytes(b'x' * 200_000)
+            tool = _create_tool('put', handler, args_source={'body': 'content'}, body_type='application/octet-stream')
+            with open(path, 'rb') as f:
+                assert asyncio.run(tool.arequest_by_spec(body=f)) == {'result': 'dummy'}
+
+            assert requests[0].headers['Content-Type'] == 'application/octet-stream'
+            assert requests[0].headers['Transfer-Encoding'] == 'chunked'
+            assert requests[0].content == b'x' * 200_000
+
+        def raise_error_for_status():
+            tool = _create_tool('get', lambda request: httpx.Response(500))
+            with pytest.raises(httpx.HTTPStatusError):
+                asyncio.run(tool.arequest_by_spec(query='dummy query'))
+
+        def ignore_unsupported_method():
+            tool = _create_tool('connect', lambda request: httpx.Response(200))
+            assert asyncio.run(tool.arequest_by_spec(query='dummy query')) is None
+
+        def cache_get_response():
+            requests = []
+
+            def handler(request):
+                requests.append(request)
+                return httpx.Response(200, text='result is plain text')
+
+            tool = _create_tool('get', handler)
+            tool.response_cache = ResponseCache()
+            assert asyncio.run(tool.arequest_by_spec(query='dummy query')) == 'result is plain text'
+            assert asyncio.run(tool.arequest_by_spec(query='dummy query')) == 'result is plain text'
+            assert len(requests) == 1
+
+        def coalesce_identical_requests():
+            requests = []
+
+            async def handler(request):
+                requests.append(request)
+                await asyncio.sleep(0.01)
+                return httpx.Response(200, json={'result': 'dummy'})
+
+            async def run(tool):
+                return await asyncio.gather(*[tool.arequest_by_spec(query='dummy query') for _ in range(3)])
+
+            events = []
+            tool = _create_tool('get', handler)
+            tool.coalesce = True
+            tool.single_flight = SingleFlight()
+            tool.instrumentation = Instrumentation(events.append)
+            assert asyncio.run(run(tool)) == [{'result': 'dummy'}] * 3
+            assert len(requests) == 1
+            assert [event.kind for event in events].count(COALESCE) == 2
+
+            tool = _create_tool('post', handler)
+            tool.coalesce = True
+            asyncio.run(run(tool))
+            assert len(requests) == 4
+
+        def stream_response():
+            tool = _create_tool('get', lambda request: httpx.Response(200, json={'name': 'Tokyo', 'items': [1, 2, 3]}))
+            tool.response_reader = ResponseReader(max_bytes=24)
+            result = asyncio.run(tool.arequest_by_spec(query='dummy query'))
+            assert result['name'] == 'Tokyo'
+            assert result[TRUNCATED_KEY] is True
+
+        def raise_error_for_status_of_streamed_response():
+            tool = _create_tool('get', lambda request: httpx.Response(500, text='error'))
+            tool.response_reader = ResponseReader(max_bytes=10)
+            with pytest.raises(httpx.HTTPStatusError) as excinfo:
+                asyncio.run(tool.arequest_by_spec(query='dummy query'))
+            assert excinfo.value.response.text == 'error'
+
+        def call_batch_with_max_concurrency():
+            active = []
+            peak = []
+
+            async def handler(request):
+                active.append(None)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.pop()
+                if request.url.path == '/dummy/2':
+                    return httpx.Response(500)
+                return httpx.Response(200, json={'path': request.url.path})
+
+            tool = _create_tool('get', handler, path='/dummy/{id}', args_source={'id': 'path'})
+            results = asyncio.run(tool.abatch_by_spec([{'id': str(i)} for i in range(6)], max_concurrency=3))
+
+            assert max(peak) == 3
+            assert results[0] == {'path': '/dummy/0'}
+            assert isinstance(results[2], httpx.HTTPStatusError)
+            assert results[5] == {'path': '/dummy/5'}
+
+        def emit_call_event_with_error():
+            events = []
+            tool = _create_tool('get', lambda request: httpx.Response(503))
+            tool.instrumentation = Instrumentation(events.append)
+            with pytest.raises(httpx.HTTPStatusError):
+                asyncio.run(tool.arequest_by_spec(query='dummy query'))
+
+            assert events[0].kind == CALL
+            assert events[0].status == 503
+
+        def run_as_coroutine_of_tool():
+            tool = _create_tool('get', lambda request: httpx.Response(200, json={'result': 'dummy'}))
+            assert tool.coroutine == tool.arequest_by_spec
+            assert asyncio.run(tool.ainvoke({'id': '1', 'query': 'dummy query', 'authorization': 'x'})) == {
+                'result': 'dummy'
+            }
+
+    def describe_failover():
+        servers = ['http://primary', 'http://secondary']
+
+        def _create_tool(method='get', deadline=None, hedge=None, **options):
+            endpoint = Endpoint(
+                method=method,
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            return OpenApiTool(
+                endpoint=endpoint,
+                integration=Integration('dummy', 'Integration description', servers[0], {}, servers=servers),
+                deadline=deadline,
+                hedge=hedge,
+                **options,
+            )
+
+        def fail_over_to_next_server(requests_mock):
+            requests_mock.get('http://primary/dummy', status_code=503)
+            requests_mock.get('http://secondary/dummy', text='{"result": "secondary"}')
+
+            events = []
+            tool = _create_tool(instrumentation=Instrumentation(events.append))
+            assert tool.name == 'GET http://primary/dummy'
+            assert tool.request_by_spec(query='dummy query') == {'result': 'secondary'}
+            assert [x.url for x in requests_mock.request_history] == [
+                'http://primary/dummy?query=dummy+query',
+                'http://secondary/dummy?query=dummy+query',
+            ]
+            assert [x.kind for x in events] == [CALL, FAILOVER, CALL]
+
+        def raise_error_of_last_server(requests_mock):
+            requests_mock.get('http://primary/dummy', exc=requests.ConnectionError)
+            requests_mock.get('http://secondary/dummy', status_code=504)
+            with pytest.raises(requests.HTTPError):
+                _create_tool().request_by_spec(query='dummy query')
+
+        def keep_errors_of_requests(requests_mock):
+            requests_mock.get('http://primary/dummy', status_code=404)
+            with pytest.raises(requests.HTTPError):
+                _create_tool().request_by_spec(query='dummy query')
+            assert requests_mock.call_count == 1
+
+        def fail_over_non_idempotent_requests_only_before_sending(requests_mock):
+            requests_mock.post('http://primary/dummy', exc=requests.ConnectTimeout)
+            requests_mock.post('http://secondary/dummy', text='{"result": "secondary"}')
+            assert _create_tool('post').request_by_spec(query='dummy query') == {'result': 'secondary'}
+
+            requests_mock.post('http://primary/dummy', status_code=503)
+            with pytest.raises(requests.HTTPError):
+                _create_tool('post').request_by_spec(query='dummy query')
+
+        def limit_each_server_by_its_rate_limiter(requests_mock):
+            requests_mock.get('http://primary/dummy', status_code=503, headers={'Retry-After': '30'})
+            requests_mock.get('http://secondary/dummy', text='{"result": "secondary"}')
+
+            rate_limiter = RateLimiter(max_concurrency=4)
+            start = time.monotonic()
+            assert _create_tool(rate_limiter=rate_limiter).request_by_spec(query='dummy query') == {
+                'result': 'secondary'
+            }
+            assert time.monotonic() - start < 1
+            assert rate_limiter.for_server('http://primary').concurrency_limit == 2
+            assert rate_limiter.for_server('http://secondary').concurrency_limit == 4
+
+        def fail_over_refused_connection_of_any_method(http_server, closed_port_url):
+            secondary = http_server(200, {'Content-Type': 'application/json'}, b'{"result": "secondary"}')
+            endpoint = Endpoint(
+                method='post',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            integration = Integration(
+                'dummy', 'Integration description', closed_port_url, {}, servers=[closed_port_url, secondary.url]
+            )
+            tool = OpenApiTool(endpoint=endpoint, integration=integration, session=SessionPool(retries=0))
+            assert tool.request_by_spec(query='dummy query') == {'result': 'secondary'}
+            assert secondary.requests == 1
+
+        def keep_uploaded_files_on_first_server(requests_mock, tmp_path):
+            requests_mock.put('http://primary/dummy', status_code=503)
+            requests_mock.put('http://secondary/dummy', text='{"result": "secondary"}')
+            path = tmp_path / 'photo.png'
+            path.write_bytes(b'photo')
+
+            endpoint = Endpoint(
+                method='put',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'name': 'body', 'photo': 'body'},
+                body_type='multipart/form-data',
+            )
+            integration = Integration('dummy', 'Integration description', servers[0], {}, servers=servers)
+            tool = OpenApiTool(endpoint=endpoint, integration=integration)
+            with open(path, 'rb') as photo:
+                with pytest.raises(requests.HTTPError):
+                    tool.request_by_spec(name='dummy', photo=photo)
+            assert requests_mock.call_count == 1
+
+        def limit_timeouts_by_deadline(requests_mock):
+            requests_mock.get('http://primary/dummy', text='{"result": "primary"}')
+            tool = _create_tool(deadline=2, session=SessionPool(timeout=(1, 30)))
+            tool.request_by_spec(query='dummy query')
+
+            timeout = requests_mock.request_history[0].timeout.clone()
+            assert timeout.connect_timeout == 1
+            assert 1.5 < timeout.read_timeout <= 2
+
+        def bound_retries_and_backoff_by_deadline(http_server):
+            primary = http_server(503, {'Retry-After': '5'})
+            secondary = http_server(200, {'Content-Type': 'application/json'}, b'{"result": "secondary"}')
+            endpoint = Endpoint(
+                method='get',
+                path='/dummy',
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={'query': 'query'},
+            )
+            integration = Integration(
+                'dummy', 'Integration description', primary.url, {}, servers=[primary.url, secondary.url]
+            )
+            tool = OpenApiTool(
+                endpoint=endpoint,
+                integration=integration,
+                session=SessionPool(backoff_factor=5, status_forcelist=(503,)),
+                deadline=1,
+                rate_limiter=RateLimiter(),
+            )
+
+            start = time.monotonic()
+            assert tool.request_by_spec(query='dummy query') == {'result': 'secondary'}
+            assert time.monotonic() - start < 1
+            # The primary is retried at once, and not again because its next backoff would pass the deadline
+            assert primary.requests == 2
+
+            # The primary backs off for Retry-After and the secondary is called again within the deadline
+            start = time.monotonic()
+            assert tool.request_by_spec(query='dummy query') == {'result': 'secondary'}
+            assert time.monotonic() - start < 1
+            assert primary.requests == 2
+
+            tool.integration = Integration('dummy', 'Integration description', primary.url, {})
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceededException):
+                tool.request_by_spec(query='dummy query')
+            assert time.monotonic() - start < 1
+
+        def raise_error_after_deadline(requests_mock):
+            def timeout(request, context):
+                time.sleep(0.1)
+                raise requests.ConnectTimeout()
+
+            requests_mock.get('http://primary/dummy', text=timeout)
+            requests_mock.get('http://secondary/dummy', text='{"result": "secondary"}')
+            with pytest.raises(DeadlineExceededException):
+                _create_tool(deadline=0.05).request_by_spec(query='dummy query')
+            assert requests_mock.call_count == 1
+
+        def hedge_slow_get_request(monkeypatch):
+            # requests_mock serializes requests of threads, so sending itself is replaced
+            sent = []
+
+            def send(self, method, url, options, *, expires=None, server=None):
+                sent.append(url)
+                if url.startswith('http://primary'):
+                    time.sleep(0.3)
+                return {'result': url}
+
+            monkeypatch.setattr(OpenApiTool, '_send', send)
+            events = []
+            hedge = HedgePolicy(initial_delay=0.05)
+            tool = _create_tool(hedge=hedge, instrumentation=Instrumentation(events.append))
+            start = time.monotonic()
+            assert tool.request_by_spec(query='dummy query') == {'result': 'http://secondary/dummy'}
+            assert time.monotonic() - start < 0.3
+            assert sent == ['http://primary/dummy', 'http://secondary/dummy']
+            assert [x.kind for x in events] == [HEDGE]
+            hedge.close()
+
+        def skip_hedge_while_workers_are_busy(monkeypatch):
+            sent = []
+
+            def send(self, method, url, options, *, expires=None, server=None):
+                sent.append((url, threading.current_thread() is threading.main_thread()))
+                time.sleep(0.1)
+                return {'result': url}
+
+            monkeypatch.setattr(OpenApiTool, '_send', send)
+            events = []
+            hedge = HedgePolicy(initial_delay=0.01, max_workers=1)
+            tool = _create_tool(hedge=hedge, instrumentation=Instrumentation(events.append))
+            assert tool.request_by_spec(query='dummy query') == {'result': 'http://primary/dummy'}
+            assert sent == [('http://primary/dummy', False)]
+
+            # The caller sends the request itself instead of queueing it behind a busy worker
+            sent.clear()
+            busy = hedge.submit(time.sleep, 0.3)
+            assert tool.request_by_spec(query='dummy query') == {'result': 'http://primary/dummy'}
+            assert sent == [('http://primary/dummy', True)]
+            assert events == []
+            busy.result()
+            hedge.close()
+
+        def skip_hedge_of_fast_get_request(monkeypatch):
+            monkeypatch.setattr(
+                OpenApiTool, '_send', lambda self, method, url, options, *, expires=None, server=None: url
+            )
+            hedge = HedgePolicy(initial_delay=1)
+            assert _create_tool(hedge=hedge).request_by_spec(query='dummy query') == 'http://primary/dummy'
+            assert hedge.delay('get /dummy') == 1
+            hedge.close()
+
+        def describe_async():
+            def _create_async_tool(handler, **options):
+                return _create_tool(async_session=AsyncSessionPool(transport=httpx.MockTransport(handler)), **options)
+
+            def fail_over_to_next_server():
+                def handler(request):
+                    if request.url.host == 'primary':
+                        raise httpx.ConnectError('refused', request=request)
+                    return httpx.Response(200, json={'result': 'secondary'})
+
+                tool = _create_async_tool(handler)
+                assert asyncio.run(tool.arequest_by_spec(query='dummy query')) == {'result': 'secondary'}
+
+            def limit_each_server_by_its_rate_limiter():
+                def handler(request):
+                    if request.url.host == 'primary':
+                        return httpx.Response(503, headers={'Retry-After': '30'})
+                    return httpx.Response(200, json={'result': 'secondary'})
+
+                rate_limiter = RateLimiter(max_concurrency=4)
+                tool = _create_async_tool(handler, rate_limiter=rate_limiter)
+                start = time.monotonic()
+                assert asyncio.run(tool.arequest_by_spec(query='dummy query')) == {'result': 'secondary'}
+                assert time.monotonic() - start < 1
+                assert rate_limiter.for_server('http://primary').concurrency_limit == 2
+                assert rate_limiter.for_server('http://secondary').concurrency_limit == 4
+
+            def raise_error_after_deadline():
+                async def handler(request):
+                    await asyncio.sleep(1)
+                    return httpx.Response(200, json={})
+
+                tool = _create_async_tool(handler, deadline=0.05)
+                with pytest.raises(DeadlineExceededException):
+                    asyncio.run(tool.arequest_by_spec(query='dummy query'))
+
+            def fail_over_server_backing_off_past_deadline():
+                def handler(request):
+                    if request.url.host == 'primary':
+                        return httpx.Response(503, headers={'Retry-After': '5'})
+                    return httpx.Response(200, json={'result': 'secondary'})
+
+                tool = _create_async_tool(handler, deadline=1, rate_limiter=RateLimiter())
+                for _ in range(2):
+                    start = time.monotonic()
+                    assert asyncio.run(tool.arequest_by_spec(query='dummy query')) == {'result': 'secondary'}
+                    assert time.monotonic() - start < 1
+
+            def hedge_and_cancel_slow_get_request():
+                cancelled = []
+
+                async def handler(request):
+                    if request.url.host == 'primary':
+                        try:
+                            await asyncio.sleep(1)
+                        except asyncio.CancelledError:
+                            cancelled.append(request.url.host)
+                            raise
+                    return httpx.Response(200, json={'result': request.url.host})
+
+                hedge = HedgePolicy(initial_delay=0.05)
+                tool = _create_async_tool(handler, hedge=hedge)
+                assert asyncio.run(tool.arequest_by_spec(query='dummy query')) == {'result': 'secondary'}
+                assert cancelled == ['primary']
+                hedge.close()
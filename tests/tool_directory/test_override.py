@@ -0,0 +1,97 @@
+import copy
+
+import pytest
+
+from tool_directory.compiler import EndpointCompiler
+from tool_directory.override import OverrideIndex, translate
+
+
+@pytest.mark.parametrize(
+    'description, language, expected',
+    [
+        ('plain', 'ja', 'plain'),
+        ({'en': 'English', 'ja': 'Japanese'}, 'ja_JP', 'Japanese'),
+        ({'en': 'English', 'ja': 'Japanese'}, 'fr', 'English'),
+        ({'ja': 'Japanese'}, 'fr', ''),
+    ],
+)
+def test_translate(description, language, expected):
+    assert translate(description, language) == expected
+
+
+def describe_OverrideIndex():
+    spec = {
+        'paths': {
+            '/pets/{id}': {
+                'parameters': [{'name': 'id', 'in': 'path', 'description': 'Original id'}],
+                'get': {
+                    'description': 'Original get',
+                    'parameters': [
+                        {'$ref': '#/components/parameters/Limit'},
+                        {'name': 'q', 'in': 'query', 'description': 'Original q'},
+                    ],
+                },
+                'delete': {'description': 'Original delete'},
+            },
+            '/stores': {'get': {'description': 'Original stores'}},
+        },
+        'components': {'parameters': {'Limit': {'name': 'limit', 'in': 'query', 'description': 'Original limit'}}},
+    }
+    integration = {
+        'paths': {
+            '/pets/{id}': {
+                'get': {
+                    'description': {'en': 'Get a pet', 'ja': 'ペットを取得'},
+                    'parameters': [
+                        {'in': 'query', 'name': 'limit', 'description': {'en': 'Limit', 'ja': '件数'}},
+                        {'in': 'path', 'name': 'id', 'description': {'en': 'Pet id', 'ja': 'ペットID'}},
+                        {'in': 'query', 'name': 'q'},
+                    ],
+                },
+            },
+            '/missing': {'get': {'description': 'Missing'}},
+        },
+    }
+
+    def index_overrides():
+        index = OverrideIndex(integration)
+        assert index.operations == {
+            ('/pets/{id}', 'get'): {'en': 'Get a pet', 'ja': 'ペットを取得'},
+            ('/missing', 'get'): 'Missing',
+        }
+        assert index.parameters == {
+            ('/pets/{id}', 'get'): {
+                ('query', 'limit'): {'en': 'Limit', 'ja': '件数'},
+                ('path', 'id'): {'en': 'Pet id', 'ja': 'ペットID'},
+            }
+        }
+
+    def describe_apply():
+        def override_descriptions(caplog):
+            overlay = OverrideIndex(integration).apply(spec, 'ja', EndpointCompiler(spec).resolve)
+
+            get = overlay['paths']['/pets/{id}']['get']
+            assert get['description'] == 'ペットを取得'
+            assert get['parameters'] == [
+                {'name': 'limit', 'in': 'query', 'description': '件数'},
+                {'name': 'q', 'in': 'query', 'description': 'Original q'},
+                {'name': 'id', 'in': 'path', 'description': 'ペットID'},
+            ]
+            assert 'Failed to override OpenAPI spec, GET /missing does not exist' in caplog.text
+
+        def keep_original_spec():
+            original = copy.deepcopy(spec)
+            OverrideIndex(integration).apply(spec, 'ja', EndpointCompiler(spec).resolve)
+            assert spec == original
+
+        def share_untouched_parts():
+            overlay = OverrideIndex(integration).apply(spec, 'ja', EndpointCompiler(spec).resolve)
+            assert overlay['paths'] is not spec['paths']
+            assert overlay['paths']['/pets/{id}'] is not spec['paths']['/pets/{id}']
+            assert overlay['paths']['/stores'] is spec['paths']['/stores']
+            assert overlay['paths']['/pets/{id}']['delete'] is spec['paths']['/pets/{id}']['delete']
+            assert (
+                overlay['paths']['/pets/{id}']['get']['parameters'][1]
+                is spec['paths']['/pets/{id}']['get']['parameters'][1]
+            )
+            assert overlay['components'] is spec['components']
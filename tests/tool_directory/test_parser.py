@@ -0,0 +1,70 @@
+import pytest
+import yaml
+
+from tool_directory.parser import AutoParser, JsonParser, PureYamlParser, SpecParser, YamlParser, get_parser
+
+
+def describe_YamlParser():
+    def parse_yaml():
+        assert YamlParser().parse(b'openapi: 3.0.0\npaths: {}') == {'openapi': '3.0.0', 'paths': {}}
+
+    def use_libyaml_if_available():
+        assert YamlParser().loader is getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        assert PureYamlParser().loader is yaml.SafeLoader
+
+
+def describe_JsonParser():
+    def parse_json():
+        assert JsonParser().parse(b'{"openapi": "3.0.0"}') == {'openapi': '3.0.0'}
+
+
+def describe_AutoParser():
+    @pytest.fixture
+    def parser():
+        parser = AutoParser()
+        parser.calls = []
+        for backend in (parser.json, parser.yaml):
+            original = backend.parse
+
+            def parse(content, content_type=None, original=original, name=backend.name):
+                parser.calls.append(name)
+                return original(content, content_type)
+
+            backend.parse = parse
+        return parser
+
+    def detect_json_by_first_byte(parser):
+        assert parser.parse(b'  \n{"openapi": "3.0.0"}') == {'openapi': '3.0.0'}
+        assert parser.calls == ['json']
+
+    def detect_json_by_content_type(parser):
+        assert parser.parse(b'"dummy"', 'application/json; charset=utf-8') == 'dummy'
+        assert parser.calls == ['json']
+
+    def fallback_to_yaml_for_flow_mapping(parser):
+        assert parser.parse(b'{openapi: 3.0.0}') == {'openapi': '3.0.0'}
+        assert parser.calls == ['json', 'yaml']
+
+    def parse_yaml(parser):
+        assert parser.parse(b'openapi: 3.0.0', 'text/yaml') == {'openapi': '3.0.0'}
+        assert parser.calls == ['yaml']
+
+
+def describe_get_parser():
+    def return_parser_by_name():
+        assert isinstance(get_parser(), AutoParser)
+        assert isinstance(get_parser('json'), JsonParser)
+        assert isinstance(get_parser('yaml'), YamlParser)
+        assert isinstance(get_parser('pure-yaml'), PureYamlParser)
+
+    def return_given_parser():
+        parser = JsonParser()
+        assert get_parser(parser) is parser
+
+    def reject_unknown_parser():
+        with pytest.raises(ValueError):
+            get_parser('toml')
+
+    def reject_abstract_parser():
+        with pytest.raises(NotImplementedError):
+            SpecParser().parse(b'')
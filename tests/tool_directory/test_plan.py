@@ -0,0 +1,115 @@
+import io
+
+import pytest
+
+from tool_directory.plan import METHOD_HANDLERS, RequestPlan
+
+
+def describe_RequestPlan():
+    def parse_template():
+        plan = RequestPlan('get', '/stores/{storeId}/pets/{petId}.json', {})
+        assert plan.template == ['/stores/', 'storeId', '/pets/', 'petId', '.json']
+        assert RequestPlan('get', '{id}', {}).template == ['id']
+
+    def describe_build():
+        def route_arguments():
+            plan = RequestPlan(
+                'get',
+                '/pets/{id}',
+                {'id': 'path', 'limit': 'query', 'api_key': 'query', 'Authorization': 'header', 'session': 'cookie'},
+            )
+            request = plan.build(
+                'http://localhost',
+                {'id': '42', 'limit': '10', 'api_key': 'from llm', 'session': 'x', 'unknown': 'y'},
+                {'api_key': 'preconfigured', 'Authorization': 'Bearer dummy'},
+            )
+            assert request == (
+                'get',
+                'http://localhost/pets/42',
+                {'headers': {'Authorization': 'Bearer dummy'}, 'params': {'limit': '10', 'api_key': 'preconfigured'}},
+            )
+
+        def send_query_as_form_for_post():
+            plan = RequestPlan('post', '/pets', {'name': 'query'})
+            assert plan.build('http://localhost', {'name': 'dummy'}, {}) == (
+                'post',
+                'http://localhost/pets',
+                {'headers': {}, 'data': {'name': 'dummy'}},
+            )
+
+        def describe_request_body():
+            def send_properties_as_json():
+                plan = RequestPlan(
+                    'put',
+                    '/pets/{id}',
+                    {'id': 'path', 'dry': 'query', 'name': 'body', 'age': 'body'},
+                    'application/json',
+                )
+                assert plan.build('http://localhost', {'id': '1', 'dry': 'true', 'name': 'pochi', 'age': 3}, {}) == (
+                    'put',
+                    'http://localhost/pets/1',
+                    {'headers': {}, 'params': {'dry': 'true'}, 'json': {'name': 'pochi', 'age': 3}},
+                )
+
+            def send_properties_as_form():
+                plan = RequestPlan('post', '/pets', {'name': 'body'}, 'application/x-www-form-urlencoded')
+                assert plan.build('http://localhost', {'name': 'pochi'}, {})[2] == {
+                    'headers': {},
+                    'params': {},
+                    'data': {'name': 'pochi'},
+                }
+
+            def send_properties_as_multipart():
+                plan = RequestPlan('post', '/pets', {'name': 'body', 'photo': 'body'}, 'multipart/form-data')
+                photo = io.BytesIO(b'png')
+                assert plan.build('http://localhost', {'name': 'pochi', 'photo': photo}, {})[2]['files'] == {
+                    'name': (None, 'pochi'),
+                    'photo': photo,
+                }
+
+            def send_whole_body():
+                plan = RequestPlan('patch', '/pets', {'body': 'content'}, 'application/json')
+                assert plan.build('http://localhost', {'body': [1, 2]}, {})[2] == {
+                    'headers': {},
+                    'params': {},
+                    'json': [1, 2],
+                }
+
+                chunks = iter([b'[1,', b' 2]'])
+                assert plan.build('http://localhost', {'body': chunks}, {})[2] == {
+                    'headers': {'Content-Type': 'application/json'},
+                    'params': {},
+                    'content': chunks,
+                }
+
+            def encode_whole_body_by_media_type():
+                plan = RequestPlan('put', '/files', {'body': 'content'}, 'text/plain; charset=utf-8')
+                assert plan.build('http://localhost', {'body': 'テキスト'}, {})[2] == {
+                    'headers': {'Content-Type': 'text/plain; charset=utf-8'},
+                    'params': {},
+                    'content': 'テキスト'.encode('utf-8'),
+                }
+
+                plan = RequestPlan('put', '/files', {'body': 'content', 'Content-Type': 'header'}, '*/*')
+                request = plan.build('http://localhost', {'body': b'\x00', 'Content-Type': 'image/png'}, {})
+                assert request[2] == {'headers': {'Content-Type': 'image/png'}, 'params': {}, 'content': b'\x00'}
+
+            def send_delete_with_body():
+                plan = RequestPlan('delete', '/pets', {'ids': 'body'}, 'application/json')
+                assert plan.build('http://localhost', {'ids': ['1']}, {})[2]['json'] == {'ids': ['1']}
+
+        def encode_path_arguments():
+            plan = RequestPlan('get', '/files/{path}', {'path': 'path'})
+            assert plan.build('http://localhost', {'path': 'a/b c?d'}, {})[1] == 'http://localhost/files/a%2Fb%20c%3Fd'
+
+        def raise_error_without_path_argument():
+            plan = RequestPlan('get', '/pets/{id}', {'id': 'path'})
+            with pytest.raises(KeyError):
+                plan.build('http://localhost', {}, {})
+
+        def return_none_for_unsupported_method():
+            assert RequestPlan('connect', '/pets', {}).build('http://localhost', {}, {}) is None
+
+
+def test_method_handlers():
+    assert set(METHOD_HANDLERS) == {'get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace'}
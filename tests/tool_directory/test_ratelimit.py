@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from email.utils import formatdate
+
+import pytest
+
+from tool_directory.exceptions import DeadlineExceededException
+from tool_directory.ratelimit import RateLimiter, ServerLimiter, aacquire, acquire, parse_retry_after
+
+
+def describe_parse_retry_after():
+    def parse_seconds():
+        assert parse_retry_after('120') == 120
+        assert parse_retry_after('-1') == 0
+
+    def parse_http_date():
+        assert 50 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+
+    def ignore_invalid_value():
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('soon') is None
+
+
+def describe_ServerLimiter():
+    def describe_rate():
+        def delay_after_burst():
+            limiter = ServerLimiter(rate=10, burst=2)
+            assert limiter._reserve() == 0
+            assert limiter._reserve() == 0
+            assert limiter._reserve() == pytest.approx(0.1, abs=0.01)
+            assert limiter._reserve() == pytest.approx(0.2, abs=0.01)
+
+        def refill_tokens():
+            limiter = ServerLimiter(rate=100, burst=1)
+            assert limiter._reserve() == 0
+            time.sleep(0.02)
+            assert limiter._reserve() == 0
+
+        def not_limit_without_rate():
+            limiter = ServerLimiter()
+            assert all(limiter._reserve() == 0 for _ in range(100))
+
+    def describe_concurrency():
+        def cap_threads():
+            limiter = ServerLimiter(max_concurrency=2)
+            lock = threading.Lock()
+            active = []
+            peak = []
+
+            def call():
+                with limiter.acquire() as permit:
+                    with lock:
+                        active.append(None)
+                        peak.append(len(active))
+                    time.sleep(0.01)
+                    with lock:
+                        active.pop()
+                    permit.status = 200
+
+            threads = [threading.Thread(target=call) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert max(peak) == 2
+            assert limiter.active == 0
+
+        def cap_coroutines():
+            limiter = ServerLimiter(max_concurrency=3)
+            peak = []
+
+            async def call():
+                async with limiter.aacquire():
+                    peak.append(limiter.active)
+                    await asyncio.sleep(0.01)
+
+            async def run():
+                await asyncio.gather(*[call() for _ in range(10)])
+
+            asyncio.run(run())
+            assert max(peak) == 3
+            assert limiter.active == 0
+
+        def release_cancelled_waiter():
+            limiter = ServerLimiter(max_concurrency=1)
+
+            async def run():
+                async with limiter.aacquire():
+                    waiter = asyncio.ensure_future(limiter.aacquire().__aenter__())
+                    await asyncio.sleep(0)
+                    waiter.cancel()
+                    with pytest.raises(asyncio.CancelledError):
+                        await waiter
+                async with limiter.aacquire():
+                    return limiter.active
+
+            assert asyncio.run(run()) == 1
+            assert limiter.active == 0
+
+    def describe_deadline():
+        def stop_waiting_for_slot_at_deadline():
+            limiter = ServerLimiter(max_concurrency=1)
+            with limiter.acquire():
+                start = time.monotonic()
+                with pytest.raises(DeadlineExceededException):
+                    with limiter.acquire(time.monotonic() + 0.05):
+                        pass
+                assert time.monotonic() - start < 0.5
+            assert limiter._waiters == deque()
+            with limiter.acquire():
+                assert limiter.active == 1
+            assert limiter.active == 0
+
+        def not_sleep_past_deadline():
+            limiter = ServerLimiter()
+            limiter._blocked_until = time.monotonic() + 5
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceededException):
+                with limiter.acquire(time.monotonic() + 1):
+                    pass
+            assert time.monotonic() - start < 0.5
+            assert limiter.active == 0
+
+    def describe_backoff():
+        def pause_with_retry_after():
+            limiter = ServerLimiter()
+            with limiter.acquire() as permit:
+                permit.status = 429
+                permit.retry_after = '5'
+            assert limiter._reserve() == pytest.approx(5, abs=0.1)
+
+        def pause_exponentially():
+            limiter = ServerLimiter(backoff_factor=0.5, max_backoff=1.5)
+            for expected in (0.5, 1, 1.5):
+                limiter._blocked_until = 0
+                with limiter.acquire() as permit:
+                    permit.status = 503
+                assert limiter._reserve() == pytest.approx(expected, abs=0.1)
+
+        def adapt_concurrency():
+            limiter = ServerLimiter(max_concurrency=8, backoff_factor=0)
+            with limiter.acquire() as permit:
+                permit.status = 429
+            assert limiter.concurrency_limit == 4
+            with limiter.acquire() as permit:
+                permit.status = 429
+            assert limiter.concurrency_limit == 2
+
+            for _ in range(3):
+                with limiter.acquire() as permit:
+                    permit.status = 200
+            assert limiter.concurrency_limit == 3
+
+        def ignore_errors():
+            limiter = ServerLimiter(max_concurrency=8)
+            with pytest.raises(ValueError):
+                with limiter.acquire():
+                    raise ValueError('dummy')
+            assert limiter.concurrency_limit == 8
+            assert limiter._reserve() == 0
+
+
+def describe_RateLimiter():
+    def share_limiter_per_server():
+        rate_limiter = RateLimiter(rate=5, max_concurrency=2)
+        limiter = rate_limiter.for_server('http://localhost')
+        assert rate_limiter.for_server('http://localhost') is limiter
+        assert rate_limiter.for_server('http://example.com') is not limiter
+        assert (limiter.rate, limiter.burst, limiter.max_concurrency) == (5, 5, 2)
+
+
+def describe_acquire():
+    def allow_without_limiter():
+        with acquire(None) as permit:
+            permit.status = 200
+
+    def allow_without_limiter_in_coroutine():
+        async def run():
+            async with aacquire(None) as permit:
+                permit.status = 200
+
+        asyncio.run(run())
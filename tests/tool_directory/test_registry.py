@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from tool_directory.exceptions import ToolNotFoundException
+from tool_directory.registry import ToolRegistry, default_registry, fingerprint
+
+INTEGRATION_URL = 'https://tool-directory.dialogplay.jp/integrations/sample/integration.yaml'
+
+
+def _integration(description):
+    content = open('tests/fixtures/integrations/sample/integration.yaml', encoding='UTF-8').read()
+    return content.replace('dummy integration description', description)
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry(ttl=60)
+    yield registry
+    registry.close()
+
+
+def describe_fingerprint():
+    def hide_parameters():
+        assert 'secret' not in fingerprint({'api_key': 'secret'})
+        assert fingerprint({'a': '1', 'b': '2'}) == fingerprint({'b': '2', 'a': '1'})
+        assert fingerprint({'a': '1'}) != fingerprint({'a': '2'})
+
+
+def describe_ToolRegistry():
+    def share_tools(requests_mock, registry):
+        tools = registry.get_tools('sample', parameters={'api_key': 'dummy'})
+        assert isinstance(tools, tuple)
+        assert tools[0].parameters == {'api_key': 'dummy'}
+        assert registry.get_tools('sample', parameters={'api_key': 'dummy'}) is tools
+        assert registry.info() == (1, 1, 0, 0, 1)
+
+    def key_by_language_and_parameters(requests_mock, registry):
+        english = registry.get_tools('sample')
+        japanese = registry.get_tools('sample', language='ja_JP')
+        other = registry.get_tools('sample', parameters={'api_key': 'other'})
+
+        assert japanese[0].endpoint.description == 'APIからダミーデータを取得する。'
+        assert english[0].endpoint.description == 'Retrieves dummy data from api.'
+        assert other is not english
+        assert registry.get_tools('sample', language='ja') is japanese
+        # Keys of the same integration share fetched documents
+        assert requests_mock.call_count == 2
+
+    def load_once_for_concurrent_requests(requests_mock, registry):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get_tools('sample'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(x is results[0] for x in results)
+        assert registry.info().misses == 1
+        assert requests_mock.call_count == 2
+
+    def raise_error_for_unknown_integration(requests_mock, registry):
+        with pytest.raises(ToolNotFoundException):
+            registry.get_tools('not_found')
+        assert registry.info().size == 0
+
+    def describe_refresh():
+        @pytest.fixture
+        def registry():
+            registry = ToolRegistry(ttl=0)
+            yield registry
+            registry.close()
+
+        def serve_stale_tools_while_refreshing(requests_mock, registry):
+            stale = registry.get_tools('sample')
+            requests_mock.get(INTEGRATION_URL, text=_integration('updated description'))
+
+            assert registry.get_tools('sample') is stale
+            registry.join()
+
+            fresh = registry.get_tools('sample')
+            assert fresh is not stale
+            assert fresh[0].description.startswith('Description: updated description')
+            assert registry.info().refreshes >= 1
+
+        def not_block_on_directory(requests_mock, registry):
+            stale = registry.get_tools('sample')
+            started = threading.Event()
+            release = threading.Event()
+
+            def slow(request, context):
+                started.set()
+                release.wait(5)
+                return _integration('slow description')
+
+            requests_mock.get(INTEGRATION_URL, text=slow)
+            assert registry.get_tools('sample') is stale
+            assert started.wait(5)
+            # Requests during the refresh do not wait for it nor start another one
+            assert registry.get_tools('sample') is stale
+            release.set()
+            registry.join()
+            # One refresh fetching integration.yaml and openapi.yaml
+            assert requests_mock.call_count == 4
+
+        def keep_stale_tools_on_failure(requests_mock, registry, caplog):
+            stale = registry.get_tools('sample')
+            requests_mock.get(INTEGRATION_URL, status_code=503)
+
+            registry.get_tools('sample')
+            registry.join()
+
+            assert registry.info().failures == 1
+            assert 'keep serving stale tools' in caplog.text
+            assert registry.get_tools('sample') is stale
+            registry.join()
+
+    def refresh_now(requests_mock, registry):
+        stale = registry.get_tools('sample')
+        requests_mock.get(INTEGRATION_URL, text=_integration('updated description'))
+
+        fresh = registry.refresh('sample')
+        assert fresh is not stale
+        assert registry.get_tools('sample') is fresh
+        assert fresh[0].description.startswith('Description: updated description')
+
+    def warm_integrations(requests_mock, registry, caplog):
+        registry.warm(['sample', ('refs', 'ja'), ('sample', 'en', {'api_key': 'dummy'}), 'not_found'])
+        assert registry.info().size == 3
+        assert 'Failed to warm integration not_found' in caplog.text
+
+        count = requests_mock.call_count
+        registry.get_tools('refs', language='ja')
+        assert requests_mock.call_count == count
+
+
+def describe_default_registry():
+    def return_singleton():
+        assert default_registry() is default_registry()
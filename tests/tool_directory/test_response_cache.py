@@ -0,0 +1,142 @@
+import os
+import time
+from email.utils import formatdate
+
+from tool_directory.response_cache import ResponseCache, freshness_lifetime, parse_cache_control
+
+
+def describe_parse_cache_control():
+    def parse_directives():
+        assert parse_cache_control('public, Max-Age=60, no-transform, foo="bar"') == {
+            'public': None,
+            'max-age': '60',
+            'no-transform': None,
+            'foo': 'bar',
+        }
+        assert parse_cache_control(None) == {}
+
+
+def describe_freshness_lifetime():
+    def use_default_ttl():
+        assert freshness_lifetime({}, 30) == 30
+
+    def prefer_s_maxage():
+        assert freshness_lifetime({'Cache-Control': 's-maxage=10, max-age=60'}, 30) == 10
+        assert freshness_lifetime({'Cache-Control': 'max-age=60'}, 30) == 60
+
+    def not_store():
+        assert freshness_lifetime({'Cache-Control': 'no-store'}, 30) == 0
+        assert freshness_lifetime({'Cache-Control': 'no-cache'}, 30) == 0
+        assert freshness_lifetime({'Cache-Control': 'private, max-age=600'}, 30) == 0
+        assert freshness_lifetime({'Cache-Control': 'max-age=invalid'}, 30) == 0
+
+    def use_expires():
+        now = time.time()
+        headers = {'Date': formatdate(now, usegmt=True), 'Expires': formatdate(now + 120, usegmt=True)}
+        assert freshness_lifetime(headers, 30) == 120
+        assert freshness_lifetime({'Expires': '0'}, 30) == 0
+
+    def subtract_age():
+        assert freshness_lifetime({'Cache-Control': 'max-age=60', 'Age': '50'}, 30) == 10
+
+
+def describe_ResponseCache():
+    def describe_key():
+        def depend_on_request():
+            cache = ResponseCache()
+            key = cache.key('get', 'http://localhost/a', {'params': {'q': '1', 'r': '2'}, 'headers': {}})
+            assert key == cache.key('get', 'http://localhost/a', {'params': {'r': '2', 'q': '1'}, 'headers': {}})
+            assert key != cache.key('get', 'http://localhost/b', {'params': {'q': '1', 'r': '2'}, 'headers': {}})
+            assert key != cache.key('get', 'http://localhost/a', {'params': {'q': '1'}, 'headers': {}})
+            assert key != cache.key(
+                'get', 'http://localhost/a', {'params': {'q': '1', 'r': '2'}, 'headers': {'X-Api-Key': 'a'}}
+            )
+
+        def not_contain_secret():
+            key = ResponseCache().key('get', 'http://localhost/a', {'headers': {'Authorization': 'secret-token'}})
+            assert 'secret' not in key
+            assert len(key) == 64
+
+    def cache_response():
+        cache = ResponseCache()
+        assert cache.set('key', 200, {}, b'{"result": "dummy"}')
+        assert cache.get('key').decode() == {'result': 'dummy'}
+        assert cache.get('missing') is None
+
+        info = cache.info()
+        assert (info.hits, info.misses, info.size, info.bytes) == (1, 1, 1, 19)
+
+    def decode_text():
+        cache = ResponseCache()
+        cache.set('key', 200, {}, 'テキスト'.encode('shift_jis'), encoding='shift_jis')
+        assert cache.get('key').decode() == 'テキスト'
+
+    def not_cache_uncacheable_response():
+        cache = ResponseCache()
+        assert not cache.set('key', 404, {}, b'Not found')
+        assert not cache.set('key', 200, {'Cache-Control': 'no-store'}, b'dummy')
+        assert not cache.set('key', 200, {'Cache-Control': 'private, max-age=600'}, b'dummy')
+        assert cache.get('key') is None
+
+    def expire_response():
+        cache = ResponseCache()
+        cache.set('key', 200, {'Cache-Control': 'max-age=1', 'Age': '0'}, b'dummy')
+        cache._entries['key'].expires_at = time.time() - 1
+        assert cache.get('key') is None
+        assert cache.info().size == 0
+
+    def evict_least_recently_used():
+        cache = ResponseCache(maxsize=2)
+        cache.set('a', 200, {}, b'a')
+        cache.set('b', 200, {}, b'b')
+        cache.get('a')
+        cache.set('c', 200, {}, b'c')
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.info().evictions == 1
+
+    def bound_by_bytes():
+        cache = ResponseCache(max_bytes=10)
+        cache.set('a', 200, {}, b'12345')
+        cache.set('b', 200, {}, b'12345')
+        cache.set('c', 200, {}, b'12345')
+        cache.set('d', 200, {}, b'12345678901')
+
+        assert cache.info().size == 2
+        assert cache.info().bytes == 10
+        assert cache.get('d') is None
+
+    def describe_with_directory():
+        def share_responses_through_disk(tmp_path):
+            ResponseCache(directory=str(tmp_path)).set('key', 200, {}, b'"dummy"')
+
+            cache = ResponseCache(directory=str(tmp_path))
+            assert cache.get('key').decode() == 'dummy'
+            assert cache.info().size == 1
+
+        def remove_expired_file(tmp_path):
+            cache = ResponseCache(directory=str(tmp_path))
+            cache.set('key', 200, {'Cache-Control': 'max-age=60', 'Age': '59'}, b'dummy')
+            with open(tmp_path / 'key', 'rb') as f:
+                content = f.read().replace(b'"expires_at": ', b'"expires_at": -')
+            with open(tmp_path / 'key', 'wb') as f:
+                f.write(content)
+
+            assert ResponseCache(directory=str(tmp_path)).get('key') is None
+            assert not os.path.exists(tmp_path / 'key')
+
+        def evict_files(tmp_path):
+            cache = ResponseCache(directory=str(tmp_path), max_disk_size=100)
+            cache.set('a', 200, {}, b'x' * 40)
+            os.utime(tmp_path / 'a', (0, 0))
+            cache.set('b', 200, {}, b'x' * 40)
+
+            assert sorted(os.listdir(tmp_path)) == ['b']
+
+        def clear_files(tmp_path):
+            cache = ResponseCache(directory=str(tmp_path))
+            cache.set('key', 200, {}, b'dummy')
+            cache.clear()
+            assert os.listdir(tmp_path) == []
+            assert cache.get('key') is None
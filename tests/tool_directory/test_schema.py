@@ -0,0 +1,73 @@
+import threading
+
+from tool_directory.schema import SchemaCache, create_args_schema, default_schema_cache, get_args_fields
+
+
+def describe_SchemaCache():
+    def create_schema_with_required_flags():
+        schema = SchemaCache().get([('id', True), ('query', False)])
+        assert schema.schema().get('properties').keys() == {'id', 'query'}
+        assert schema.schema().get('required') == ['id']
+        assert get_args_fields(schema) == [('id', True), ('query', False)]
+
+    def create_schema_with_argument_types():
+        schema = SchemaCache().get([('id', True), ('body', True, 'any'), ('tags', False, 'any')])
+        assert schema(id='1', body={'name': 'pochi'}).body == {'name': 'pochi'}
+        assert schema.schema().get('required') == ['id', 'body']
+        assert get_args_fields(schema) == [('id', True), ('body', True, 'any'), ('tags', False, 'any')]
+
+    def reuse_schema_for_same_signature():
+        cache = SchemaCache()
+        schema = cache.get([('id', True), ('query', False)])
+        assert cache.get([('id', True), ('query', False)]) is schema
+        assert cache.get([('id', True), ('query', True)]) is not schema
+        assert cache.get([('query', False), ('id', True)]) is not schema
+
+        info = cache.info()
+        assert (info.hits, info.misses, info.evictions, info.size) == (1, 3, 0, 3)
+
+    def evict_least_recently_used():
+        cache = SchemaCache(maxsize=2)
+        first = cache.get([('a', True)])
+        cache.get([('b', True)])
+        cache.get([('a', True)])
+        cache.get([('c', True)])
+
+        assert cache.info().evictions == 1
+        assert cache.get([('a', True)]) is first
+        assert cache.info().misses == 3
+        cache.get([('b', True)])
+        assert cache.info().misses == 4
+
+    def share_schema_between_threads():
+        cache = SchemaCache()
+        schemas = []
+
+        def get():
+            schemas.append(cache.get([('id', True)]))
+
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(x) for x in schemas}) == 1
+        assert cache.info().size == 1
+
+    def clear_schemas():
+        cache = SchemaCache()
+        cache.get([('id', True)])
+        cache.clear()
+        assert cache.info() == (0, 0, 0, 0, cache.maxsize)
+
+
+def describe_create_args_schema():
+    def use_default_cache():
+        schema = create_args_schema([('dummy_for_default', True)])
+        assert default_schema_cache.get([('dummy_for_default', True)]) is schema
+
+    def use_given_cache():
+        cache = SchemaCache()
+        create_args_schema([('id', True)], cache=cache)
+        assert cache.info().size == 1
@@ -0,0 +1,103 @@
+import pytest
+
+from tool_directory.exceptions import InvalidIndexException
+from tool_directory.search import SearchIndex, tokenize
+
+NAMES = ['sample', 'refs', 'security_schemes']
+
+
+@pytest.fixture
+def index(requests_mock):
+    return SearchIndex.build(NAMES)
+
+
+def describe_tokenize():
+    def split_words():
+        assert tokenize('List all pets of showPetById /stores/{storeId}') == [
+            'list',
+            'all',
+            'pets',
+            'of',
+            'show',
+            'pet',
+            'by',
+            'id',
+            'stores',
+            'store',
+            'id',
+        ]
+
+    def split_japanese_into_bigrams():
+        assert tokenize('不動産価格API') == ['不動', '動産', '産価', '価格', 'api']
+        assert tokenize('を') == ['を']
+
+
+def describe_SearchIndex():
+    def index_all_languages(index):
+        languages = {(x[0], x[1]) for x in index.documents}
+        assert languages == {
+            ('sample', 'en'),
+            ('sample', 'ja'),
+            ('refs', 'en'),
+            ('security_schemes', 'en'),
+        }
+
+    def skip_missing_integration(requests_mock, caplog):
+        index = SearchIndex.build(['sample', 'not_found'], languages=['en'])
+        assert {x[0] for x in index.documents} == {'sample'}
+        assert 'Failed to index not_found' in caplog.text
+
+    def build_from_local_directory():
+        index = SearchIndex.build(NAMES, source='tests/fixtures')
+        assert (
+            index.get_tools('pets in the store', k=1, source='tests/fixtures')[0].endpoint.path
+            == '/stores/{storeId}/pets'
+        )
+
+    def search_top_k(index):
+        hits = index.search('pets in the store', k=2)
+        assert len(hits) == 2
+        assert (hits[0].integration, hits[0].method, hits[0].path) == ('refs', 'get', '/stores/{storeId}/pets')
+        assert hits[0].score > hits[1].score
+
+    def search_in_japanese(index):
+        hits = index.search('ダミーデータを取得', k=1)
+        assert (hits[0].integration, hits[0].language, hits[0].path) == ('sample', 'ja', '/pets')
+
+        hits = index.search('市区町村の一覧', k=1)
+        assert hits[0].path == '/ex-api/external/XIT002'
+
+    def return_endpoint_once(index):
+        hits = index.search('sample pets', k=10)
+        keys = [(x.integration, x.method, x.path) for x in hits]
+        assert len(keys) == len(set(keys))
+
+    def filter_by_language(index):
+        assert index.search('ダミーデータ', language='en') == []
+        assert all(x.language == 'ja' for x in index.search('pets', language='ja'))
+
+    def return_nothing_for_unknown_words(index):
+        assert index.search('weather forecast') == []
+
+    def save_and_load(index, tmp_path):
+        path = str(tmp_path / 'index' / 'directory.tdi')
+        index.save(path)
+
+        loaded = SearchIndex.load(path)
+        assert loaded.documents == index.documents
+        assert loaded.search('pets in the store') == index.search('pets in the store')
+
+    def raise_error_for_invalid_file(tmp_path):
+        path = tmp_path / 'invalid.tdi'
+        path.write_bytes(b'not an index')
+        with pytest.raises(InvalidIndexException):
+            SearchIndex.load(str(path))
+
+    def materialize_only_top_k_tools(index):
+        tools = index.get_tools('list pets in the store', k=1, parameters={'refs': {'api_key': 'dummy'}})
+        assert [x.name for x in tools] == ['GET http://localhost/refs/stores/:storeId/pets']
+        assert tools[0].parameters == {'api_key': 'dummy'}
+
+    def materialize_tools_in_hit_language(index):
+        tools = index.get_tools('ダミーデータを取得', k=1)
+        assert 'APIからダミーデータを取得する。' in tools[0].description
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import httpx
+
+from tool_directory.session import (
+    AsyncSessionPool,
+    SessionPool,
+    cap_timeout,
+    default_async_session_pool,
+    default_session_pool,
+)
+
+
+def describe_SessionPool():
+    def describe_get_session():
+        def share_session_per_origin():
+            pool = SessionPool()
+            session = pool.get_session('http://localhost/dummy/pets')
+            assert pool.get_session('http://localhost/other') is session
+            assert pool.get_session('http://localhost:8080/dummy') is not session
+            assert pool.get_session('https://localhost/dummy') is not session
+
+        def configure_adapter():
+            pool = SessionPool(pool_connections=2, pool_maxsize=20, retries=5, backoff_factor=1)
+            adapter = pool.get_session('https://localhost').get_adapter('https://localhost')
+            assert adapter._pool_connections == 2
+            assert adapter._pool_maxsize == 20
+            assert adapter.max_retries.total == 5
+            assert adapter.max_retries.backoff_factor == 1
+
+        def disable_keep_alive():
+            pool = SessionPool(keep_alive=False)
+            assert pool.get_session('http://localhost').headers['Connection'] == 'close'
+
+    def describe_request():
+        def apply_default_timeout(requests_mock):
+            requests_mock.get('http://localhost/dummy', text='ok')
+
+            pool = SessionPool(timeout=5)
+            pool.request('get', 'http://localhost/dummy')
+            pool.request('get', 'http://localhost/dummy', timeout=1)
+
+            assert requests_mock.request_history[0].timeout == 5
+            assert requests_mock.request_history[1].timeout == 1
+
+        def limit_timeouts_by_deadline(requests_mock):
+            requests_mock.get('http://localhost/dummy', text='ok')
+
+            pool = SessionPool(timeout=(1, 30))
+            pool.request('get', 'http://localhost/dummy', expires=time.monotonic() + 2)
+
+            timeout = requests_mock.request_history[0].timeout.clone()
+            assert timeout.connect_timeout == 1
+            assert 1.5 < timeout.read_timeout <= 2
+
+        def not_retry_statuses_by_default(http_server):
+            server = http_server(503, {'Retry-After': '2'})
+            start = time.monotonic()
+            assert SessionPool().request('get', server.url).status_code == 503
+            assert time.monotonic() - start < 1
+            assert server.requests == 1
+
+        def retry_statuses_without_waiting_for_retry_after(http_server):
+            server = http_server(503, {'Retry-After': '3600'})
+            start = time.monotonic()
+            response = SessionPool(retries=2, backoff_factor=0, status_forcelist=(503,)).request('get', server.url)
+            assert response.status_code == 503
+            assert time.monotonic() - start < 1
+            assert server.requests == 3
+
+        def stop_retrying_before_deadline(http_server):
+            server = http_server(503)
+            pool = SessionPool(backoff_factor=5, status_forcelist=(503,))
+            start = time.monotonic()
+            response = pool.request('get', server.url, expires=time.monotonic() + 1)
+            assert response.status_code == 503
+            assert time.monotonic() - start < 1
+            # The first retry is immediate and the second one would back off for 10 seconds
+            assert server.requests == 2
+
+    def describe_close():
+        def drop_sessions():
+            pool = SessionPool()
+            session = pool.get_session('http://localhost')
+            pool.close()
+            assert pool.get_session('http://localhost') is not session
+
+
+def describe_AsyncSessionPool():
+    def describe_get_client():
+        def share_client_per_origin_in_event_loop():
+            pool = AsyncSessionPool()
+
+            async def get_clients():
+                return (
+                    pool.get_client('http://localhost/dummy'),
+                    pool.get_client('http://localhost/other'),
+                    pool.get_client('http://localhost:8080/dummy'),
+                )
+
+            first, second, third = asyncio.run(get_clients())
+            assert first is second
+            assert first is not third
+
+            another_loop, _, _ = asyncio.run(get_clients())
+            assert another_loop is not first
+
+        def configure_client():
+            pool = AsyncSessionPool(max_connections=50, max_keepalive_connections=10, timeout=5)
+
+            async def get_client():
+                return pool.get_client('http://localhost')
+
+            client = asyncio.run(get_client())
+            assert client.timeout == httpx.Timeout(5)
+
+    def describe_request():
+        def send_request_with_transport():
+            def handler(request):
+                return httpx.Response(200, text=f'{request.method} {request.url}')
+
+            pool = AsyncSessionPool(transport=httpx.MockTransport(handler))
+
+            async def send():
+                response = await pool.request('get', 'http://localhost/dummy', params={'query': 'dummy'})
+                await pool.aclose()
+                return response
+
+            response = asyncio.run(send())
+            assert response.text == 'GET http://localhost/dummy?query=dummy'
+
+
+def test_default_session_pool():
+    assert default_session_pool() is default_session_pool()
+    assert default_async_session_pool() is default_async_session_pool()
+
+
+def test_cap_timeout():
+    assert cap_timeout(30, None) == 30
+    assert cap_timeout(None, 2) == 2
+    assert cap_timeout(30, 2) == 2
+    assert cap_timeout(1, 2) == 1
+    assert cap_timeout((1, 30), 2) == (1, 2)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+
+from tool_directory.stream import TRUNCATED_KEY, TRUNCATION_MARKER, JsonStreamParser, ResponseReader, parse_fields
+
+DOCUMENT = {
+    'name': 'Tokyo',
+    'main': {'temp': 29.54, 'humidity': 64, 'flags': [True, False, None]},
+    'list': [{'id': 1, 'text': 'a "quoted" text'}, {'id': 2, 'text': '東京\n'}],
+    'empty': {},
+    'count': -1.5e3,
+}
+
+
+def _chunks(text, size):
+    chunks = []
+    for start in range(0, len(text), size):
+        end = start + size
+        chunks.append(text[start:end])
+    return chunks
+
+
+def describe_parse_fields():
+    def build_selector():
+        assert parse_fields(None) is True
+        assert parse_fields(['name', 'main.temp', 'list.*.id']) == {
+            'name': True,
+            'main': {'temp': True},
+            'list': {'*': {'id': True}},
+        }
+
+    def prefer_whole_value():
+        assert parse_fields(['main', 'main.temp']) == {'main': True}
+
+
+def describe_JsonStreamParser():
+    @pytest.mark.parametrize('size', [1, 2, 3, 7, 1000])
+    def parse_chunks(size):
+        parser = JsonStreamParser()
+        for chunk in _chunks(json.dumps(DOCUMENT, ensure_ascii=False), size):
+            parser.feed(chunk)
+        assert parser.close() == DOCUMENT
+
+    @pytest.mark.parametrize('size', [1, 5, 1000])
+    def project_fields(size):
+        parser = JsonStreamParser(parse_fields(['name', 'main.temp', 'list.*.id', 'list.1.text']))
+        for chunk in _chunks(json.dumps(DOCUMENT), size):
+            parser.feed(chunk)
+        assert parser.close() == {
+            'name': 'Tokyo',
+            'main': {'temp': 29.54},
+            'list': [{'id': 1}, {'id': 2, 'text': '東京\n'}],
+        }
+
+    def parse_scalar():
+        parser = JsonStreamParser()
+        parser.feed('12')
+        parser.feed('3 ')
+        assert parser.close() == 123
+
+    def return_partial_result():
+        parser = JsonStreamParser()
+        parser.feed('{"name": "Tokyo", "list": [{"id": 1}, {"id": 2, "text": "unterminated')
+        assert parser.partial() == {'name': 'Tokyo', 'list': [{'id': 1}, {'id': 2}]}
+
+    @pytest.mark.parametrize(
+        'text',
+        ['{"a": tru}', '[1] 2', '{"a": 1', ']', '"unterminated', '{"a": }', '[1,]', '{"a" 1}', '[1 2]', '{1: 2}'],
+    )
+    def raise_error_for_invalid_json(text):
+        parser = JsonStreamParser()
+        with pytest.raises(ValueError):
+            parser.feed(text)
+            parser.close()
+
+
+def describe_ResponseReader():
+    def read_json():
+        content = json.dumps(DOCUMENT).encode('utf-8')
+        consumer = ResponseReader().read(_chunks(content, 10), 'application/json')
+        assert consumer.result() == DOCUMENT
+        assert consumer.bytes == len(content)
+        assert not consumer.truncated
+
+    def detect_json_without_content_type():
+        assert ResponseReader().read([b' [1, ', b'2]']).result() == [1, 2]
+
+    def read_text():
+        consumer = ResponseReader().read(_chunks('東京の天気'.encode('utf-8'), 1), 'text/plain')
+        assert consumer.result() == '東京の天気'
+
+    def fall_back_to_text():
+        assert ResponseReader().read([b'[INFO] ', b'not json'], 'text/plain').result() == '[INFO] not json'
+
+    def fall_back_to_text_of_invalid_json_content():
+        assert ResponseReader().read([b'{"a": }'], 'application/json').result() == '{"a": }'
+        html = [b'<html><body>', b'Service Unavailable</body></html>']
+        assert (
+            ResponseReader().read(html, 'application/json').result() == '<html><body>Service Unavailable</body></html>'
+        )
+        truncated = ResponseReader(max_bytes=6).read(html, 'application/json')
+        assert truncated.result() == '<html>' + TRUNCATION_MARKER
+
+    def truncate_object():
+        content = json.dumps(DOCUMENT).encode('utf-8')
+        consumer = ResponseReader(max_bytes=70).read(_chunks(content, 16), 'application/json')
+        assert consumer.truncated
+        assert consumer.bytes == 70
+        assert consumer.result() == {
+            'name': 'Tokyo',
+            'main': {'temp': 29.54, 'humidity': 64, 'flags': []},
+            TRUNCATED_KEY: True,
+        }
+
+    def truncate_list():
+        consumer = ResponseReader(max_bytes=8).read([b'[1, 2, 3, 4, 5]'], 'application/json')
+        # 3 may continue in the rest of the response
+        assert consumer.result() == [1, 2, TRUNCATION_MARKER]
+
+    def truncate_text():
+        consumer = ResponseReader(max_bytes=5).read([b'abc', b'defgh'], 'text/plain')
+        assert consumer.result() == 'abcde' + TRUNCATION_MARKER
+
+    def not_truncate_at_exact_size():
+        consumer = ResponseReader(max_bytes=5).read([b'abc', b'de'], 'text/plain')
+        assert consumer.result() == 'abcde'
+
+    def stop_reading_at_budget():
+        read = []
+
+        def chunks():
+            for chunk in [b'[1, ', b'2, ', b'3]']:
+                read.append(chunk)
+                yield chunk
+
+        ResponseReader(max_bytes=5).read(chunks(), 'application/json')
+        assert len(read) == 2
+
+    def read_async_chunks():
+        async def chunks():
+            for chunk in [b'{"name": ', b'"Tokyo", "id": 1}']:
+                yield chunk
+
+        consumer = asyncio.run(ResponseReader(fields=['name']).aread(chunks(), 'application/json'))
+        assert consumer.result() == {'name': 'Tokyo'}
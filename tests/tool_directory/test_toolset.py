@@ -0,0 +1,68 @@
+import pytest
+from pydantic.v1 import BaseModel
+
+from tool_directory.model import Endpoint, OpenApiTool
+from tool_directory.toolset import Operation, ToolSet
+
+
+def describe_ToolSet():
+    class ArgsSchema(BaseModel):
+        pass
+
+    operations = [
+        Operation(position=0, method='get', path='/pets', operation_id='listPets', tags=('pets',)),
+        Operation(position=1, method='post', path='/pets', operation_id='createPets', tags=('pets', 'write')),
+        Operation(position=2, method='get', path='/stores/{id}', operation_id='showStore', tags=('stores',)),
+    ]
+
+    @pytest.fixture
+    def built():
+        return []
+
+    @pytest.fixture
+    def toolset(built):
+        def factory(operation):
+            built.append(operation.position)
+            endpoint = Endpoint(
+                method=operation.method,
+                path=operation.path,
+                description='Endpoint description',
+                args_schema=ArgsSchema,
+                args_source={},
+            )
+            return OpenApiTool(description='Integration', server='http://localhost', endpoint=endpoint, parameters={})
+
+        return ToolSet(operations, factory)
+
+    def build_tools_on_access(toolset, built):
+        assert len(toolset) == 3
+        assert built == []
+
+        assert toolset[1].name == 'POST http://localhost/pets'
+        assert toolset[1] is toolset[1]
+        assert built == [1]
+        assert toolset.built() == 1
+
+        assert [tool.name for tool in toolset] == [
+            'GET http://localhost/pets',
+            'POST http://localhost/pets',
+            'GET http://localhost/stores/:id',
+        ]
+        assert built == [1, 0, 2]
+
+    def filter_operations(toolset, built):
+        assert [x.position for x in toolset.filter(path_prefix='/pets').operations] == [0, 1]
+        assert [x.position for x in toolset.filter(method='GET').operations] == [0, 2]
+        assert [x.position for x in toolset.filter(tag='write').operations] == [1]
+        assert [x.position for x in toolset.filter(operation_id='showStore').operations] == [2]
+        assert [x.position for x in toolset.filter(path_prefix='/pets', method='get').operations] == [0]
+        assert [x.position for x in toolset.filter(path='/stores/{id}').operations] == [2]
+        assert len(toolset.filter(path='/stores')) == 0
+        assert len(toolset.filter(tag='unknown')) == 0
+        assert built == []
+
+    def share_built_tools_with_filtered_set(toolset, built):
+        filtered = toolset.filter(tag='pets')
+        assert filtered[0] is toolset[0]
+        assert toolset[:1][0] is toolset[0]
+        assert built == [0]
@@ -0,0 +1,58 @@
+import asyncio
+import io
+
+import pytest
+
+from tool_directory.upload import BINARY, FORM, JSON, MULTIPART, aiter_content, body_kind, encode_content, is_stream
+
+
+@pytest.mark.parametrize(
+    'media_type, kind',
+    [
+        ('application/json', JSON),
+        ('application/merge-patch+json; charset=utf-8', JSON),
+        ('Application/X-WWW-Form-Urlencoded', FORM),
+        ('multipart/form-data', MULTIPART),
+        ('application/octet-stream', BINARY),
+        ('*/*', BINARY),
+    ],
+)
+def test_body_kind(media_type, kind):
+    assert body_kind(media_type) == kind
+
+
+def test_is_stream():
+    assert is_stream(b'bytes')
+    assert is_stream(io.BytesIO())
+    assert is_stream(x for x in [b'a'])
+    assert not is_stream('text')
+    assert not is_stream({'name': 'pochi'})
+    assert not is_stream([b'a'])
+
+
+def test_encode_content():
+    stream = io.BytesIO()
+    assert encode_content(stream) is stream
+    assert encode_content('テキスト') == 'テキスト'.encode('utf-8')
+    assert encode_content({'name': 'ポチ'}) == '{"name": "ポチ"}'.encode('utf-8')
+
+
+def describe_aiter_content():
+    def _collect(value, chunk_size=4):
+        async def collect():
+            return [x async for x in aiter_content(value, chunk_size)]
+
+        return asyncio.run(collect())
+
+    def read_file_by_chunks():
+        assert _collect(io.BytesIO(b'0123456789')) == [b'0123', b'4567', b'89']
+
+    def encode_chunks_of_iterators():
+        assert _collect(iter(['ab', b'cd', bytearray(b'ef')])) == [b'ab', b'cd', b'ef']
+
+    def pass_async_iterators():
+        async def chunks():
+            yield b'ab'
+            yield 'cd'
+
+        assert _collect(chunks()) == [b'ab', b'cd']
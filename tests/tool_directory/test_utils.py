@@ -1,6 +1,8 @@
+import os
+
 import pytest
 
-from tool_directory.utils import convert_to_iso639
+from tool_directory.utils import convert_to_iso639, remove_file, write_atomic
 
 
 @pytest.mark.parametrize(
@@ -14,3 +16,23 @@ from tool_directory.utils import convert_to_iso639
 )
 def test_convert_to_iso639(language, expected):
     assert convert_to_iso639(language) == expected
+
+
+def describe_write_atomic():
+    def write_file(tmp_path):
+        path = tmp_path / 'file.txt'
+        write_atomic(str(path), b'first')
+        write_atomic(str(path), b'second')
+
+        assert path.read_bytes() == b'second'
+        assert os.listdir(tmp_path) == ['file.txt']
+
+
+def describe_remove_file():
+    def ignore_missing_file(tmp_path):
+        path = tmp_path / 'file.txt'
+        path.write_bytes(b'')
+        remove_file(str(path))
+        remove_file(str(path))
+
+        assert not path.exists()